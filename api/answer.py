@@ -1,65 +1,70 @@
 import configparser
+import hashlib
 import json
 import random
-import re
+import threading
 import time
-from pathlib import Path
-from re import sub
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 import requests
 from openai import OpenAI
 from urllib3 import disable_warnings, exceptions
 
+from api.answer_cache import (
+    NOT_FOUND,
+    PROVIDER_ERROR,
+    TYPE_MISMATCH,
+    CacheBackend,
+    CacheDAO,
+    parse_negative_ttl,
+)
 from api.answer_check import *
+from api.answer_metrics import (
+    CACHE_FUZZY_HIT,
+    CACHE_HIT,
+    CACHE_MISS,
+    CACHE_NEGATIVE_SKIP,
+    METRICS,
+    PROVIDER_ANSWERED,
+    PROVIDER_ERRORS,
+    PROVIDER_NOT_FOUND,
+    PROVIDER_REJECTED,
+    PROVIDER_TOKENS,
+    AnswerMetrics,
+)
+from api.http_client import RequestWithRetry
+from api.llm_pack import format_options, query_packed, remove_md_json_wrapper
 from api.logger import logger
+from api.question_normalizer import clean_title, strip_option_labels
+from api.rate_limiter import TokenBucketLimiter
+from api.token_pool import TokenPool
 
 # 关闭警告
 disable_warnings(exceptions.InsecureRequestWarning)
 
 
-class CacheDAO:
-    """
-    @Author: SocialSisterYi
-    @Reference: https://github.com/SocialSisterYi/xuexiaoyi-to-xuexitong-tampermonkey-proxy
-    """
-
-    DEFAULT_CACHE_FILE = "cache.json"
-
-    def __init__(self, file: str = DEFAULT_CACHE_FILE):
-        self.cache_file = Path(file)
-        if not self.cache_file.is_file():
-            self._write_cache({})
-
-    def _read_cache(self) -> dict:
-        try:
-            with self.cache_file.open("r", encoding="utf8") as fp:
-                return json.load(fp)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
-    def _write_cache(self, data: dict) -> None:
-        try:
-            with self.cache_file.open("w", encoding="utf8") as fp:
-                json.dump(data, fp, ensure_ascii=False, indent=4)
-        except IOError as e:
-            logger.error(f"Failed to write cache: {e}")
-
-    def get_cache(self, question: str):
-        data = self._read_cache()
-        return data.get(question)
-
-    def add_cache(self, question: str, answer: str) -> None:
-        data = self._read_cache()
-        data[question] = answer
-        self._write_cache(data)
-
-
 class Tiku:
     CONFIG_PATH = "config.ini"  # 默认配置文件路径
+    CACHE_FILE = CacheDAO.DEFAULT_CACHE_FILE  # 答案缓存文件路径
     DISABLE = False  # 停用标志
     SUBMIT = False  # 提交标志
     COVER_RATE = 0.8  # 覆盖率
+    FUZZY_THRESHOLD = 0.0  # 近似题目匹配的最低相似度, 0表示关闭
+    QUERY_CONCURRENCY = 4  # 批量查询时同时进行的单题查询数
+    MAX_CONCURRENCY = 4  # 题库允许的最大并发数, 自行控制请求间隔的题库应设为1
+    BATCH_SIZE = 0  # 批量接口单次请求的最大题数, 0表示题库不支持批量接口
+    PACK_SIZE = 1  # 打包查询时每次请求的最大题数, 仅对支持打包的大模型题库有效
+    PACK_TOKEN_BUDGET = 0  # 打包查询时每次请求提示词的token预算, 0表示不限制
+    HTTP_POOL_SIZE = 10  # 题库连接池大小
+    HTTP_TIMEOUT = (10, 30)  # 题库请求超时 (连接超时, 读取超时)
+    RATE_LIMIT_FILE = TokenBucketLimiter.DEFAULT_FILE  # 限流状态文件, 多进程共享配额
+    REQUEST_INTERVAL = 0.0  # 同一题库同一token两次请求的最小间隔, 单位秒
+    TOKEN_POOL_FILE = TokenPool.DEFAULT_FILE  # 多token余额状态文件
+    # 未能获取答案的题目在有效期内不再向该题库查询, 按原因区分, 单位秒
+    NEGATIVE_TTL = {NOT_FOUND: 12 * 3600, TYPE_MISMATCH: 12 * 3600, PROVIDER_ERROR: 300}
     true_list = []
     false_list = []
 
@@ -67,6 +72,14 @@ class Tiku:
         self._name = None
         self._api = None
         self._conf = None
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._local = threading.local()
+        self.token_pool: Optional[TokenPool] = None
+        # 共享答案存储, 为空时答案保存在本地缓存文件中
+        self.cache_backend: Optional[CacheBackend] = None
+        # 查询统计, 默认计入进程内共享的实例
+        self.metrics: AnswerMetrics = METRICS
 
     @property
     def name(self):
@@ -92,6 +105,43 @@ class Tiku:
     def token(self, value):
         self._token = value
 
+    @property
+    def session(self) -> requests.Session:
+        """题库共用的长连接会话, 首次使用时按连接池配置创建"""
+        with self._session_lock:
+            if self._session is None:
+                self._session = RequestWithRetry.create_session(
+                    max_retries=0,
+                    pool_connections=2,
+                    pool_maxsize=max(self.HTTP_POOL_SIZE, self.QUERY_CONCURRENCY),
+                )
+            return self._session
+
+    @property
+    def rate_limiter(self) -> TokenBucketLimiter:
+        # 同一状态文件在进程内共享一个实例
+        return TokenBucketLimiter.get_instance(self.RATE_LIMIT_FILE)
+
+    def rate_limit_key(self, token=None) -> str:
+        """限流桶的键, 同一题库的同一token共享配额, token只保存摘要"""
+        digest = hashlib.sha1(str(token or "").encode("utf-8")).hexdigest()[:12]
+        return f"{type(self).__name__}:{digest}"
+
+    def _wait_rate_limit(self, token=None) -> None:
+        """向题库发起请求前调用, 按令牌桶等待到可用的请求配额"""
+        if self.REQUEST_INTERVAL <= 0:
+            return
+        waited = self.rate_limiter.acquire(
+            self.rate_limit_key(token), 1 / self.REQUEST_INTERVAL
+        )
+        if waited > 0:
+            logger.debug(f"{self.name}请求限流, 等待 {waited:.2f} 秒")
+
+    @property
+    def cache_dao(self) -> CacheDAO:
+        # 同一缓存文件与共享存储在进程内共享一个实例
+        return CacheDAO.get_instance(self.CACHE_FILE, self.cache_backend)
+
     def init_tiku(self):
         # 仅用于题库初始化, 应该在题库载入后作初始化调用, 随后才可以使用题库
         # 尝试根据配置文件设置提交模式
@@ -111,6 +161,22 @@ class Tiku:
             cover_rate_value = self._conf.get("cover_rate", 0.9)
             self.COVER_RATE = float(cover_rate_value) if cover_rate_value else 0.9
 
+            # 设置近似题目匹配阈值
+            fuzzy_threshold_value = self._conf.get("fuzzy_threshold", 0)
+            self.FUZZY_THRESHOLD = (
+                float(fuzzy_threshold_value) if fuzzy_threshold_value != "" else 0.0
+            )
+
+            # 设置批量查询并发数, 不超过题库自身允许的上限
+            query_concurrency_value = self._conf.get(
+                "query_concurrency", self.QUERY_CONCURRENCY
+            )
+            if query_concurrency_value not in ("", None):
+                self.QUERY_CONCURRENCY = int(float(query_concurrency_value))
+            self.QUERY_CONCURRENCY = max(
+                1, min(self.QUERY_CONCURRENCY, self.MAX_CONCURRENCY)
+            )
+
             # 设置判断题选项
             true_list_value = self._conf.get("true_list", "正确,对,√,是")
             false_list_value = self._conf.get("false_list", "错误,错,×,否,不对,不正确")
@@ -125,6 +191,48 @@ class Tiku:
                 else false_list_value
             )
 
+            # 设置请求间隔 #428, 由同一题库同一token的所有任务共享
+            delay_value = self._conf.get("delay", 0)
+            self.REQUEST_INTERVAL = (
+                float(delay_value) if delay_value not in ("", None) else 0.0
+            )
+            rate_limit_file_value = self._conf.get(
+                "rate_limit_file", self.RATE_LIMIT_FILE
+            )
+            self.RATE_LIMIT_FILE = rate_limit_file_value or None
+            token_pool_file_value = self._conf.get(
+                "token_pool_file", self.TOKEN_POOL_FILE
+            )
+            self.TOKEN_POOL_FILE = token_pool_file_value or None
+
+            # 设置未命中记录的有效期, 题库专属配置 (如 tikuyanxi_negative_ttl) 覆盖通用配置
+            self.NEGATIVE_TTL = parse_negative_ttl(
+                self._conf.get("negative_ttl", ""), type(self).NEGATIVE_TTL
+            )
+            self.NEGATIVE_TTL = parse_negative_ttl(
+                self._conf.get(f"{self.provider_id.lower()}_negative_ttl", ""),
+                self.NEGATIVE_TTL,
+            )
+
+            # 设置题库连接池与超时
+            pool_size_value = self._conf.get("http_pool_size", "")
+            if pool_size_value not in ("", None):
+                self.HTTP_POOL_SIZE = max(1, int(float(pool_size_value)))
+            connect_timeout_value = self._conf.get("http_connect_timeout", "")
+            read_timeout_value = self._conf.get("http_read_timeout", "")
+            self.HTTP_TIMEOUT = (
+                (
+                    float(connect_timeout_value)
+                    if connect_timeout_value not in ("", None)
+                    else self.HTTP_TIMEOUT[0]
+                ),
+                (
+                    float(read_timeout_value)
+                    if read_timeout_value not in ("", None)
+                    else self.HTTP_TIMEOUT[1]
+                ),
+            )
+
             # 调用自定义题库初始化
             self._init_tiku()
 
@@ -137,6 +245,38 @@ class Tiku:
         # 仅用于题库初始化, 例如配置token, 交由自定义题库完成
         pass
 
+    def close(self):
+        """关闭题库持有的连接并保存token状态, 程序退出前调用"""
+        # 将写后日志中的答案写入缓存
+        CacheDAO.flush_all()
+        if self.token_pool is not None:
+            self.token_pool.close()
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _load_pack_config(self, prefix: str = ""):
+        """
+        读取打包查询配置, 题库专属配置 (如 deepseek_pack_size) 优先于通用配置
+
+        Args:
+            prefix: 题库专属配置的前缀
+
+        Returns:
+            (BATCH_SIZE, 每次请求的token预算), 打包大小不超过1时BATCH_SIZE为0
+        """
+
+        def read(key, default):
+            value = self._conf.get(prefix + key, "") if prefix else ""
+            if value in ("", None):
+                value = self._conf.get(key, "")
+            return default if value in ("", None) else int(float(value))
+
+        pack_size = read("pack_size", self.PACK_SIZE)
+        token_budget = read("pack_token_budget", self.PACK_TOKEN_BUDGET)
+        return (pack_size if pack_size > 1 else 0), max(0, token_budget)
+
     def config_set(self, config):
         self._conf = config
 
@@ -157,39 +297,263 @@ class Tiku:
         if self.DISABLE:
             return None
 
-        # 预处理, 去除【单选题】这样与标题无关的字段
+        self._prepare(q_info)
+        answer = self._query_cache(q_info)
+        if answer or self._skip_negative(q_info):
+            return answer
+        return self._accept_answer(q_info, *self._query_one(q_info))
+
+    def query_batch(self, q_infos: List[dict]) -> List[Optional[str]]:
+        """
+        批量查询多道题目的答案
+
+        先逐题查询缓存, 未命中的题目在题库支持批量接口时合并请求,
+        否则以有限的并发逐题查询
+
+        Args:
+            q_infos: 题目信息列表
+
+        Returns:
+            与输入顺序一致的答案列表, 未找到答案的位置为None
+        """
+        results: List[Optional[str]] = [None] * len(q_infos)
+        if self.DISABLE:
+            return results
+
+        # 未命中缓存的题目, 同一批次中完全相同的题目只查询一次
+        pending: Dict[tuple, List[int]] = {}
+        skipped = 0
+        for i, q_info in enumerate(q_infos):
+            self._prepare(q_info)
+            answer = self._query_cache(q_info)
+            if answer:
+                results[i] = answer
+                continue
+            if self._skip_negative(q_info):
+                skipped += 1
+                continue
+            key = (q_info["type"], q_info["title"], str(q_info.get("options", "")))
+            pending.setdefault(key, []).append(i)
+        if not pending:
+            return results
+
+        groups = list(pending.values())
+        misses = [q_infos[group[0]] for group in groups]
+        logger.info(
+            f"共{len(q_infos)}道题目, "
+            f"缓存命中{len(q_infos) - sum(map(len, groups)) - skipped}道, "
+            f"近期未能获取答案{skipped}道, 向{self.name}查询{len(misses)}道"
+        )
+        answers = self._query_many(misses)
+        for group, q_info, (answer, error) in zip(groups, misses, answers):
+            answer = self._accept_answer(q_info, answer, error)
+            for i in group:
+                results[i] = answer
+        return results
+
+    def _prepare(self, q_info: dict) -> None:
+        # 预处理, 去除题号、【单选题】、分值这样与标题无关的字段
         logger.debug(f"原始标题：{q_info['title']}")
-        q_info["title"] = sub(r"^\d+", "", q_info["title"])
-        q_info["title"] = sub(r"（\d+\.\d+分）$", "", q_info["title"])
+        q_info["title"] = clean_title(q_info["title"])
         logger.debug(f"处理后标题：{q_info['title']}")
 
-        # 先过缓存
-        cache_dao = CacheDAO()
-        answer = cache_dao.get_cache(q_info["title"])
+    def _query_cache(self, q_info: dict) -> Optional[str]:
+        """
+        查询缓存, 精确匹配未命中时再查找近似题目
+        """
+        # 缓存内部以规范化后的标题作为键
+        answer = self.cache_dao.get_cache(q_info["title"])
         if answer:
             logger.info(f"从缓存中获取答案：{q_info['title']} -> {answer}")
+            self.metrics.cache(CACHE_HIT)
             return answer.strip()
-        else:
-            answer = self._query(q_info)
-            if answer:
-                answer = answer.strip()
-                cache_dao.add_cache(q_info["title"], answer)
-                logger.info(f"从{self.name}获取答案：{q_info['title']} -> {answer}")
-                if check_answer(answer, q_info["type"], self):
-                    return answer
-                else:
-                    logger.info(f"从{self.name}获取到的答案类型与题目类型不符，已舍弃")
-                    return None
+        answer = self._query_similar(q_info)
+        self.metrics.cache(CACHE_FUZZY_HIT if answer else CACHE_MISS)
+        return answer
+
+    def _accept_answer(
+        self, q_info: dict, answer: Optional[str], error: bool = False
+    ) -> Optional[str]:
+        """
+        校验题库返回的答案与题目类型是否相符, 相符时写入缓存, 否则记录未命中
+
+        Args:
+            q_info: 题目信息
+            answer: 题库返回的原始答案
+            error: 查询过程中是否发生请求错误
+        """
+        if answer:
+            answer = answer.strip()
+            logger.info(f"从{self.name}获取答案：{q_info['title']} -> {answer}")
+            if check_answer(answer, q_info["type"], self):
+                self.cache_dao.add_cache(q_info["title"], answer)
+                return answer
+            logger.info(f"从{self.name}获取到的答案类型与题目类型不符，已舍弃")
+            self.metrics.provider(self.provider_id, PROVIDER_REJECTED)
+            self._record_miss(q_info, TYPE_MISMATCH)
+            return None
 
-            logger.error(f"从{self.name}获取答案失败：{q_info['title']}")
+        logger.error(f"从{self.name}获取答案失败：{q_info['title']}")
+        self._record_miss(q_info, PROVIDER_ERROR if error else NOT_FOUND)
         return None
 
+    @property
+    def provider_id(self) -> str:
+        """题库标识, 用作未命中记录与专属配置的键"""
+        return type(self).__name__
+
+    def _negative_reason(self, q_info: dict) -> Optional[str]:
+        """题目在当前题库仍在有效期内的未命中原因"""
+        return self.cache_dao.get_negative(q_info["title"], self.provider_id)
+
+    def _skip_negative(self, q_info: dict) -> bool:
+        """近期未能从题库获取答案的题目直接跳过, 不再重复请求"""
+        reason = self._negative_reason(q_info)
+        if reason:
+            self.metrics.cache(CACHE_NEGATIVE_SKIP)
+            logger.info(
+                f"近期未能从{self.name}获取答案({reason})，跳过：{q_info['title']}"
+            )
+        return bool(reason)
+
+    def _record_miss(self, q_info: dict, reason: str) -> None:
+        """记录未命中, 有效期由 NEGATIVE_TTL 按原因决定"""
+        self.cache_dao.add_negative(
+            q_info["title"], self.provider_id, reason, self.NEGATIVE_TTL.get(reason, 0)
+        )
+
+    def _mark_provider_error(self) -> None:
+        """
+        题库请求失败(而非没有答案)时由各题库调用, 该题目的未命中记录只保留较短时间
+        """
+        self._local.error = True
+
+    def _record_tokens(self, tokens) -> None:
+        """大模型题库在每次请求后调用, 记录消耗的 token 数"""
+        if tokens:
+            self.metrics.provider(self.provider_id, PROVIDER_TOKENS, int(tokens))
+
+    def _record_outcome(
+        self, latency: float, answers: List[Optional[str]], error: bool
+    ) -> None:
+        """记录一次题库请求的延迟, 以及其中每道题目是否得到答案"""
+        self.metrics.latency(self.provider_id, latency)
+        if error:
+            self.metrics.provider(self.provider_id, PROVIDER_ERRORS)
+        answered = sum(1 for answer in answers if answer)
+        self.metrics.provider(self.provider_id, PROVIDER_ANSWERED, answered)
+        self.metrics.provider(
+            self.provider_id, PROVIDER_NOT_FOUND, len(answers) - answered
+        )
+
+    def _query_one(self, q_info: dict) -> Tuple[Optional[str], bool]:
+        """
+        向题库查询单题
+
+        Returns:
+            (原始答案, 是否发生请求错误)
+        """
+        self._local.error = False
+        start = time.monotonic()
+        try:
+            answer = self._query(q_info)
+        except Exception:
+            self._record_outcome(time.monotonic() - start, [None], True)
+            self._record_miss(q_info, PROVIDER_ERROR)
+            raise
+        self._record_outcome(time.monotonic() - start, [answer], self._local.error)
+        return answer, self._local.error
+
+    def _query_contained(self, q_info: dict) -> Tuple[Optional[str], bool]:
+        """
+        批量查询中向题库查询单题, 请求异常只影响这一道题目
+        """
+        try:
+            return self._query_one(q_info)
+        except Exception as e:
+            logger.error(f"{self.name}查询异常：{e}")
+            return None, True
+
+    def _query_many(self, q_infos: List[dict]) -> List[Tuple[Optional[str], bool]]:
+        """
+        向题库查询多道题目, 返回与输入等长的 (原始答案, 是否发生请求错误) 列表
+
+        某一批(或某一题)请求异常时, 只有这些题目视为请求错误, 不影响其余题目
+        """
+        if self.BATCH_SIZE > 0:
+            answers = []
+            for start in range(0, len(q_infos), self.BATCH_SIZE):
+                chunk = q_infos[start : start + self.BATCH_SIZE]
+                self._local.error = False
+                started = time.monotonic()
+                try:
+                    chunk_answers = list(self._query_batch(chunk) or [])
+                except Exception as e:
+                    logger.error(f"{self.name}批量查询异常：{e}")
+                    self._record_outcome(
+                        time.monotonic() - started, [None] * len(chunk), True
+                    )
+                    answers.extend((None, True) for _ in chunk)
+                    continue
+                # 批量接口返回的数量不符时, 缺失部分视为未找到
+                chunk_answers += [None] * (len(chunk) - len(chunk_answers))
+                error = self._local.error
+                self._record_outcome(
+                    time.monotonic() - started, chunk_answers[: len(chunk)], error
+                )
+                answers.extend((a, error) for a in chunk_answers[: len(chunk)])
+            return answers
+
+        # 请求频率由各题库的令牌桶控制, 这里只限制并发数
+        workers = min(self.QUERY_CONCURRENCY, len(q_infos))
+        if workers <= 1:
+            return [self._query_contained(q_info) for q_info in q_infos]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tiku") as pool:
+            return list(pool.map(self._query_contained, q_infos))
+
+    def _query_similar(self, q_info: dict):
+        """
+        在缓存中查找近似题目, 只有答案能与当前题目的选项对应上时才采用
+        """
+        if self.FUZZY_THRESHOLD <= 0 or q_info["type"] not in (
+            "single",
+            "multiple",
+            "judgement",
+        ):
+            return None
+        match = self.cache_dao.find_similar(q_info["title"], self.FUZZY_THRESHOLD)
+        if not match:
+            return None
+        cached_title, answer, score = match
+        answer = answer.strip()
+        if not check_answer(answer, q_info["type"], self) or (
+            q_info["type"] != "judgement"
+            and not check_options(answer, q_info.get("options", ""))
+        ):
+            logger.debug(
+                f"近似题目的答案与当前选项不符，已舍弃：{cached_title} -> {answer}"
+            )
+            return None
+        logger.info(
+            f"从缓存中获取近似题目答案(相似度{score:.2f})：{q_info['title']} ≈ {cached_title} -> {answer}"
+        )
+        return answer
+
     def _query(self, q_info: dict):
         """
         查询接口, 交由自定义题库实现
         """
         pass
 
+    def _query_batch(self, q_infos: List[dict]) -> List[Optional[str]]:
+        """
+        批量查询接口, 由支持批量接口的题库实现并设置 BATCH_SIZE
+
+        Returns:
+            与输入顺序一致的答案列表, 未找到答案的位置为None
+        """
+        return [self._query(q_info) for q_info in q_infos]
+
     def get_tiku_from_config(self):
         """
         从配置文件加载题库, 这个配置可以是用户提供, 可以是默认配置文件
@@ -207,7 +571,12 @@ class Tiku:
             self.DISABLE = True
             logger.error("未找到题库配置, 已忽略题库功能")
             return self
-        new_cls = globals()[cls_name]()
+        # 多个题库以英文逗号分隔, 组合为MultiTiku
+        names = [name.strip() for name in cls_name.split(",") if name.strip()]
+        if len(names) > 1:
+            new_cls = MultiTiku(names)
+        else:
+            new_cls = globals()[names[0]]()
         new_cls.config_set(self._conf)
         return new_cls
 
@@ -252,47 +621,49 @@ class TikuYanxi(Tiku):
         self.name = "言溪题库"
         self.api = "https://tk.enncy.cn/query"
         self._token = None
-        self._token_index = 0  # token队列计数器
-        self._times = 100  # 查询次数剩余, 初始化为100, 查询后校对修正
 
     def _query(self, q_info: dict):
-        res = requests.get(
+        # 每次查询选用剩余次数最多的token
+        token = self._token = self.token_pool.acquire()
+        self._wait_rate_limit(token)
+        res = self.session.get(
             self.api,
             params={
                 "question": q_info["title"],
-                "token": self._token,
+                "token": token,
                 # 'type':q_info['type'], #修复478题目类型与答案类型不符（不想写后处理了）
                 # 没用，就算有type和options，言溪题库还是可能返回类型不符，问了客服，type仅用于收集
             },
             verify=False,
+            timeout=self.HTTP_TIMEOUT,
         )
         if res.status_code == 200:
             res_json = res.json()
             if not res_json["code"]:
                 # 如果是因为TOKEN次数到期, 则更换token
-                if self._times == 0 or "次数不足" in res_json["data"]["answer"]:
+                if "次数不足" in res_json["data"]["answer"]:
                     logger.info(f"TOKEN查询次数不足, 将会更换并重新搜题")
-                    self._token_index += 1
-                    self.load_token()
-                    # 重新查询
+                    self.token_pool.mark_exhausted(token)
+                    # 重新查询, 所有token都用完时抛出PermissionError
                     return self._query(q_info)
                 logger.error(
-                    f'{self.name}查询失败:\n\t剩余查询数{res_json["data"].get("times",f"{self._times}(仅参考)")}:\n\t消息:{res_json["message"]}'
+                    f'{self.name}查询失败:\n\t剩余查询数{res_json["data"].get("times",f"{self.token_pool.balances()}(仅参考)")}:\n\t消息:{res_json["message"]}'
                 )
                 return None
-            self._times = res_json["data"].get("times", self._times)
+            self.token_pool.update(token, balance=res_json["data"].get("times"), used=1)
             return res_json["data"]["answer"].strip()
         else:
             logger.error(f"{self.name}查询失败:\n{res.text}")
+            self._mark_provider_error()
         return None
 
     def load_token(self):
-        token_list = self._conf["tokens"].split(",")
-        if self._token_index == len(token_list):
-            # TOKEN 用完
-            logger.error("TOKEN用完, 请自行更换再重启脚本")
-            raise PermissionError(f"{self.name} TOKEN 已用完, 请更换")
-        self._token = token_list[self._token_index]
+        # 言溪题库的剩余次数随查询结果返回, 后台线程只负责定期保存状态
+        self.token_pool = TokenPool(
+            self.name, self._conf["tokens"].split(","), self.TOKEN_POOL_FILE
+        )
+        self._token = self.token_pool.acquire()
+        self.token_pool.start()
 
     def _init_tiku(self):
         self.load_token()
@@ -300,6 +671,8 @@ class TikuYanxi(Tiku):
 
 class TikuLike(Tiku):
     # Like知识库实现
+    BALANCE_REFRESH_INTERVAL = 60  # 刷新剩余查询次数的最小间隔, 单位秒
+
     def __init__(self) -> None:
         super().__init__()
         self.name = "Like知识库"
@@ -309,9 +682,7 @@ class TikuLike(Tiku):
         self.homepage = "https://www.datam.site"
         self._model = None
         self._token = None
-        self._times = -1
         self._search = False
-        self._count = 0
 
     def _query(self, q_info: dict):
         q_info_map = {
@@ -348,15 +719,19 @@ class TikuLike(Tiku):
         question = f"{q_info_prefix}{q_info['title']}\n{options}"
         ret = ""
         ans = ""
-        res = requests.post(
+        # 每次查询选用剩余次数最多的token
+        token = self._token = self.token_pool.acquire()
+        self._wait_rate_limit(token)
+        res = self.session.post(
             self.query_api,
             json={
                 "query": question,
-                "token": self._token,
+                "token": token,
                 "model": self._model if self._model else "",
                 "search": self._search,
             },
             verify=False,
+            timeout=self.HTTP_TIMEOUT,
         )
 
         if res.status_code == 200:
@@ -378,42 +753,53 @@ class TikuLike(Tiku):
                     ans = tans
         else:
             logger.error(f"{self.name}查询失败:\n{res.text}")
+            self._mark_provider_error()
             return None
 
         ret += str(ans)
 
-        self._times -= 1
-
-        # 10次查询后更新实际次数
-        self._count = (self._count + 1) % 10
-
-        if self._count == 0:
-            self.update_times()
+        # 实际次数由后台线程定期刷新, 这里只在本地扣减
+        self.token_pool.update(token, used=1)
 
         return ret
 
-    def update_times(self):
-        res = requests.post(
+    def update_times(self, token: str):
+        """
+        查询token的剩余次数, 由token池的后台线程定期调用
+
+        共用同一token的多个任务在一个刷新周期内只由其中一个请求余额接口
+        """
+        if not self.rate_limiter.try_acquire(
+            self.rate_limit_key(token) + ":balance",
+            1 / self.BALANCE_REFRESH_INTERVAL,
+        ):
+            return None
+        res = self.session.post(
             self.balance_api,
             json={
-                "token": self._token,
+                "token": token,
             },
             verify=False,
+            timeout=self.HTTP_TIMEOUT,
         )
         if res.status_code == 200:
             res_json = res.json()
-            self._times = res_json["data"].get("balance", self._times)
-            logger.info(f"当前LIKE知识库Token剩余查询次数为: {self._times}")
+            balance = res_json["data"].get("balance")
+            logger.info(f"当前LIKE知识库Token剩余查询次数为: {balance}")
+            return balance
         else:
             logger.error("TOKEN出现错误，请检查后再试")
+        return None
 
     def load_token(self):
-        token = (
-            self._conf["tokens"].split(",")[-1]
-            if "," in self._conf["tokens"]
-            else self._conf["tokens"]
+        self.token_pool = TokenPool(
+            self.name,
+            self._conf["tokens"].split(","),
+            self.TOKEN_POOL_FILE,
+            refresh=self.update_times,
+            refresh_interval=self.BALANCE_REFRESH_INTERVAL,
         )
-        self._token = token
+        self._token = self.token_pool.acquire()
 
     def load_config(self):
         self._search = self._conf["likeapi_search"]
@@ -430,7 +816,8 @@ class TikuLike(Tiku):
     def _init_tiku(self):
         self.load_token()
         self.load_config()
-        self.update_times()
+        # 在后台刷新各token的剩余次数, 不阻塞启动
+        self.token_pool.start()
 
 
 class TikuAdapter(Tiku):
@@ -454,17 +841,16 @@ class TikuAdapter(Tiku):
             type = 4
 
         options = q_info["options"]
-        res = requests.post(
+        self._wait_rate_limit(self.api)
+        res = self.session.post(
             self.api,
             json={
                 "question": q_info["title"],
-                "options": [
-                    sub(r"^[A-Za-z]\.?、?\s?", "", option)
-                    for option in options.split("\n")
-                ],
+                "options": strip_option_labels(options.split("\n")),
                 "type": type,
             },
             verify=False,
+            timeout=self.HTTP_TIMEOUT,
         )
         if res.status_code == 200:
             res_json = res.json()
@@ -478,6 +864,7 @@ class TikuAdapter(Tiku):
             return sep.join(res_json["answer"]["bestAnswer"]).strip()
         # else:
         #   logger.error(f'{self.name}查询失败:\n{res.text}')
+        self._mark_provider_error()
         return None
 
     def _init_tiku(self):
@@ -487,139 +874,131 @@ class TikuAdapter(Tiku):
 
 class AI(Tiku):
     # AI大模型答题实现
+    MAX_CONCURRENCY = 1  # 自行控制请求间隔, 不并发查询
+    PACK_SIZE = 20  # 打包查询时每次请求的最大题数, 1表示不打包
+    PACK_TOKEN_BUDGET = 4000  # 打包查询时每次请求提示词的token预算, 0表示不限制
+    HTTP_TIMEOUT = (10, 120)  # 打包请求的响应时间较长
+    # 大模型每次的输出可能不同, 未命中只在短时间内(如回滚重做时)不再查询
+    NEGATIVE_TTL = {NOT_FOUND: 600, TYPE_MISMATCH: 600, PROVIDER_ERROR: 120}
+
     def __init__(self) -> None:
         super().__init__()
         self.name = "AI大模型答题"
-        self.last_request_time = None
+        self._client = None
 
     def _query(self, q_info: dict):
-        def remove_md_json_wrapper(md_str):
-            # 使用正则表达式匹配Markdown代码块并提取内容
-            pattern = r"^\s*```(?:json)?\s*(.*?)\s*```\s*$"
-            match = re.search(pattern, md_str, re.DOTALL)
-            return match.group(1).strip() if match else md_str.strip()
-
-        if self.http_proxy:
-            proxy = self.http_proxy
-            httpx_client = httpx.Client(proxy=proxy)
-            client = OpenAI(
-                http_client=httpx_client, base_url=self.endpoint, api_key=self.key
-            )
-        else:
-            client = OpenAI(base_url=self.endpoint, api_key=self.key)
         # 去除选项字母，防止大模型直接输出字母而非内容
-        options_list = q_info["options"].split("\n")
-        cleaned_options = [re.sub(r"^[A-Z]\s*", "", option) for option in options_list]
-        options = "\n".join(cleaned_options)
+        options = format_options(q_info["options"])
         # 判断题目类型
-        if q_info["type"] == "single":
-            completion = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": '本题为单选题，你只能选择一个选项，请根据题目和选项回答问题，以json格式输出正确的选项内容，示例回答：{"Answer": ["答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
-                    },
-                    {
-                        "role": "user",
-                        "content": f"题目：{q_info['title']}\n选项：{options}",
-                    },
-                ],
-            )
-        elif q_info["type"] == "multiple":
-            completion = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": '本题为多选题，你必须选择两个或以上选项，请根据题目和选项回答问题，以json格式输出正确的选项内容，示例回答：{"Answer": ["答案1",\n"答案2",\n"答案3"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
-                    },
-                    {
-                        "role": "user",
-                        "content": f"题目：{q_info['title']}\n选项：{options}",
-                    },
-                ],
-            )
-        elif q_info["type"] == "completion":
-            completion = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": '本题为填空题，你必须根据语境和相关知识填入合适的内容，请根据题目回答问题，以json格式输出正确的答案，示例回答：{"Answer": ["答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
-                    },
-                    {"role": "user", "content": f"题目：{q_info['title']}"},
-                ],
-            )
-        elif q_info["type"] == "judgement":
-            completion = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": '本题为判断题，你只能回答正确或者错误，请根据题目回答问题，以json格式输出正确的答案，示例回答：{"Answer": ["正确"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
-                    },
-                    {"role": "user", "content": f"题目：{q_info['title']}"},
-                ],
-            )
+        type_prompts = {
+            "single": '本题为单选题，你只能选择一个选项，请根据题目和选项回答问题，以json格式输出正确的选项内容，示例回答：{"Answer": ["答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
+            "multiple": '本题为多选题，你必须选择两个或以上选项，请根据题目和选项回答问题，以json格式输出正确的选项内容，示例回答：{"Answer": ["答案1",\n"答案2",\n"答案3"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
+            "completion": '本题为填空题，你必须根据语境和相关知识填入合适的内容，请根据题目回答问题，以json格式输出正确的答案，示例回答：{"Answer": ["答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
+            "judgement": '本题为判断题，你只能回答正确或者错误，请根据题目回答问题，以json格式输出正确的答案，示例回答：{"Answer": ["正确"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
+        }
+        system_prompt = type_prompts.get(
+            q_info["type"],
+            '本题为简答题，你必须根据语境和相关知识填入合适的内容，请根据题目回答问题，以json格式输出正确的答案，示例回答：{"Answer": ["这是我的答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
+        )
+        if q_info["type"] in ("single", "multiple"):
+            content = f"题目：{q_info['title']}\n选项：{options}"
         else:
-            completion = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": '本题为简答题，你必须根据语境和相关知识填入合适的内容，请根据题目回答问题，以json格式输出正确的答案，示例回答：{"Answer": ["这是我的答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料',
-                    },
-                    {"role": "user", "content": f"题目：{q_info['title']}"},
-                ],
-            )
+            content = f"题目：{q_info['title']}"
 
+        output = self._complete(system_prompt, content)
+        if output is None:
+            return None
         try:
-            if self.last_request_time:
-                interval_time = time.time() - self.last_request_time
-                if interval_time < self.min_interval_seconds:
-                    sleep_time = self.min_interval_seconds - interval_time
-                    logger.debug(f"API请求间隔过短, 等待 {sleep_time} 秒")
-                    time.sleep(sleep_time)
-            self.last_request_time = time.time()
-            response = json.loads(
-                remove_md_json_wrapper(completion.choices[0].message.content)
-            )
+            response = json.loads(remove_md_json_wrapper(output))
             sep = "\n"
             return sep.join(response["Answer"]).strip()
         except:
             logger.error("无法解析大模型输出内容")
             return None
 
+    def _query_batch(self, q_infos: List[dict]) -> List[Optional[str]]:
+        return query_packed(
+            q_infos,
+            self._complete,
+            self._query,
+            self.BATCH_SIZE,
+            self.pack_token_budget,
+        )
+
+    def _complete(self, system_prompt: str, content: str) -> Optional[str]:
+        """
+        发送一次对话补全请求, 返回模型输出文本, 失败时返回None
+        """
+        self._wait_rate_limit(self.key)
+        try:
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content},
+                ],
+            )
+            usage = getattr(completion, "usage", None)
+            self._record_tokens(getattr(usage, "total_tokens", 0))
+            return completion.choices[0].message.content
+        except Exception as e:
+            logger.error(f"大模型API异常：{e}")
+            self._mark_provider_error()
+            return None
+
     def _init_tiku(self):
         self.endpoint = self._conf["endpoint"]
         self.key = self._conf["key"]
         self.model = self._conf["model"]
         self.http_proxy = self._conf["http_proxy"]
         self.min_interval_seconds = int(self._conf["min_interval_seconds"])
+        self.REQUEST_INTERVAL = max(self.REQUEST_INTERVAL, self.min_interval_seconds)
+        self.BATCH_SIZE, self.pack_token_budget = self._load_pack_config("")
+
+    @property
+    def client(self) -> OpenAI:
+        """长连接的OpenAI客户端, 首次使用时创建, 此后所有请求复用同一个连接池"""
+        with self._session_lock:
+            if self._client is None:
+                pool_size = max(self.HTTP_POOL_SIZE, self.QUERY_CONCURRENCY)
+                httpx_client = httpx.Client(
+                    proxy=self.http_proxy or None,
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                    ),
+                    timeout=httpx.Timeout(
+                        self.HTTP_TIMEOUT[1], connect=self.HTTP_TIMEOUT[0]
+                    ),
+                )
+                self._client = OpenAI(
+                    http_client=httpx_client, base_url=self.endpoint, api_key=self.key
+                )
+            return self._client
+
+    def close(self):
+        with self._session_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+        super().close()
 
 
 class SiliconFlow(Tiku):
     """硅基流动大模型答题实现"""
 
+    MAX_CONCURRENCY = 1  # 自行控制请求间隔, 不并发查询
+    PACK_SIZE = 20  # 打包查询时每次请求的最大题数, 1表示不打包
+    PACK_TOKEN_BUDGET = 4000  # 打包查询时每次请求提示词的token预算, 0表示不限制
+    HTTP_TIMEOUT = (10, 120)  # 打包请求的响应时间较长
+    # 大模型每次的输出可能不同, 未命中只在短时间内(如回滚重做时)不再查询
+    NEGATIVE_TTL = {NOT_FOUND: 600, TYPE_MISMATCH: 600, PROVIDER_ERROR: 120}
+
     def __init__(self):
         super().__init__()
         self.name = "硅基流动大模型"
-        self.last_request_time = None
 
     def _query(self, q_info: dict):
-        def remove_md_json_wrapper(md_str):
-            # 解析可能存在的JSON包装
-            pattern = r"^\s*```(?:json)?\s*(.*?)\s*```\s*$"
-            match = re.search(pattern, md_str, re.DOTALL)
-            return match.group(1).strip() if match else md_str.strip()
-
-        # 构造请求头
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         # 构造系统提示词
         system_prompt = ""
         if q_info["type"] == "single":
@@ -631,15 +1010,43 @@ class SiliconFlow(Tiku):
         elif q_info["type"] == "judgement":
             system_prompt = "本题为判断题，请回答'正确'或'错误'，以JSON格式输出：示例回答：{\"Answer\": [\"正确\"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料"
 
+        content = self._complete(
+            system_prompt, f"题目：{q_info['title']}\n选项：{q_info['options']}"
+        )
+        if content is None:
+            return None
+        try:
+            parsed = json.loads(remove_md_json_wrapper(content))
+            return "\n".join(parsed["Answer"]).strip()
+        except Exception as e:
+            logger.error(f"硅基流动API异常：{e}")
+            return None
+
+    def _query_batch(self, q_infos: List[dict]) -> List[Optional[str]]:
+        return query_packed(
+            q_infos,
+            self._complete,
+            self._query,
+            self.BATCH_SIZE,
+            self.pack_token_budget,
+        )
+
+    def _complete(self, system_prompt: str, content: str) -> Optional[str]:
+        """
+        发送一次对话补全请求, 返回模型输出文本, 失败时返回None
+        """
+        # 构造请求头
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
         # 构造请求体
         payload = {
             "model": self.model_name,
             "messages": [
                 {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": f"题目：{q_info['title']}\n选项：{q_info['options']}",
-                },
+                {"role": "user", "content": content},
             ],
             "stream": False,
             "max_tokens": 4096,
@@ -649,28 +1056,27 @@ class SiliconFlow(Tiku):
         }
 
         # 处理请求间隔
-        if self.last_request_time:
-            interval = time.time() - self.last_request_time
-            if interval < self.min_interval:
-                time.sleep(self.min_interval - interval)
+        self._wait_rate_limit(self.api_key)
 
         try:
-            response = requests.post(
-                self.api_endpoint, headers=headers, json=payload, timeout=30
+            response = self.session.post(
+                self.api_endpoint,
+                headers=headers,
+                json=payload,
+                timeout=self.HTTP_TIMEOUT,
             )
-            self.last_request_time = time.time()
-
             if response.status_code == 200:
                 result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                parsed = json.loads(remove_md_json_wrapper(content))
-                return "\n".join(parsed["Answer"]).strip()
+                self._record_tokens((result.get("usage") or {}).get("total_tokens"))
+                return result["choices"][0]["message"]["content"]
             else:
                 logger.error(f"API请求失败：{response.status_code} {response.text}")
+                self._mark_provider_error()
                 return None
 
         except Exception as e:
             logger.error(f"硅基流动API异常：{e}")
+            self._mark_provider_error()
             return None
 
     def _init_tiku(self):
@@ -683,31 +1089,26 @@ class SiliconFlow(Tiku):
         self.model_name = self._conf.get("siliconflow_model", "deepseek-ai/DeepSeek-V3")
 
         self.min_interval = int(self._conf.get("min_interval_seconds", 3))
+        self.REQUEST_INTERVAL = max(self.REQUEST_INTERVAL, self.min_interval)
+        self.BATCH_SIZE, self.pack_token_budget = self._load_pack_config("siliconflow_")
 
 
 class DeepSeek(Tiku):
     """DeepSeek官方API题库实现"""
 
+    MAX_CONCURRENCY = 1  # 自行控制请求间隔, 不并发查询
+    PACK_SIZE = 20  # 打包查询时每次请求的最大题数, 1表示不打包
+    PACK_TOKEN_BUDGET = 4000  # 打包查询时每次请求提示词的token预算, 0表示不限制
+    HTTP_TIMEOUT = (10, 120)  # 打包请求的响应时间较长
+    # 大模型每次的输出可能不同, 未命中只在短时间内(如回滚重做时)不再查询
+    NEGATIVE_TTL = {NOT_FOUND: 600, TYPE_MISMATCH: 600, PROVIDER_ERROR: 120}
+
     def __init__(self) -> None:
         super().__init__()
         self.name = "DeepSeek题库"
-        self.last_request_time = None
 
     def _query(self, q_info: dict):
         """使用DeepSeek API查询答案"""
-
-        def remove_md_json_wrapper(md_str):
-            # 使用正则表达式匹配Markdown代码块并提取内容
-            pattern = r"^\s*```(?:json)?\s*(.*?)\s*```\s*$"
-            match = re.search(pattern, md_str, re.DOTALL)
-            return match.group(1).strip() if match else md_str.strip()
-
-        # 构建请求头
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         # 根据题目类型构建不同的系统提示
         type_prompts = {
             "single": '本题为单选题，你只能选择一个选项，请根据题目和选项回答问题，以json格式输出正确的选项内容，示例回答：{"Answer": ["答案"]}。除此之外不要输出任何多余的内容，也不要使用MD语法。',
@@ -719,25 +1120,54 @@ class DeepSeek(Tiku):
         system_prompt = type_prompts.get(q_info["type"], type_prompts["single"])
 
         # 去除选项字母
-        options_list = (
-            q_info["options"].split("\n") if isinstance(q_info["options"], str) else []
+        options = (
+            format_options(q_info["options"])
+            if isinstance(q_info["options"], str)
+            else ""
+        )
+
+        content = self._complete(
+            system_prompt,
+            (
+                f"题目：{q_info['title']}\n选项：{options}"
+                if options
+                else f"题目：{q_info['title']}"
+            ),
+        )
+        if content is None:
+            return None
+        try:
+            parsed = json.loads(remove_md_json_wrapper(content))
+            return "\n".join(parsed["Answer"]).strip()
+        except Exception as e:
+            logger.error(f"DeepSeek API异常：{e}")
+            return None
+
+    def _query_batch(self, q_infos: List[dict]) -> List[Optional[str]]:
+        return query_packed(
+            q_infos,
+            self._complete,
+            self._query,
+            self.BATCH_SIZE,
+            self.pack_token_budget,
         )
-        cleaned_options = [re.sub(r"^[A-Z]\s*", "", option) for option in options_list]
-        options = "\n".join(cleaned_options)
+
+    def _complete(self, system_prompt: str, content: str) -> Optional[str]:
+        """
+        发送一次对话补全请求, 返回模型输出文本, 失败时返回None
+        """
+        # 构建请求头
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
 
         # 构建请求payload
         payload = {
             "model": self.model_name,
             "messages": [
                 {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": (
-                        f"题目：{q_info['title']}\n选项：{options}"
-                        if options
-                        else f"题目：{q_info['title']}"
-                    ),
-                },
+                {"role": "user", "content": content},
             ],
             "stream": False,
             "max_tokens": 2048,
@@ -746,42 +1176,41 @@ class DeepSeek(Tiku):
         }
 
         # 处理请求间隔
-        if self.last_request_time:
-            interval = time.time() - self.last_request_time
-            if interval < self.min_interval:
-                time.sleep(self.min_interval - interval)
+        self._wait_rate_limit(self.api_key)
 
         try:
             # 发送请求
             if self.http_proxy:
                 proxies = {"http": self.http_proxy, "https": self.http_proxy}
-                response = requests.post(
+                response = self.session.post(
                     self.api_endpoint,
                     headers=headers,
                     json=payload,
-                    timeout=30,
+                    timeout=self.HTTP_TIMEOUT,
                     proxies=proxies,
                 )
             else:
-                response = requests.post(
-                    self.api_endpoint, headers=headers, json=payload, timeout=30
+                response = self.session.post(
+                    self.api_endpoint,
+                    headers=headers,
+                    json=payload,
+                    timeout=self.HTTP_TIMEOUT,
                 )
 
-            self.last_request_time = time.time()
-
             if response.status_code == 200:
                 result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                parsed = json.loads(remove_md_json_wrapper(content))
-                return "\n".join(parsed["Answer"]).strip()
+                self._record_tokens((result.get("usage") or {}).get("total_tokens"))
+                return result["choices"][0]["message"]["content"]
             else:
                 logger.error(
                     f"DeepSeek API请求失败：{response.status_code} {response.text}"
                 )
+                self._mark_provider_error()
                 return None
 
         except Exception as e:
             logger.error(f"DeepSeek API异常：{e}")
+            self._mark_provider_error()
             return None
 
     def _init_tiku(self):
@@ -792,4 +1221,236 @@ class DeepSeek(Tiku):
         self.api_key = self._conf["deepseek_key"]
         self.model_name = self._conf.get("deepseek_model", "deepseek-chat")
         self.min_interval = int(self._conf.get("min_interval_seconds", 3))
+        self.REQUEST_INTERVAL = max(self.REQUEST_INTERVAL, self.min_interval)
         self.http_proxy = self._conf.get("http_proxy", "")
+        self.BATCH_SIZE, self.pack_token_budget = self._load_pack_config("deepseek_")
+
+
+class ProviderStats:
+    """单个题库的延迟与命中统计, 用于对冲延迟与自适应排序"""
+
+    WINDOW = 100  # 参与延迟统计的最近请求数
+
+    def __init__(self) -> None:
+        self.attempts = 0
+        self.hits = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, hit: bool, error: bool = False) -> None:
+        with self._lock:
+            self.attempts += 1
+            self.hits += int(hit)
+            self.errors += int(error)
+            self._latencies.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """最近请求延迟的p分位数(秒), 没有样本时返回None"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            data = sorted(self._latencies)
+        return data[min(len(data) - 1, int(p * len(data)))]
+
+    @property
+    def hit_rate(self) -> float:
+        # 拉普拉斯平滑, 避免少量样本时命中率为0或1
+        return (self.hits + 1) / (self.attempts + 2)
+
+    def expected_latency(self) -> float:
+        """期望获得有效答案所需的时间, 越小越应优先查询"""
+        return (self.percentile(0.5) or 0.0) / self.hit_rate
+
+    def snapshot(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "errors": self.errors,
+            "hit_rate": round(self.hit_rate, 3),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+
+class MultiTiku(Tiku):
+    """
+    多题库组合实现, 在配置中以英文逗号分隔多个题库启用, 例如 provider=TikuYanxi,DeepSeek
+    hedge模式先查询排在首位的题库, 超过其历史延迟分位数仍未得到答案时再查询下一个;
+    parallel模式同时查询所有题库。采用第一个通过校验的答案并取消其余查询,
+    题库顺序会根据各自的延迟与命中率自适应调整
+    """
+
+    RACE_MODES = ("hedge", "parallel")
+    HEDGE_PERCENTILE = 0.9  # 对冲延迟取当前题库历史延迟的分位数
+    HEDGE_DEFAULT_DELAY = 2.0  # 样本不足时的对冲延迟, 单位秒
+    MIN_SAMPLES = 5  # 每个题库至少有这么多样本后才参与自适应排序
+
+    def __init__(self, provider_names: Optional[List[str]] = None) -> None:
+        super().__init__()
+        self.name = "多题库"
+        self.provider_names = list(provider_names or [])
+        self.providers: List[Tiku] = []
+        self.stats: List[ProviderStats] = []
+        self.race_mode = "hedge"
+        self._slots: List[threading.Semaphore] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _init_tiku(self):
+        race_mode = str(self._conf.get("race_mode", "hedge") or "hedge").lower()
+        if race_mode not in self.RACE_MODES:
+            logger.warning(f"未知的race_mode: {race_mode}, 将使用hedge")
+            race_mode = "hedge"
+        self.race_mode = race_mode
+        hedge_percentile_value = self._conf.get("hedge_percentile", "")
+        if hedge_percentile_value not in ("", None):
+            self.HEDGE_PERCENTILE = float(hedge_percentile_value)
+
+        for name in self.provider_names:
+            cls = globals().get(name)
+            if not (isinstance(cls, type) and issubclass(cls, Tiku)) or cls in (
+                Tiku,
+                MultiTiku,
+            ):
+                logger.error(f"未知的题库: {name}, 已忽略")
+                continue
+            provider = cls()
+            # 各题库的未命中记录与组合题库写入同一个缓存
+            provider.CACHE_FILE = self.CACHE_FILE
+            provider.cache_backend = self.cache_backend
+            provider.metrics = self.metrics
+            provider.config_set(self._conf)
+            try:
+                provider.init_tiku()
+            except Exception as e:
+                logger.error(f"{provider.name}初始化失败, 已忽略: {e}")
+                continue
+            if not provider.DISABLE:
+                self.providers.append(provider)
+
+        if not self.providers:
+            logger.error("没有可用的题库, 已忽略题库功能")
+            self.DISABLE = True
+            return
+        self.stats = [ProviderStats() for _ in self.providers]
+        # 每个题库的并发数仍受其自身限制
+        self._slots = [threading.Semaphore(p.QUERY_CONCURRENCY) for p in self.providers]
+        logger.info(
+            f"多题库: {' -> '.join(p.name for p in self.providers)}, 模式={self.race_mode}"
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._session_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.QUERY_CONCURRENCY * len(self.providers),
+                    thread_name_prefix="multi-tiku",
+                )
+            return self._executor
+
+    def ordered_providers(self) -> List[int]:
+        """
+        返回本次查询的题库顺序
+
+        所有题库都积累了足够样本后按期望延迟(延迟中位数/命中率)排序, 否则按配置顺序
+        """
+        order = list(range(len(self.providers)))
+        if all(s.attempts >= self.MIN_SAMPLES for s in self.stats):
+            order.sort(key=lambda i: self.stats[i].expected_latency())
+        return order
+
+    def _hedge_delay(self, index: int) -> float:
+        stats = self.stats[index]
+        if stats.attempts < self.MIN_SAMPLES:
+            return self.HEDGE_DEFAULT_DELAY
+        return stats.percentile(self.HEDGE_PERCENTILE)
+
+    def _query_provider(self, index: int, q_info: dict) -> Optional[str]:
+        """查询单个题库并记录统计, 仅返回通过校验的答案"""
+        provider = self.providers[index]
+        with self._slots[index]:
+            start = time.monotonic()
+            try:
+                answer, error = provider._query_one(q_info)
+            except Exception as e:
+                self.stats[index].record(time.monotonic() - start, False, error=True)
+                logger.warning(f"{provider.name}查询异常: {e}")
+                return None
+            latency = time.monotonic() - start
+        answer = answer.strip() if answer else None
+        hit = bool(answer) and check_answer(answer, q_info["type"], self)
+        self.stats[index].record(latency, hit, error=error)
+        if answer and not hit:
+            logger.info(f"从{provider.name}获取到的答案类型与题目类型不符，已舍弃")
+            self.metrics.provider(provider.provider_id, PROVIDER_REJECTED)
+            provider._record_miss(q_info, TYPE_MISMATCH)
+        elif hit:
+            logger.debug(f"{provider.name}用时{latency:.2f}秒获取答案")
+        else:
+            provider._record_miss(q_info, PROVIDER_ERROR if error else NOT_FOUND)
+        return answer if hit else None
+
+    def _negative_reason(self, q_info: dict) -> Optional[str]:
+        # 所有题库都近期未命中时才跳过
+        reasons = [p._negative_reason(q_info) for p in self.providers]
+        return reasons[0] if reasons and all(reasons) else None
+
+    def _record_miss(self, q_info: dict, reason: str) -> None:
+        # 各题库的未命中已在 _query_provider 中分别记录
+        pass
+
+    def _query(self, q_info: dict):
+        # 跳过近期未能给出该题答案的题库
+        order = [
+            i
+            for i in self.ordered_providers()
+            if not self.providers[i]._negative_reason(q_info)
+        ]
+        if not order:
+            return None
+        executor = self._get_executor()
+        pending = set()
+        launched = 0
+
+        def launch():
+            nonlocal launched
+            pending.add(executor.submit(self._query_provider, order[launched], q_info))
+            launched += 1
+
+        launch()
+        while self.race_mode == "parallel" and launched < len(order):
+            launch()
+
+        while pending:
+            # 还有题库未查询时, 最多等待当前题库的对冲延迟
+            timeout = (
+                self._hedge_delay(order[launched - 1])
+                if launched < len(order)
+                else None
+            )
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                answer = future.result()
+                if answer:
+                    # 尚未开始的查询直接取消, 正在进行的查询结果会被忽略
+                    for other in pending:
+                        other.cancel()
+                    return answer
+            if launched < len(order):
+                launch()
+        return None
+
+    def provider_stats(self) -> Dict[str, dict]:
+        """各题库的统计快照"""
+        return {p.name: s.snapshot() for p, s in zip(self.providers, self.stats)}
+
+    def close(self):
+        with self._session_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for provider in self.providers:
+            provider.close()
+        if self.stats:
+            logger.debug(f"多题库统计: {self.provider_stats()}")
+        super().close()
@@ -0,0 +1,779 @@
+# -*- coding: utf-8 -*-
+"""
+答案缓存模块
+
+使用带主键索引的 SQLite 存储题目答案, 并在进程内维护一个有界 LRU,
+查询复杂度为 O(log n), 写入为单行 upsert 而非整文件重写。
+题目经 question_normalizer 规范化后以哈希作为主键, 首次打开时会自动迁移
+旧版 cache.json 以及旧结构的数据表。
+精确查找未命中时, 可通过 find_similar 借助 FuzzyIndex 查找近似题目。
+题库未能给出答案的题目按题库记录在 negative_cache 表中, 在有效期内不再重复查询。
+答案也可以存放在 CacheBackend 提供的共享存储中(例如 Web 部署的数据库),
+此时本地数据库只保存未命中记录, 进程内 LRU 仍位于共享存储之前。
+写入答案默认经由 CacheJournal 追加到日志文件后立即返回, 由后台线程批量写入,
+批量读取与导出前会先写入全部待写记录。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from api.cache_journal import CacheJournal
+from api.fuzzy_index import FuzzyIndex
+from api.logger import logger
+from api.question_normalizer import question_key
+
+# 未能获取答案的原因
+NOT_FOUND = "not_found"  # 题库没有答案
+TYPE_MISMATCH = "type_mismatch"  # 答案与题目类型不符
+PROVIDER_ERROR = "provider_error"  # 题库请求失败
+NEGATIVE_REASONS = (NOT_FOUND, TYPE_MISMATCH, PROVIDER_ERROR)
+
+
+def parse_negative_ttl(value, default: Dict[str, float]) -> Dict[str, float]:
+    """
+    解析未命中记录的有效期配置
+
+    Args:
+        value: 单个数字表示对所有原因生效, 也可以按 "原因:秒数" 逐项设置,
+            例如 "not_found:3600,provider_error:300"; 为空时使用默认值
+        default: 默认的 {原因: 有效期(秒)}
+
+    Returns:
+        {原因: 有效期(秒)}, 0表示不记录
+
+    Raises:
+        ValueError: 原因未知或秒数不是非负数字
+    """
+    ttl = dict(default)
+    if value in ("", None):
+        return ttl
+    for item in str(value).split(","):
+        if not item.strip():
+            continue
+        reason, sep, seconds = item.rpartition(":")
+        seconds = float(seconds)
+        if seconds < 0:
+            raise ValueError(f"有效期不能为负数: {item}")
+        if not sep:
+            ttl = {r: seconds for r in NEGATIVE_REASONS}
+        elif reason.strip() in NEGATIVE_REASONS:
+            ttl[reason.strip()] = seconds
+        else:
+            raise ValueError(f"未知的未命中原因: {reason.strip()}")
+    return ttl
+
+
+class LRUCache:
+    """线程安全的有界 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Args:
+            maxsize: 最大条目数, 超出后淘汰最久未使用的条目
+        """
+        self.maxsize = max(0, int(maxsize))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class CacheBackend(ABC):
+    """
+    答案缓存的共享存储后端, 由部署环境实现
+
+    键为 question_normalizer 计算的规范化标题哈希, 多个进程通过同一后端共享答案
+    """
+
+    # 区分后端实例的标识, 不同命名空间的后端应返回不同的值
+    key = ""
+
+    @abstractmethod
+    def get(self, key_hash: str) -> Optional[Tuple[str, str]]:
+        """
+        查询答案
+
+        Returns:
+            (题目, 答案), 未命中时返回None
+        """
+        pass
+
+    @abstractmethod
+    def put(self, key_hash: str, question_key: str, title: str, answer: str) -> None:
+        """写入或覆盖答案"""
+        pass
+
+    def get_many(self, key_hashes: List[str]) -> Dict[str, Tuple[str, str]]:
+        """批量查询答案, 返回 {哈希: (题目, 答案)}, 未命中的哈希不包含在结果中"""
+        result = {}
+        for key_hash in key_hashes:
+            row = self.get(key_hash)
+            if row is not None:
+                result[key_hash] = row
+        return result
+
+    def put_many(self, rows: List[Tuple[str, str, str, str]]) -> None:
+        """批量写入 (哈希, 规范化标题, 题目, 答案)"""
+        for row in rows:
+            self.put(*row)
+
+    @abstractmethod
+    def iter_keys(self) -> Iterable[Tuple[str, str]]:
+        """遍历所有 (规范化标题, 哈希), 用于构建近似索引"""
+        pass
+
+    @abstractmethod
+    def iter_items(
+        self, after: str = "", limit: int = 1000
+    ) -> List[Tuple[str, str, str]]:
+        """
+        按哈希顺序分页读取答案
+
+        Args:
+            after: 上一页最后一条的哈希, 首页为空字符串
+            limit: 每页条数
+
+        Returns:
+            [(哈希, 题目, 答案)], 返回空列表表示已读完
+        """
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """答案条数"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class CacheDAO:
+    """
+    @Author: SocialSisterYi
+    @Reference: https://github.com/SocialSisterYi/xuexiaoyi-to-xuexitong-tampermonkey-proxy
+    """
+
+    DEFAULT_CACHE_FILE = "cache.db"
+    LEGACY_CACHE_FILE = "cache.json"
+    DEFAULT_LRU_SIZE = 4096
+    SCHEMA_VERSION = 3
+
+    _instances: Dict[str, "CacheDAO"] = {}
+    _refcounts: Dict[str, int] = {}  # 通过 acquire 登记的使用者数
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        file: str = DEFAULT_CACHE_FILE,
+        lru_size: int = DEFAULT_LRU_SIZE,
+        backend: Optional[CacheBackend] = None,
+        write_behind: bool = True,
+    ):
+        """
+        Args:
+            file: 缓存数据库路径; 传入旧版 .json 路径时使用同名 .db 文件并迁移其内容
+            lru_size: 进程内 LRU 的最大条目数
+            backend: 共享存储后端, 指定后答案读写均经由该后端
+            write_behind: 是否先写日志、由后台线程批量写入, 否则每次写入都等待事务完成
+        """
+        path = Path(file)
+        if path.suffix == ".json":
+            self.legacy_file = path
+            path = path.with_suffix(".db")
+        else:
+            self.legacy_file = path.with_suffix(".json")
+        self.cache_file = path
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._lru = LRUCache(lru_size)
+        self._negative_lru = LRUCache(lru_size)
+        self._fuzzy_index: Optional[FuzzyIndex] = None
+        self._conn = self._connect()
+        self._migrate_legacy()
+        self.clear_negative()
+        self._journal: Optional[CacheJournal] = None
+        self._journal_finalizer: Optional[weakref.finalize] = None
+        if write_behind:
+            # 每个缓存文件与后端的组合使用独立的日志, 启动时重放已退出进程遗留的日志
+            owner = hashlib.sha1(self.instance_key(path, backend).encode()).hexdigest()
+            self._journal = CacheJournal(
+                path.with_name(f"{path.name}.answers-{owner[:12]}-{os.getpid()}.jsonl"),
+                self._journal_sink(),
+            )
+            # 实例被回收或程序退出时停止后台线程
+            self._journal_finalizer = weakref.finalize(self, self._journal.close)
+
+    def _journal_sink(self):
+        """日志的写入函数, 只持有实例的弱引用, 不阻止实例被回收"""
+        write_rows = weakref.WeakMethod(self._write_rows)
+
+        def sink(rows: List[Tuple[str, str, str, str]]) -> bool:
+            write = write_rows()
+            # 实例已回收时记录保留在日志中, 下次启动时重放
+            return write(rows) if write is not None else False
+
+        return sink
+
+    @staticmethod
+    def instance_key(file, backend: Optional[CacheBackend] = None) -> str:
+        """区分共享实例的键, 由缓存文件与后端标识组成"""
+        key = str(Path(file).resolve())
+        if backend is not None:
+            key += f"|{type(backend).__name__}:{backend.key}"
+        return key
+
+    @classmethod
+    def get_instance(
+        cls, file: str = DEFAULT_CACHE_FILE, backend: Optional[CacheBackend] = None
+    ) -> "CacheDAO":
+        """获取指定缓存文件与后端的共享实例, 避免每道题都重新打开数据库"""
+        key = cls.instance_key(file, backend)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls(file, backend=backend)
+                cls._instances[key] = instance
+            return instance
+
+    @classmethod
+    def acquire(
+        cls, file: str = DEFAULT_CACHE_FILE, backend: Optional[CacheBackend] = None
+    ) -> "CacheDAO":
+        """
+        获取共享实例并登记一个使用者, 使用结束后必须调用 release
+
+        用于按用户或按请求创建后端的场景, 最后一个使用者释放后实例被关闭并移除,
+        长期运行的进程不会因为使用过的后端越来越多而持续占用内存与线程
+        """
+        key = cls.instance_key(file, backend)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls(file, backend=backend)
+                cls._instances[key] = instance
+            cls._refcounts[key] = cls._refcounts.get(key, 0) + 1
+            return instance
+
+    @classmethod
+    def release(
+        cls, file: str = DEFAULT_CACHE_FILE, backend: Optional[CacheBackend] = None
+    ) -> None:
+        """注销 acquire 登记的使用者, 没有使用者时写入待写记录并关闭实例"""
+        key = cls.instance_key(file, backend)
+        with cls._instances_lock:
+            count = cls._refcounts.get(key, 0) - 1
+            if count > 0:
+                cls._refcounts[key] = count
+                return
+            cls._refcounts.pop(key, None)
+            instance = cls._instances.pop(key, None)
+        if instance is not None:
+            instance.close()
+
+    @classmethod
+    def flush_all(cls) -> None:
+        """将所有共享实例的待写记录写入数据库"""
+        with cls._instances_lock:
+            instances = list(cls._instances.values())
+        for instance in instances:
+            instance.flush()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.cache_file.parent and not self.cache_file.parent.exists():
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.cache_file), check_same_thread=False, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < self.SCHEMA_VERSION:
+            self._upgrade_schema(conn, version)
+        return conn
+
+    def _upgrade_schema(self, conn: sqlite3.Connection, version: int) -> None:
+        """创建或升级数据表结构"""
+        conn.execute("BEGIN")
+        try:
+            legacy_rows = []
+            if version < 2:
+                # v1 以清理后的原始标题作为主键
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'answer_cache'"
+                ).fetchone()
+                if exists:
+                    legacy_rows = conn.execute(
+                        "SELECT question, answer, updated_at FROM answer_cache"
+                    ).fetchall()
+                    conn.execute("DROP TABLE answer_cache")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answer_cache ("
+                "key_hash TEXT PRIMARY KEY, "
+                "question_key TEXT NOT NULL, "
+                "title TEXT NOT NULL, "
+                "answer TEXT NOT NULL, "
+                "updated_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            if version < 3:
+                # v3 新增未命中记录, 每道题目每个题库一行
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS negative_cache ("
+                    "key_hash TEXT NOT NULL, "
+                    "provider TEXT NOT NULL, "
+                    "reason TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL, "
+                    "PRIMARY KEY (key_hash, provider)"
+                    ") WITHOUT ROWID"
+                )
+            if legacy_rows:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO answer_cache "
+                    "(key_hash, question_key, title, answer, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self._build_rows(legacy_rows),
+                )
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _build_rows(items):
+        """将 (标题, 答案, 时间) 转换为数据表行"""
+        for title, answer, updated_at in items:
+            normalized, key_hash = question_key(title)
+            if normalized:
+                yield key_hash, normalized, title, answer, updated_at
+
+    def _migrate_legacy(self) -> None:
+        """将旧版 cache.json 导入数据库, 完成后重命名为 .bak 防止重复导入"""
+        if self.backend is not None or not self.legacy_file.is_file():
+            return
+        try:
+            with self.legacy_file.open("r", encoding="utf8") as fp:
+                data = json.load(fp)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"旧版缓存文件读取失败, 已跳过迁移: {e}")
+            return
+        if not isinstance(data, dict):
+            return
+
+        now = time.time()
+        rows = list(
+            self._build_rows(
+                (question, answer, now)
+                for question, answer in data.items()
+                if question and isinstance(answer, str)
+            )
+        )
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                # 已存在的记录比旧文件更新, 不覆盖
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO answer_cache "
+                    "(key_hash, question_key, title, answer, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"迁移旧版缓存失败: {e}")
+                return
+
+        backup = self.legacy_file.with_suffix(self.legacy_file.suffix + ".bak")
+        try:
+            self.legacy_file.replace(backup)
+        except OSError as e:
+            logger.warning(f"旧版缓存文件重命名失败: {e}")
+        logger.info(
+            f"已将旧版缓存 {self.legacy_file} 中的 {len(rows)} 条记录迁移至 {self.cache_file}"
+        )
+
+    def get_cache(self, question: str) -> Optional[str]:
+        normalized, key_hash = question_key(question)
+        if not normalized:
+            return None
+        answer = self._lru.get(key_hash)
+        if answer is not None:
+            return answer
+        row = self._get_row(key_hash)
+        if row is None:
+            return None
+        self._lru.put(key_hash, row[1])
+        return row[1]
+
+    def _get_row(self, key_hash: str) -> Optional[Tuple[str, str]]:
+        """按哈希读取 (题目, 答案)"""
+        if self._journal is not None:
+            row = self._journal.get(key_hash)
+            if row is not None:
+                return row[2], row[3]
+        if self.backend is not None:
+            try:
+                return self.backend.get(key_hash)
+            except Exception as e:
+                logger.error(f"Failed to read shared cache: {e}")
+                return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, answer FROM answer_cache WHERE key_hash = ?",
+                (key_hash,),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def add_cache(self, question: str, answer: str) -> None:
+        normalized, key_hash = question_key(question)
+        if not normalized:
+            return
+        row = (key_hash, normalized, question, answer)
+        if self._journal is not None:
+            self._journal.append(row)
+        elif not self._write_rows([row]):
+            return
+        self._lru.put(key_hash, answer)
+        self._negative_lru.pop(key_hash)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.add(normalized, key_hash)
+
+    def _write_rows(self, rows: List[Tuple[str, str, str, str]]) -> bool:
+        """
+        将答案写入数据库或共享存储, 并删除这些题目的未命中记录
+
+        Args:
+            rows: [(哈希, 规范化标题, 题目, 答案)]
+
+        Returns:
+            是否写入成功
+        """
+        if self.backend is not None:
+            try:
+                self.backend.put_many(rows)
+            except Exception as e:
+                logger.error(f"Failed to write shared cache: {e}")
+                return False
+        elif not self._put_local(rows):
+            return False
+        key_hashes = [row[0] for row in rows]
+        with self._lock:
+            try:
+                for start in range(0, len(key_hashes), 500):
+                    chunk = key_hashes[start : start + 500]
+                    self._conn.execute(
+                        "DELETE FROM negative_cache "
+                        f"WHERE key_hash IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to clear negative cache: {e}")
+        return True
+
+    def flush(self) -> bool:
+        """
+        等待所有待写记录写入数据库
+
+        Returns:
+            是否全部写入成功
+        """
+        if self._journal is None:
+            return True
+        return self._journal.flush()
+
+    def _close_journal(self) -> None:
+        self._journal = None
+        if self._journal_finalizer is not None:
+            self._journal_finalizer()
+
+    def _put_local(self, rows: List[Tuple[str, str, str, str]]) -> bool:
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO answer_cache "
+                    "(key_hash, question_key, title, answer, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key_hash) DO UPDATE SET "
+                    "title = excluded.title, answer = excluded.answer, "
+                    "updated_at = excluded.updated_at",
+                    [row + (now,) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"Failed to write cache: {e}")
+                return False
+        return True
+
+    def get_many(self, key_hashes: List[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        批量查询答案, 用于导入时与已有记录比较
+
+        Args:
+            key_hashes: 规范化标题的哈希列表
+
+        Returns:
+            {哈希: (题目, 答案)}, 未命中的哈希不包含在结果中
+        """
+        self.flush()
+        if self.backend is not None:
+            return self.backend.get_many(key_hashes)
+        result = {}
+        # 分批查询, 避免超出SQLite的参数数量上限
+        for start in range(0, len(key_hashes), 500):
+            chunk = key_hashes[start : start + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key_hash, title, answer FROM answer_cache "
+                    f"WHERE key_hash IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            result.update(
+                (key_hash, (title, answer)) for key_hash, title, answer in rows
+            )
+        return result
+
+    def add_many(self, rows: List[Tuple[str, str, str, str]]) -> bool:
+        """
+        批量写入答案, 在一个事务中完成
+
+        Args:
+            rows: [(哈希, 规范化标题, 题目, 答案)]
+
+        Returns:
+            是否写入成功
+        """
+        if not rows:
+            return True
+        # 先写入日志中较早的记录, 避免其覆盖本次写入
+        self.flush()
+        if not self._write_rows(rows):
+            return False
+        for key_hash, normalized, _, _ in rows:
+            self._lru.pop(key_hash)
+            self._negative_lru.pop(key_hash)
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.add(normalized, key_hash)
+        return True
+
+    def iter_items(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """
+        按哈希顺序分页遍历所有答案, 内存占用与缓存大小无关
+
+        Yields:
+            (题目, 答案)
+        """
+        self.flush()
+        after = ""
+        while True:
+            if self.backend is not None:
+                rows = self.backend.iter_items(after, batch_size)
+            else:
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT key_hash, title, answer FROM answer_cache "
+                        "WHERE key_hash > ? ORDER BY key_hash LIMIT ?",
+                        (after, batch_size),
+                    ).fetchall()
+            if not rows:
+                return
+            for _, title, answer in rows:
+                yield title, answer
+            after = rows[-1][0]
+
+    def get_negative(self, question: str, provider: str) -> Optional[str]:
+        """
+        查询题目在指定题库的未命中记录
+
+        Args:
+            question: 题目标题
+            provider: 题库标识
+
+        Returns:
+            仍在有效期内的未命中原因, 没有记录或已过期时返回None
+        """
+        normalized, key_hash = question_key(question)
+        # 答案尚在日志中等待写入时, 数据库中的未命中记录已失效
+        if not normalized or (self._journal is not None and key_hash in self._journal):
+            return None
+        reason, expires_at = self._get_negatives(key_hash).get(provider, (None, 0.0))
+        return reason if expires_at > time.time() else None
+
+    def _get_negatives(self, key_hash: str) -> Dict[str, Tuple[str, float]]:
+        """题目在各题库的未命中记录 {题库: (原因, 过期时间)}, 经LRU缓存"""
+        entries = self._negative_lru.get(key_hash)
+        if entries is None:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT provider, reason, expires_at FROM negative_cache "
+                    "WHERE key_hash = ?",
+                    (key_hash,),
+                ).fetchall()
+            # 没有记录的题目也放入LRU, 避免每次都查询数据库
+            entries = {
+                provider: (reason, expires) for provider, reason, expires in rows
+            }
+            self._negative_lru.put(key_hash, entries)
+        return entries
+
+    def add_negative(
+        self, question: str, provider: str, reason: str, ttl: float
+    ) -> None:
+        """
+        记录题目在指定题库未能获取答案
+
+        Args:
+            question: 题目标题
+            provider: 题库标识
+            reason: 未命中原因, NEGATIVE_REASONS 之一
+            ttl: 有效期, 单位秒, 不大于0时不记录
+        """
+        normalized, key_hash = question_key(question)
+        if not normalized or ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO negative_cache "
+                    "(key_hash, provider, reason, expires_at) VALUES (?, ?, ?, ?)",
+                    (key_hash, provider, reason, expires_at),
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write negative cache: {e}")
+                return
+        entries = dict(self._get_negatives(key_hash))
+        entries[provider] = (reason, expires_at)
+        self._negative_lru.put(key_hash, entries)
+
+    def clear_negative(self, question: Optional[str] = None) -> int:
+        """
+        删除未命中记录, 写入答案时自动调用
+
+        Args:
+            question: 题目标题, 为None时删除所有已过期的记录
+
+        Returns:
+            删除的记录数
+        """
+        with self._lock:
+            try:
+                if question is None:
+                    cursor = self._conn.execute(
+                        "DELETE FROM negative_cache WHERE expires_at <= ?",
+                        (time.time(),),
+                    )
+                else:
+                    cursor = self._conn.execute(
+                        "DELETE FROM negative_cache WHERE key_hash = ?",
+                        (question_key(question)[1],),
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to clear negative cache: {e}")
+                return 0
+        if question is None:
+            self._negative_lru.clear()
+        else:
+            self._negative_lru.pop(question_key(question)[1])
+        return cursor.rowcount
+
+    def _get_fuzzy_index(self) -> FuzzyIndex:
+        """首次使用时从数据库构建近似索引, 之后随 add_cache 增量更新"""
+        if self._fuzzy_index is None:
+            self.flush()
+        with self._lock:
+            if self._fuzzy_index is None:
+                index = FuzzyIndex()
+                if self.backend is not None:
+                    index.add_many(self.backend.iter_keys())
+                else:
+                    index.add_many(
+                        self._conn.execute(
+                            "SELECT question_key, key_hash FROM answer_cache"
+                        )
+                    )
+                self._fuzzy_index = index
+            return self._fuzzy_index
+
+    def find_similar(
+        self, question: str, threshold: float
+    ) -> Optional[Tuple[str, str, float]]:
+        """
+        查找与题目最相似的已缓存题目
+
+        Args:
+            question: 题目标题
+            threshold: 最低相似度 (0~1)
+
+        Returns:
+            (缓存中的题目, 答案, 相似度), 没有达到阈值的题目时返回None
+        """
+        normalized, _ = question_key(question)
+        if not normalized:
+            return None
+        match = self._get_fuzzy_index().query(normalized, threshold)
+        if match is None:
+            return None
+        key_hash, score = match
+        row = self._get_row(key_hash)
+        if row is None:
+            return None
+        return row[0], row[1], score
+
+    def close(self) -> None:
+        self._close_journal()
+        with self._lock:
+            self._conn.close()
+        self._lru.clear()
+        self._negative_lru.clear()
+        if self.backend is not None:
+            self.backend.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        if self.backend is not None:
+            return self.backend.count()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answer_cache").fetchone()[0]
@@ -1,3 +1,7 @@
+from api.option_matcher import split_lines
+from api.question_normalizer import normalize_text
+
+
 def check_single(answer):
     _t = cut(answer)
     if _t is not None and len(_t) == 1:
@@ -29,6 +33,23 @@ def check_completion(answer):
         return False
 
 
+def check_options(answer, options):
+    """校验答案的每一项都能在当前题目的选项中找到, 用于判断近似题目的答案能否复用"""
+    parts = cut(answer)
+    if not parts or not options:
+        return False
+    if isinstance(options, str):
+        options = options.split("\n")
+    normalized_options = [normalize_text(o) for o in options if o.strip()]
+    for part in parts:
+        normalized_part = normalize_text(part)
+        if not normalized_part or not any(
+            normalized_part in o for o in normalized_options
+        ):
+            return False
+    return True
+
+
 def check_answer(
     answer, type, tiku
 ):  # 只会写小杯代码，这里用个tiku感觉怪怪的，但先这么写着
@@ -56,34 +77,6 @@ def check_answer(
 
 
 def cut(answer):
-    # cut_char = [',','，','|','\n','\r','\t','#','*','-','_','+','@','~','/','\\','.','&',' ']    # 多选答案切割符
-    # ',' 在常规被正确划分的, 选项中出现, 导致 multi_cut 无法正确划分选项 #391
-    # IndexError: Cannot choose from an empty sequence #391
-    # 同时为了避免没有考虑到的 case, 应该先按照 '\n' 匹配, 匹配不到再按照其他字符匹配
-    cut_char = [
-        "\n",
-        ",",
-        "，",
-        "|",
-        "\r",
-        "\t",
-        "#",
-        "*",
-        "-",
-        "_",
-        "+",
-        "@",
-        "~",
-        "/",
-        "\\",
-        ".",
-        "&",
-        " ",
-        "、",
-    ]  # 多选答案切割符
-    res = []
-    for char in cut_char:
-        res = [opt for opt in answer.split(char) if opt.strip()]  # Filter empty strings
-        if len(res) > 0:
-            return res
-    return None
+    # 旧实现依次尝试19个分隔符, 但按 '\n' 切分只要答案非空就会得到结果并返回,
+    # 其余分隔符从未生效 (#391), 因此这里直接按换行切分
+    return split_lines(answer)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+题库查询统计模块
+
+记录缓存命中/未命中/近似命中、各题库的请求延迟、错误、消耗的大模型 token、
+因类型不符被舍弃的答案数以及加密字体解析缓存的命中情况, 用于调整题库与缓存策略。
+统计在进程内累计, snapshot() 返回可序列化为 JSON 的快照,
+多个进程(例如 Celery 的多个 worker)的快照可以用 merge_snapshots 合并。
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 缓存计数
+CACHE_HIT = "hit"  # 精确命中
+CACHE_FUZZY_HIT = "fuzzy_hit"  # 近似题目命中
+CACHE_MISS = "miss"  # 未命中
+CACHE_NEGATIVE_SKIP = "negative_skip"  # 未命中且近期未能获取答案, 不再查询题库
+CACHE_COUNTERS = (CACHE_HIT, CACHE_FUZZY_HIT, CACHE_MISS, CACHE_NEGATIVE_SKIP)
+
+# 加密字体解析缓存计数
+FONT_HIT = "hit"  # 内存缓存命中
+FONT_DISK_HIT = "disk_hit"  # 磁盘缓存命中
+FONT_MISS = "miss"  # 未命中, 解析了字体
+FONT_COUNTERS = (FONT_HIT, FONT_DISK_HIT, FONT_MISS)
+
+# 题库计数
+PROVIDER_REQUESTS = "requests"  # 请求次数, 批量接口每个批次计一次
+PROVIDER_ANSWERED = "answered"  # 返回了答案的题目数
+PROVIDER_NOT_FOUND = "not_found"  # 没有答案的题目数
+PROVIDER_ERRORS = "errors"  # 请求失败的次数
+PROVIDER_REJECTED = "rejected"  # 答案未通过 check_answer 校验的题目数
+PROVIDER_TOKENS = "tokens"  # 大模型消耗的 token 数
+PROVIDER_COUNTERS = (
+    PROVIDER_REQUESTS,
+    PROVIDER_ANSWERED,
+    PROVIDER_NOT_FOUND,
+    PROVIDER_ERRORS,
+    PROVIDER_REJECTED,
+    PROVIDER_TOKENS,
+)
+
+# 延迟分桶上界, 单位秒, 最后一个桶为无穷大
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    """固定分桶的直方图, 分位数按所在分桶的上界估算"""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p分位数的估算值, 没有样本时返回None"""
+        if not self.count:
+            return None
+        rank = p * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "bounds": list(self.bounds),
+            "buckets": list(self.buckets),
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "Histogram":
+        histogram = cls(tuple(data.get("bounds", LATENCY_BUCKETS)))
+        buckets = list(data.get("buckets", []))
+        if len(buckets) == len(histogram.buckets):
+            histogram.buckets = buckets
+        histogram.count = int(data.get("count", 0))
+        histogram.sum = float(data.get("sum", 0.0))
+        histogram.max = float(data.get("max", 0.0))
+        return histogram
+
+    def merge(self, other: "Histogram") -> None:
+        if other.bounds != self.bounds:
+            raise ValueError("分桶不同的直方图无法合并")
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+
+class AnswerMetrics:
+    """线程安全的题库查询统计"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.since = time.time()
+            self._cache: Dict[str, int] = dict.fromkeys(CACHE_COUNTERS, 0)
+            self._fonts: Dict[str, int] = dict.fromkeys(FONT_COUNTERS, 0)
+            self._providers: Dict[str, Dict[str, int]] = {}
+            self._latency: Dict[str, Histogram] = {}
+
+    def cache(self, name: str, n: int = 1) -> None:
+        """
+        记录一次缓存查询结果
+
+        Args:
+            name: CACHE_HIT / CACHE_FUZZY_HIT / CACHE_MISS / CACHE_NEGATIVE_SKIP
+            n: 题目数
+        """
+        with self._lock:
+            self._cache[name] = self._cache.get(name, 0) + n
+
+    def font(self, name: str, n: int = 1) -> None:
+        """
+        记录一次加密字体解析缓存的查询结果
+
+        Args:
+            name: FONT_HIT / FONT_DISK_HIT / FONT_MISS
+            n: 字体数
+        """
+        with self._lock:
+            self._fonts[name] = self._fonts.get(name, 0) + n
+
+    def provider(self, provider: str, name: str, n: int = 1) -> None:
+        """
+        记录题库计数
+
+        Args:
+            provider: 题库标识
+            name: PROVIDER_COUNTERS 之一
+            n: 增量
+        """
+        with self._lock:
+            counters = self._providers.setdefault(
+                provider, dict.fromkeys(PROVIDER_COUNTERS, 0)
+            )
+            counters[name] = counters.get(name, 0) + n
+
+    def latency(self, provider: str, seconds: float) -> None:
+        """记录一次题库请求的延迟, 同时计入请求次数"""
+        with self._lock:
+            histogram = self._latency.get(provider)
+            if histogram is None:
+                histogram = self._latency[provider] = Histogram()
+            histogram.observe(seconds)
+            counters = self._providers.setdefault(
+                provider, dict.fromkeys(PROVIDER_COUNTERS, 0)
+            )
+            counters[PROVIDER_REQUESTS] += 1
+
+    def snapshot(self) -> dict:
+        """
+        统计快照
+
+        Returns:
+            {"since": 开始统计的时间戳, "updated_at": 生成快照的时间戳,
+             "cache": {计数名: 次数, "hit_rate": 命中率},
+             "fonts": {计数名: 次数, "hit_rate": 命中率},
+             "providers": {题库标识: {计数名: 次数, "latency": 延迟直方图}}}
+        """
+        with self._lock:
+            cache = dict(self._cache)
+            fonts = dict(self._fonts)
+            providers = {
+                provider: dict(counters)
+                for provider, counters in self._providers.items()
+            }
+            for provider, histogram in self._latency.items():
+                providers[provider]["latency"] = histogram.snapshot()
+            since = self.since
+        return _finish(
+            {
+                "since": since,
+                "updated_at": time.time(),
+                "cache": cache,
+                "fonts": fonts,
+                "providers": providers,
+            }
+        )
+
+    def save(self, path) -> None:
+        """将快照写入 JSON 文件, 先写临时文件再原子替换"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf8") as fp:
+            json.dump(self.snapshot(), fp, ensure_ascii=False)
+        tmp.replace(path)
+
+
+def _finish(snapshot: dict) -> dict:
+    """补充派生字段"""
+    cache = snapshot["cache"]
+    looked_up = cache.get(CACHE_HIT, 0) + cache.get(CACHE_FUZZY_HIT, 0)
+    total = looked_up + cache.get(CACHE_MISS, 0)
+    cache["hit_rate"] = round(looked_up / total, 4) if total else None
+    # 旧版本保存的快照没有字体计数
+    fonts = snapshot.setdefault("fonts", dict.fromkeys(FONT_COUNTERS, 0))
+    hits = fonts.get(FONT_HIT, 0) + fonts.get(FONT_DISK_HIT, 0)
+    total = hits + fonts.get(FONT_MISS, 0)
+    fonts["hit_rate"] = round(hits / total, 4) if total else None
+    return snapshot
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    """
+    合并多个进程的统计快照
+
+    Args:
+        snapshots: AnswerMetrics.snapshot() 的结果
+
+    Returns:
+        合并后的快照, 结构与单个快照相同
+    """
+    cache: Dict[str, int] = dict.fromkeys(CACHE_COUNTERS, 0)
+    fonts: Dict[str, int] = dict.fromkeys(FONT_COUNTERS, 0)
+    providers: Dict[str, Dict[str, int]] = {}
+    latency: Dict[str, Histogram] = {}
+    since: List[float] = []
+    updated_at: List[float] = []
+    for snapshot in snapshots:
+        since.append(snapshot.get("since", 0))
+        updated_at.append(snapshot.get("updated_at", 0))
+        for name, n in snapshot.get("cache", {}).items():
+            if name != "hit_rate":
+                cache[name] = cache.get(name, 0) + n
+        for name, n in snapshot.get("fonts", {}).items():
+            if name != "hit_rate":
+                fonts[name] = fonts.get(name, 0) + n
+        for provider, counters in snapshot.get("providers", {}).items():
+            merged = providers.setdefault(provider, dict.fromkeys(PROVIDER_COUNTERS, 0))
+            for name, value in counters.items():
+                if name == "latency":
+                    histogram = Histogram.from_snapshot(value)
+                    if provider in latency:
+                        latency[provider].merge(histogram)
+                    else:
+                        latency[provider] = histogram
+                else:
+                    merged[name] = merged.get(name, 0) + value
+    for provider, histogram in latency.items():
+        providers[provider]["latency"] = histogram.snapshot()
+    return _finish(
+        {
+            "since": min(since) if since else time.time(),
+            "updated_at": max(updated_at) if updated_at else time.time(),
+            "cache": cache,
+            "fonts": fonts,
+            "providers": providers,
+        }
+    )
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """将快照格式化为便于阅读的多行文本"""
+    cache = snapshot["cache"]
+    hit_rate = cache.get("hit_rate")
+    lines = [
+        f"缓存: 命中{cache.get(CACHE_HIT, 0)}, 近似命中{cache.get(CACHE_FUZZY_HIT, 0)}, "
+        f"未命中{cache.get(CACHE_MISS, 0)}, 跳过{cache.get(CACHE_NEGATIVE_SKIP, 0)}"
+        + (f", 命中率{hit_rate:.0%}" if hit_rate is not None else "")
+    ]
+    fonts = snapshot.get("fonts", {})
+    if fonts.get("hit_rate") is not None:
+        lines.append(
+            f"加密字体: 命中{fonts.get(FONT_HIT, 0)}, 磁盘命中{fonts.get(FONT_DISK_HIT, 0)}, "
+            f"未命中{fonts.get(FONT_MISS, 0)}, 命中率{fonts['hit_rate']:.0%}"
+        )
+    for provider, counters in sorted(snapshot["providers"].items()):
+        line = (
+            f"{provider}: 请求{counters.get(PROVIDER_REQUESTS, 0)}, "
+            f"有答案{counters.get(PROVIDER_ANSWERED, 0)}, "
+            f"无答案{counters.get(PROVIDER_NOT_FOUND, 0)}, "
+            f"错误{counters.get(PROVIDER_ERRORS, 0)}, "
+            f"类型不符{counters.get(PROVIDER_REJECTED, 0)}"
+        )
+        if counters.get(PROVIDER_TOKENS):
+            line += f", token {counters[PROVIDER_TOKENS]}"
+        latency = counters.get("latency")
+        if latency and latency["count"]:
+            line += (
+                f", 延迟 平均{latency['mean']:.2f}s"
+                f" p50≤{latency['p50']:.2f}s p95≤{latency['p95']:.2f}s"
+            )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# 进程内共享的统计实例
+METRICS = AnswerMetrics()
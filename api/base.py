@@ -12,12 +12,14 @@ from api.cipher import AESCipher
 from api.config import GlobalConst as gc
 from api.cookies import save_cookies, use_cookies
 from api.decode import (
+    CoursePoints,
     decode_course_list,
     decode_course_point,
     decode_course_card,
     decode_course_folder,
     decode_questions_info,
 )
+from api.option_matcher import match_options, split_lines
 from api.process import show_progress
 from api.exceptions import MaxRetryExceeded
 import time
@@ -245,13 +247,21 @@ class Chaoxing:
             course_list += decode_course_list(_resp.text)
         return course_list
 
-    def get_course_point(self, _courseid, _clazzid, _cpi):
+    def get_course_point(self, _courseid, _clazzid, _cpi, lazy=False):
+        """
+        读取课程的章节列表
+
+        Args:
+            lazy: 为True时返回按需解析的 CoursePoints, 否则返回 decode_course_point 的结果
+        """
         _session = SessionManager.get_session()
         _url = f"https://mooc2-ans.chaoxing.com/mooc2-ans/mycourse/studentcourse?courseid={_courseid}&clazzid={_clazzid}&cpi={_cpi}&ut=s"
         logger.trace("开始读取课程所有章节...")
         _resp = _session.get(_url)
         # logger.trace(f"原始章节列表内容:\n{_resp.text}")
         logger.info("课程章节读取成功...")
+        if lazy:
+            return CoursePoints(_resp.text)
         return decode_course_point(_resp.text)
 
     def get_job_list(self, _clazzid, _courseid, _cpi, _knowledgeid):
@@ -587,32 +597,7 @@ class Chaoxing:
             注意:
             如果无法从网页中提取题目信息, 将记录警告日志并返回None
             """
-            # cut_char = [',','，','|','\n','\r','\t','#','*','-','_','+','@','~','/','\\','.','&',' ']    # 多选答案切割符
-            # ',' 在常规被正确划分的, 选项中出现, 导致 multi_cut 无法正确划分选项 #391
-            # IndexError: Cannot choose from an empty sequence #391
-            # 同时为了避免没有考虑到的 case, 应该先按照 '\n' 匹配, 匹配不到再按照其他字符匹配
-            cut_char = [
-                "\n",
-                ",",
-                "，",
-                "|",
-                "\r",
-                "\t",
-                "#",
-                "*",
-                "-",
-                "_",
-                "+",
-                "@",
-                "~",
-                "/",
-                "\\",
-                ".",
-                "&",
-                " ",
-                "、",
-            ]  # 多选答案切割符
-            res = cut(answer)
+            res = split_lines(answer)
             if res is None:
                 logger.warning(
                     f"未能从网页中提取题目信息, 以下为相关信息：\n\t{answer}\n\n{_ORIGIN_HTML_CONTENT}\n"
@@ -622,19 +607,6 @@ class Chaoxing:
             else:
                 return res
 
-        def clean_res(res):
-            cleaned_res = []
-            if isinstance(res, str):
-                res = [res]
-            for c in res:
-                cleaned_res.append(re.sub(r"^[A-Za-z]|[.,!?;:，。！？；：]", "", c))
-
-            return cleaned_res
-
-        def is_subsequence(a, o):
-            iter_o = iter(o)
-            return all(c in iter_o for c in a)
-
         def with_retry(max_retries=3, delay=1):
             def decorator(func):
                 def wrapper(*args, **kwargs):
@@ -710,12 +682,10 @@ class Chaoxing:
         # 搜题
         total_questions = len(questions["questions"])
         found_answers = 0
-        for q in questions["questions"]:
+        # 搜题延迟 #428 由题库按配置的delay统一限流
+        results = self.tiku.query_batch(questions["questions"])
+        for q, res in zip(questions["questions"], results):
             logger.debug(f"当前题目信息 -> {q}")
-            # 添加搜题延迟 #428 - 默认0s延迟
-            query_delay = self.kwargs.get("query_delay", 0)
-            time.sleep(query_delay)
-            res = self.tiku.query(q)
             answer = ""
             if not res:
                 # 随机答题
@@ -723,29 +693,10 @@ class Chaoxing:
                 q[f'answerSource{q["id"]}'] = "random"
             else:
                 # 根据响应结果选择答案
-                if q["type"] == "multiple":
-                    # 多选处理
-                    options_list = multi_cut(q["options"])
-                    res_list = multi_cut(res)
-                    if res_list is not None and options_list is not None:
-                        for _a in clean_res(res_list):
-                            for o in options_list:
-                                if is_subsequence(
-                                    _a, o
-                                ):  # 去掉各种符号和前面ABCD的答案应当是选项的子序列
-                                    answer += o[:1]
-                        # 对答案进行排序, 否则会提交失败
-                        answer = "".join(sorted(answer))
-                    # else 如果分割失败那么就直接到下面去随机选
-                elif q["type"] == "single":
-                    # 单选也进行切割，主要是防止返回的答案有异常字符
-                    options_list = multi_cut(q["options"])
-                    if options_list is not None:
-                        t_res = clean_res(res)
-                        for o in options_list:
-                            if is_subsequence(t_res[0], o):
-                                answer = o[:1]
-                                break
+                if q["type"] in ("multiple", "single"):
+                    # 选项切分失败时直接到下面去随机选
+                    if multi_cut(q["options"]) is not None:
+                        answer = match_options(res, q["options"], q["type"])
                 elif q["type"] == "judgement":
                     answer = "true" if self.tiku.judgement_select(res) else "false"
                 elif q["type"] == "completion":
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+题库批量导入导出模块
+
+以流式方式读写 JSONL / CSV 题库文件, 按块导入答案缓存, 内存占用与文件大小无关。
+导入时标题经 question_normalizer 规范化, 文件内与缓存中已有的题目均会去重;
+导出按哈希顺序分页读取; 比较功能列出文件与缓存之间新增或不同的题目。
+
+JSONL 每行一个对象, 包含 title (或 question) 与 answer 字段, answer 可以是字符串或列表;
+CSV 第一行为表头, 包含 title (或 question) 与 answer 列。多个答案以换行分隔。
+"""
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from api.answer_cache import CacheDAO
+from api.logger import logger
+from api.question_normalizer import clean_title, question_key
+
+FORMATS = ("jsonl", "csv")
+DEFAULT_CHUNK_SIZE = 1000
+
+# 比较结果
+ADDED = "added"  # 仅存在于文件中
+CHANGED = "changed"  # 答案不同
+SAME = "same"  # 答案相同
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    根据扩展名判断文件格式
+
+    Args:
+        path: 文件路径
+        fmt: 显式指定的格式, 优先于扩展名
+
+    Raises:
+        ValueError: 格式不受支持
+    """
+    fmt = (fmt or Path(path).suffix.lstrip(".")).lower()
+    if fmt == "json":
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"不支持的题库文件格式: {fmt or path}, 仅支持 {', '.join(FORMATS)}"
+        )
+    return fmt
+
+
+def _join_answer(answer) -> str:
+    if isinstance(answer, list):
+        return "\n".join(str(a).strip() for a in answer if str(a).strip())
+    return "" if answer is None else str(answer).strip()
+
+
+def read_records(fp: TextIO, fmt: str) -> Iterator[Tuple[str, str]]:
+    """
+    逐行读取题库文件
+
+    Args:
+        fp: 文本文件对象
+        fmt: jsonl 或 csv
+
+    Yields:
+        (题目, 答案), 无法解析的行以空字符串代替, 由调用方计为无效记录
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(fp):
+            title = row.get("title") or row.get("question") or ""
+            yield title, _join_answer(row.get("answer"))
+        return
+
+    for lineno, line in enumerate(fp, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+            title = item.get("title") or item.get("question") or ""
+            answer = _join_answer(item.get("answer"))
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"第{lineno}行无法解析, 已跳过: {e}")
+            title, answer = "", ""
+        yield title, answer
+
+
+def format_records(records: Iterable[Tuple[str, str]], fmt: str) -> Iterator[str]:
+    """
+    将记录逐条序列化为文本, 用于流式输出
+
+    Args:
+        records: (题目, 答案) 序列
+        fmt: jsonl 或 csv, CSV 首先输出表头
+
+    Yields:
+        每条记录对应的文本
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["title", "answer"])
+        for title, answer in records:
+            writer.writerow([title, answer])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            # 没有任何记录时仍输出表头
+            yield buffer.getvalue()
+        return
+
+    for title, answer in records:
+        yield json.dumps({"title": title, "answer": answer}, ensure_ascii=False) + "\n"
+
+
+def write_records(records: Iterable[Tuple[str, str]], fp: TextIO, fmt: str) -> int:
+    """
+    写入题库文件
+
+    Args:
+        records: (题目, 答案) 序列
+        fp: 文本文件对象, CSV 需以 newline="" 打开
+        fmt: jsonl 或 csv
+
+    Returns:
+        写入的条数
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    for text in format_records(counted(), fmt):
+        fp.write(text)
+    return count
+
+
+def _chunks(records: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _prepare_chunk(
+    chunk: List[Tuple[str, str]], stats: Dict[str, int]
+) -> Dict[str, Tuple[str, str, str]]:
+    """规范化一块记录并在块内去重, 返回 {哈希: (规范化标题, 题目, 答案)}"""
+    prepared: Dict[str, Tuple[str, str, str]] = {}
+    for title, answer in chunk:
+        title = clean_title(title)
+        normalized, key_hash = question_key(title)
+        if not normalized or not answer:
+            stats["invalid"] += 1
+        elif key_hash in prepared:
+            stats["duplicate"] += 1
+        else:
+            prepared[key_hash] = (normalized, title, answer)
+    return prepared
+
+
+def import_records(
+    dao: CacheDAO,
+    records: Iterable[Tuple[str, str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overwrite: bool = False,
+) -> Dict[str, int]:
+    """
+    按块导入题库
+
+    Args:
+        dao: 答案缓存
+        records: (题目, 答案) 序列, 通常来自 read_records
+        chunk_size: 每块条数, 每块在一个事务中写入
+        overwrite: 缓存中已有不同答案时是否覆盖
+
+    Returns:
+        统计 {total, added, updated, unchanged, conflict, duplicate, invalid}
+    """
+    stats = dict.fromkeys(
+        ("total", "added", "updated", "unchanged", "conflict", "duplicate", "invalid"),
+        0,
+    )
+    for chunk in _chunks(records, max(1, chunk_size)):
+        stats["total"] += len(chunk)
+        prepared = _prepare_chunk(chunk, stats)
+        # 之前的块已经写入, 文件中跨块重复的题目在这里计为unchanged或conflict
+        existing = dao.get_many(list(prepared))
+        rows = []
+        for key_hash, (normalized, title, answer) in prepared.items():
+            current = existing.get(key_hash)
+            if current is None:
+                stats["added"] += 1
+            elif current[1] == answer:
+                stats["unchanged"] += 1
+                continue
+            elif overwrite:
+                stats["updated"] += 1
+            else:
+                stats["conflict"] += 1
+                continue
+            rows.append((key_hash, normalized, title, answer))
+        if not dao.add_many(rows):
+            raise RuntimeError("写入答案缓存失败")
+        logger.debug(f"已导入{stats['total']}条记录")
+    return stats
+
+
+def export_records(
+    dao: CacheDAO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[str, str]]:
+    """分页导出缓存中的全部答案"""
+    return dao.iter_items(max(1, chunk_size))
+
+
+def diff_records(
+    dao: CacheDAO,
+    records: Iterable[Tuple[str, str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, str, Optional[str], str]]:
+    """
+    比较题库文件与缓存
+
+    Yields:
+        (ADDED/CHANGED/SAME, 题目, 缓存中的答案, 文件中的答案), 文件内重复与无效的记录被忽略
+    """
+    for chunk in _chunks(records, max(1, chunk_size)):
+        prepared = _prepare_chunk(chunk, dict.fromkeys(("duplicate", "invalid"), 0))
+        existing = dao.get_many(list(prepared))
+        for key_hash, (_, title, answer) in prepared.items():
+            current = existing.get(key_hash)
+            if current is None:
+                yield ADDED, title, None, answer
+                continue
+            status = SAME if current[1] == answer else CHANGED
+            yield status, title, current[1], answer
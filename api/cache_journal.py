@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+答案缓存的写后日志
+
+写入答案时只追加一行 JSON 到日志文件并放入内存中的待写表, 调用方不等待数据库事务;
+后台线程定期将待写记录批量写入数据库(或共享存储), 日志文件超过一定大小时,
+只保留尚未写入的记录并通过临时文件原子替换, 完成压缩。
+进程崩溃后, 下次启动时先重放日志中的记录再继续运行, 已写入的记录重复写入不影响结果。
+每个进程的每个缓存实例使用独立的日志文件(文件名以 "-进程号.jsonl" 结尾),
+启动时只重放进程已退出的日志, 不会取走仍在运行的其他实例的待写记录。
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from api.logger import logger
+
+Row = Tuple[str, str, str, str]  # (哈希, 规范化标题, 题目, 答案)
+
+
+def process_alive(pid: int) -> bool:
+    """
+    判断进程是否仍在运行
+
+    Args:
+        pid: 进程号
+
+    Returns:
+        进程存在时返回True, 无法确定时视为存在
+    """
+    if pid == os.getpid():
+        return True
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # Windows 下 os.kill 会结束进程, 改为查询进程的退出码
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # 查询有限信息的权限
+        if not handle:
+            return kernel32.GetLastError() == 5  # 拒绝访问说明进程存在
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class CacheJournal:
+    """追加写日志与后台批量写入"""
+
+    FLUSH_INTERVAL = 1.0  # 后台写入的间隔, 单位秒
+    FLUSH_BATCH = 256  # 待写记录达到该数量时立即写入
+    COMPACT_SIZE = 1 << 20  # 日志文件超过该大小时压缩, 单位字节
+
+    def __init__(
+        self,
+        path: Path,
+        sink: Callable[[List[Row]], bool],
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        """
+        Args:
+            path: 本进程的日志文件路径, 以 "-进程号.jsonl" 结尾; 同目录下同前缀、
+                进程已退出的其他日志文件在启动时一并恢复
+            sink: 批量写入函数, 返回是否成功, 失败的记录会在下次重试
+            flush_interval: 后台写入的间隔, 单位秒
+        """
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self._sink = sink
+        self._pending: Dict[str, Row] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._closed = False
+        self._recover()
+        self._fp = self.path.open("a", encoding="utf8")
+        self._thread = threading.Thread(
+            target=self._run, name=f"cache-journal-{os.getpid()}", daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _read(path: Path) -> List[Row]:
+        """读取日志, 崩溃时写了一半的行与损坏的行被忽略"""
+        rows = []
+        with path.open("r", encoding="utf8", errors="replace") as fp:
+            for line in fp:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, list) and len(row) == 4:
+                    rows.append(tuple(str(v) for v in row))
+        return rows
+
+    def _orphaned(self, path: Path) -> bool:
+        """日志是否无人使用: 本实例的文件, 或所属进程已退出"""
+        if path == self.path:
+            return True
+        pid = path.stem.rsplit("-", 1)[-1]
+        return pid.isdigit() and not process_alive(int(pid))
+
+    def _recover(self) -> None:
+        """重放上次未写入数据库的日志, 成功后删除日志文件"""
+        pattern = f"{self.path.name.rsplit('-', 1)[0]}-*.jsonl"
+        for path in sorted(self.path.parent.glob(pattern)):
+            if not self._orphaned(path):
+                continue
+            try:
+                rows = self._read(path)
+            except OSError as e:
+                logger.warning(f"缓存日志{path.name}读取失败: {e}")
+                continue
+            if rows and not self._sink(rows):
+                # 写入失败时保留在内存中, 由后台线程重试
+                self._pending.update((row[0], row) for row in rows)
+                self._rewrite_pending(path)
+                continue
+            if rows:
+                logger.info(f"已从缓存日志{path.name}恢复{len(rows)}条记录")
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.debug(f"缓存日志{path.name}删除失败: {e}")
+
+    def _rewrite_pending(self, source: Optional[Path] = None) -> None:
+        """将尚未写入的记录写入临时文件后原子替换本进程的日志"""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf8") as fp:
+            for row in self._pending.values():
+                fp.write(json.dumps(row, ensure_ascii=False) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+        tmp.replace(self.path)
+        if source is not None and source != self.path:
+            try:
+                source.unlink()
+            except OSError:
+                pass
+
+    def append(self, row: Row) -> None:
+        """
+        追加一条记录, 只写入日志文件的系统缓冲区, 不等待磁盘与数据库
+
+        Raises:
+            RuntimeError: 日志已关闭
+        """
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("缓存日志已关闭")
+            self._fp.write(line)
+            self._fp.flush()
+            self._pending[row[0]] = row
+            full = len(self._pending) >= self.FLUSH_BATCH
+        if full:
+            self._wakeup.set()
+
+    def get(self, key_hash: str) -> Optional[Row]:
+        """尚未写入数据库的记录"""
+        with self._lock:
+            return self._pending.get(key_hash)
+
+    def __contains__(self, key_hash: str) -> bool:
+        with self._lock:
+            return key_hash in self._pending
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> bool:
+        """
+        将待写记录写入数据库, 必要时压缩日志
+
+        Returns:
+            是否全部写入成功
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                rows = list(self._pending.values())
+                fp = self._fp
+            # 先确保日志落盘, 再写入数据库
+            try:
+                os.fsync(fp.fileno())
+            except (OSError, ValueError) as e:
+                logger.warning(f"缓存日志同步失败: {e}")
+            ok = self._sink(rows)
+            with self._lock:
+                if ok:
+                    # 写入期间被再次更新的记录保留, 下次写入
+                    for row in rows:
+                        if self._pending.get(row[0]) == row:
+                            del self._pending[row[0]]
+                if not self._closed:
+                    self._compact()
+            return ok
+
+    def _compact(self) -> None:
+        """日志过大时只保留尚未写入的记录, 调用方持有 self._lock"""
+        try:
+            if self._fp.tell() < self.COMPACT_SIZE:
+                return
+            self._fp.close()
+            self._rewrite_pending()
+        except OSError as e:
+            logger.warning(f"缓存日志压缩失败: {e}")
+        finally:
+            if self._fp.closed:
+                self._fp = self.path.open("a", encoding="utf8")
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                # 剩余记录由 close 写入
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"缓存日志写入失败: {e}")
+
+    def close(self) -> None:
+        """停止后台线程并写入剩余记录, 全部写入后删除日志文件"""
+        with self._lock:
+            if self._closed:
+                return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=10)
+        ok = self.flush()
+        with self._lock:
+            self._closed = True
+            self._fp.close()
+            if ok and not self._pending:
+                try:
+                    self.path.unlink()
+                except OSError:
+                    pass
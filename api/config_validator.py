@@ -6,6 +6,7 @@
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from api.answer_cache import parse_negative_ttl
 from api.logger import logger
 
 
@@ -128,14 +129,42 @@ class ConfigValidator:
         if not tiku_config or not tiku_config.get("provider"):
             return True, ""  # 未配置题库，跳过验证
 
-        provider = tiku_config.get("provider", "")
-        valid_providers = ["TikuYanxi", "TikuLike", "TikuAdapter", "AI", "SiliconFlow"]
-
-        if provider not in valid_providers:
-            return (
-                False,
-                f"无效的题库provider: {provider}，有效值: {', '.join(valid_providers)}",
-            )
+        # 多个题库以英文逗号分隔, 按顺序对冲查询
+        providers = [
+            name.strip()
+            for name in str(tiku_config.get("provider", "")).split(",")
+            if name.strip()
+        ]
+        valid_providers = [
+            "TikuYanxi",
+            "TikuLike",
+            "TikuAdapter",
+            "AI",
+            "SiliconFlow",
+            "DeepSeek",
+        ]
+
+        for provider in providers:
+            if provider not in valid_providers:
+                return (
+                    False,
+                    f"无效的题库provider: {provider}，有效值: {', '.join(valid_providers)}",
+                )
+
+        if len(providers) > 1:
+            race_mode = str(tiku_config.get("race_mode", "hedge") or "hedge").lower()
+            if race_mode not in ("hedge", "parallel"):
+                return False, f"race_mode必须是hedge或parallel: {race_mode}"
+            hedge_percentile = tiku_config.get("hedge_percentile", "")
+            if hedge_percentile not in ("", None):
+                try:
+                    if not 0 < float(hedge_percentile) <= 1:
+                        return (
+                            False,
+                            f"hedge_percentile必须在0到1之间: {hedge_percentile}",
+                        )
+                except (ValueError, TypeError):
+                    return False, f"hedge_percentile必须是数字: {hedge_percentile}"
 
         # 验证submit参数
         submit = str(tiku_config.get("submit", "false")).lower()
@@ -150,6 +179,25 @@ class ConfigValidator:
         except (ValueError, TypeError):
             return False, f"cover_rate必须是数字: {tiku_config.get('cover_rate')}"
 
+        # 验证fuzzy_threshold
+        try:
+            fuzzy_threshold = float(tiku_config.get("fuzzy_threshold", 0))
+            if fuzzy_threshold < 0 or fuzzy_threshold > 1:
+                return False, f"fuzzy_threshold必须在0到1之间: {fuzzy_threshold}"
+        except (ValueError, TypeError):
+            return (
+                False,
+                f"fuzzy_threshold必须是数字: {tiku_config.get('fuzzy_threshold')}",
+            )
+
+        # 验证negative_ttl 及题库专属的 <题库>_negative_ttl
+        for key, value in tiku_config.items():
+            if key == "negative_ttl" or key.endswith("_negative_ttl"):
+                try:
+                    parse_negative_ttl(value, {})
+                except (ValueError, TypeError) as e:
+                    return False, f"{key}格式错误: {value} ({e})"
+
         # 验证delay
         try:
             delay = float(tiku_config.get("delay", 0))
@@ -158,36 +206,75 @@ class ConfigValidator:
         except (ValueError, TypeError):
             return False, f"delay必须是数字: {tiku_config.get('delay')}"
 
+        # 验证query_concurrency
+        try:
+            query_concurrency = int(float(tiku_config.get("query_concurrency", 4)))
+            if query_concurrency < 1:
+                return False, f"query_concurrency必须大于0: {query_concurrency}"
+        except (ValueError, TypeError):
+            return (
+                False,
+                f"query_concurrency必须是数字: {tiku_config.get('query_concurrency')}",
+            )
+
+        # 验证连接池与超时配置
+        for key in ("http_pool_size", "http_connect_timeout", "http_read_timeout"):
+            value = tiku_config.get(key, "")
+            if value in ("", None):
+                continue
+            try:
+                if float(value) <= 0:
+                    return False, f"{key}必须大于0: {value}"
+            except (ValueError, TypeError):
+                return False, f"{key}必须是数字: {value}"
+
+        # 验证大模型打包查询配置
+        for key in ("pack_size", "pack_token_budget"):
+            value = tiku_config.get(key, "")
+            if value in ("", None):
+                continue
+            try:
+                if int(float(value)) < (1 if key == "pack_size" else 0):
+                    return False, f"{key}取值无效: {value}"
+            except (ValueError, TypeError):
+                return False, f"{key}必须是数字: {value}"
+
         # 根据不同题库验证特定配置
-        if provider == "TikuYanxi":
-            tokens = tiku_config.get("tokens", "")
-            if not tokens or tokens.strip() == "":
-                return False, "言溪题库需要配置tokens参数"
-
-        elif provider == "TikuLike":
-            tokens = tiku_config.get("tokens", "")
-            if not tokens or tokens.strip() == "":
-                return False, "LIKE知识库需要配置tokens参数"
-
-        elif provider == "TikuAdapter":
-            url = tiku_config.get("url", "")
-            if not url or url.strip() == "":
-                return False, "TikuAdapter需要配置url参数"
-            # 简单URL格式验证
-            if not url.startswith("http://") and not url.startswith("https://"):
-                return False, f"TikuAdapter的url格式不正确: {url}"
-
-        elif provider == "AI":
-            endpoint = tiku_config.get("endpoint", "")
-            key = tiku_config.get("key", "")
-            model = tiku_config.get("model", "")
-            if not endpoint or not key or not model:
-                return False, "AI题库需要配置endpoint、key和model参数"
-
-        elif provider == "SiliconFlow":
-            key = tiku_config.get("siliconflow_key", "")
-            if not key or key.strip() == "":
-                return False, "硅基流动需要配置siliconflow_key参数"
+        for provider in providers:
+            if provider == "TikuYanxi":
+                tokens = tiku_config.get("tokens", "")
+                if not tokens or tokens.strip() == "":
+                    return False, "言溪题库需要配置tokens参数"
+
+            elif provider == "TikuLike":
+                tokens = tiku_config.get("tokens", "")
+                if not tokens or tokens.strip() == "":
+                    return False, "LIKE知识库需要配置tokens参数"
+
+            elif provider == "TikuAdapter":
+                url = tiku_config.get("url", "")
+                if not url or url.strip() == "":
+                    return False, "TikuAdapter需要配置url参数"
+                # 简单URL格式验证
+                if not url.startswith("http://") and not url.startswith("https://"):
+                    return False, f"TikuAdapter的url格式不正确: {url}"
+
+            elif provider == "AI":
+                endpoint = tiku_config.get("endpoint", "")
+                key = tiku_config.get("key", "")
+                model = tiku_config.get("model", "")
+                if not endpoint or not key or not model:
+                    return False, "AI题库需要配置endpoint、key和model参数"
+
+            elif provider == "SiliconFlow":
+                key = tiku_config.get("siliconflow_key", "")
+                if not key or key.strip() == "":
+                    return False, "硅基流动需要配置siliconflow_key参数"
+
+            elif provider == "DeepSeek":
+                key = tiku_config.get("deepseek_key", "")
+                if not key or key.strip() == "":
+                    return False, "DeepSeek需要配置deepseek_key参数"
 
         return True, ""
 
@@ -261,33 +261,38 @@ class CourseProcessor:
             self._log("INFO", f"开始学习课程: {course['title']}")
             self._update_progress(f"开始学习课程: {course['title']}", None)
 
-            # 获取当前课程的所有章节
-            point_list = self.chaoxing.get_course_point(
-                course["courseId"], course["clazzId"], course["cpi"]
+            # 获取当前课程的所有章节, 章节在遍历时按需解析, 大型课程无需等待整页解析完成
+            points = self.chaoxing.get_course_point(
+                course["courseId"], course["clazzId"], course["cpi"], lazy=True
             )
 
-            if not point_list or "points" not in point_list:
+            if not points:
                 self._log("WARNING", f"课程 {course['title']} 没有章节")
                 return True
 
-            points = point_list["points"]
-            total_points = len(points)
-            self._log("INFO", f"课程共有 {total_points} 个章节")
-
             # 为了支持课程任务回滚, 采用下标方式遍历任务点
             __point_index = 0
             auto_skip_notopen = False
             RB = RollBackManager()
-
-            while __point_index < total_points:
-                point = points[__point_index]
+            # 页面解析完成前章节总数为预估值, 足以显示进度
+            self._log("INFO", f"课程共有 {points.total} 个章节")
+
+            while True:
+                try:
+                    point = points[__point_index]
+                except IndexError:
+                    break
+                total_points = points.total
                 logger.debug(f"当前章节 __point_index: {__point_index}")
 
-                # 计算进度百分比
-                progress = int((__point_index / total_points) * 100)
-                self._update_progress(
-                    f"处理章节 {__point_index + 1}/{total_points}", progress
-                )
+                # 计算进度百分比, 章节总数未知时只显示序号
+                if total_points:
+                    progress = int((__point_index / total_points) * 100)
+                    message = f"处理章节 {__point_index + 1}/{total_points}"
+                else:
+                    progress = None
+                    message = f"处理章节 {__point_index + 1}"
+                self._update_progress(message, progress)
 
                 result, auto_skip_notopen = self.process_chapter(
                     course, point, RB, auto_skip_notopen
@@ -4,18 +4,25 @@
 # @Reference: https://github.com/SocialSisterYi/xuexiaoyi-to-xuexitong-tampermonkey-proxy
 #
 
+import array
 import base64
 import hashlib
 import json
+import mmap
 import os
+import re
+import struct
 import sys
+import threading
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, IO, Optional, Union
+from typing import Dict, IO, List, Optional, Sequence, Tuple, Union
 
-from fontTools.ttLib.tables._g_l_y_f import Glyph, table__g_l_y_f
+import numpy as np
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates, table__g_l_y_f
 from fontTools.ttLib.ttFont import TTFont
 from api.exceptions import FontDecodeError
+from api.glyph_outline import GlyphOutlineIndex
 from api.logger import logger
 
 
@@ -64,34 +71,228 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 
+# 字形哈希二进制表: 文件头(魔数, 版本, 记录数)后为按MD5摘要排序的定长记录(摘要, 码位)
+FONT_TABLE_MAGIC = b"CXFT"
+FONT_TABLE_VERSION = 1
+_TABLE_HEADER = struct.Struct("<4sII")
+_TABLE_RECORD = struct.Struct("<16sI")
+_UNI_NAME_RE = re.compile(r"uni([0-9A-F]+)")
+
+
+def build_hash_table(char_map: Dict[str, str]) -> bytes:
+    """
+    将字形名称到哈希值的映射表转换为二进制表
+
+    只保留 uniXXXX 形式的字形; 多个字形的哈希相同时, 与反转为字典时一样以最后一个为准。
+
+    Args:
+        char_map: 字形名称到哈希值的映射 ({"uni4E00": "hash值", ...})
+
+    Returns:
+        二进制表的内容
+
+    Raises:
+        ValueError: 哈希值不是32位十六进制字符串
+    """
+    codepoints: Dict[bytes, Optional[int]] = {}
+    for name, font_hash in char_map.items():
+        digest = bytes.fromhex(font_hash)
+        if len(digest) != 16:
+            raise ValueError(f"无效的字形哈希: {font_hash}")
+        match = _UNI_NAME_RE.fullmatch(name)
+        codepoints[digest] = int(match.group(1), 16) if match else None
+    records = [
+        _TABLE_RECORD.pack(digest, codepoint)
+        for digest, codepoint in sorted(codepoints.items())
+        if codepoint is not None
+    ]
+    header = _TABLE_HEADER.pack(FONT_TABLE_MAGIC, FONT_TABLE_VERSION, len(records))
+    return header + b"".join(records)
+
+
+def write_hash_table(source: Union[Path, str], output: Union[Path, str]) -> int:
+    """
+    由字体映射表JSON文件生成二进制表, 先写临时文件再原子替换
+
+    Args:
+        source: 字体映射表JSON文件路径
+        output: 二进制表的输出路径
+
+    Returns:
+        二进制表的记录数
+    """
+    with open(source, "r", encoding="utf-8") as fp:
+        data = build_hash_table(json.load(fp))
+    output = Path(output)
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(output)
+    return _TABLE_HEADER.unpack_from(data)[2]
+
+
 class FontHashDAO:
     """
     字体哈希数据访问对象，负责管理字体哈希映射表
+
+    按哈希查找时使用与JSON文件同名的 .bin 二进制表(由 tools/build_font_table.py 生成),
+    首次查找时以只读方式映射到内存并二分查找, 多个进程共享同一份页面缓存;
+    二进制表不存在或无效时退回到加载JSON文件。char_map 与 hash_map 在首次访问时才加载。
     """
 
-    def __init__(self, file_path: str = "resource/font_map_table.json"):
+    def __init__(
+        self,
+        file_path: str = "resource/font_map_table.json",
+        table_path: Optional[str] = None,
+    ):
         """
-        初始化字体哈希数据访问对象
+        初始化字体哈希数据访问对象, 映射表在首次查找时才加载
 
         Args:
             file_path: 字体映射表JSON文件路径，相对于资源目录
+            table_path: 二进制表路径，相对于资源目录, 默认与JSON文件同名
 
         Raises:
             FileNotFoundError: 当字体映射表文件不存在时
-            json.JSONDecodeError: 当字体映射表JSON格式错误时
         """
-        self.char_map: Dict[str, str] = {}  # unicode -> hash
-        self.hash_map: Dict[str, str] = {}  # hash -> unicode
+        self.file_path = resource_path(file_path)
+        self.table_path = (
+            resource_path(table_path)
+            if table_path
+            else str(Path(self.file_path).with_suffix(".bin"))
+        )
+        if not (os.path.exists(self.file_path) or os.path.exists(self.table_path)):
+            raise FontDecodeError(f"加载字体映射表失败: {self.file_path} - 文件不存在")
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._char_map: Optional[Dict[str, str]] = None  # unicode -> hash
+        self._hash_map: Optional[Dict[str, str]] = None  # hash -> unicode
+        self._table: Union[mmap.mmap, bytes, None] = None
+        self._count = 0
+        self._fingerprint: Optional[str] = None
+        self._loaded = False
+        self._found: Dict[str, Optional[int]] = {}  # 已查找过的哈希
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_map(cls, char_map: Dict[str, str]) -> "FontHashDAO":
+        """
+        由内存中的映射表创建, 不读取文件
 
-        full_path = resource_path(file_path)
+        Args:
+            char_map: 字形名称到哈希值的映射 ({"uni4E00": "hash值", ...})
+        """
+        dao = cls.__new__(cls)
+        dao.file_path = dao.table_path = None
+        dao._init_state()
+        dao._char_map = dict(char_map)
+        dao._hash_map = {hash_val: char for char, hash_val in char_map.items()}
+        dao._open_table(build_hash_table(char_map))
+        dao._loaded = True
+        return dao
+
+    def _load_json(self) -> None:
+        """
+        加载JSON映射表
+
+        Raises:
+            FontDecodeError: 当字体映射表文件不存在或格式错误时
+        """
+        with self._lock:
+            if self._char_map is not None:
+                return
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as fp:
+                    char_map = json.load(fp)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                raise FontDecodeError(
+                    f"加载字体映射表失败: {self.file_path} - {e}"
+                ) from e
+            self._hash_map = {hash_val: char for char, hash_val in char_map.items()}
+            self._char_map = char_map
+
+    def _open_table(self, data: Union[mmap.mmap, bytes]) -> None:
+        """
+        校验并使用二进制表
+
+        Raises:
+            ValueError: 文件头或长度无效
+        """
+        if len(data) < _TABLE_HEADER.size:
+            raise ValueError("文件过短")
+        magic, version, count = _TABLE_HEADER.unpack_from(data)
+        if magic != FONT_TABLE_MAGIC or version != FONT_TABLE_VERSION:
+            raise ValueError("文件头无效")
+        if len(data) != _TABLE_HEADER.size + count * _TABLE_RECORD.size:
+            raise ValueError("文件长度与记录数不符")
+        self._table = data
+        self._count = count
+
+    def _load(self) -> None:
+        """首次查找时映射二进制表, 失败时加载JSON映射表"""
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.table_path, "rb") as fp:
+                    table = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    self._open_table(table)
+                except ValueError:
+                    table.close()
+                    raise
+            except (OSError, ValueError) as e:
+                logger.debug(f"字体哈希二进制表不可用, 使用JSON映射表: {e}")
+                try:
+                    self._load_json()
+                except FontDecodeError as e:
+                    logger.warning(f"初始化字体哈希数据失败 - {e}")
+                    self._char_map, self._hash_map = {}, {}
+            self._loaded = True
+
+    def _search(self, digest: bytes) -> Optional[int]:
+        """在二进制表中二分查找摘要对应的码位"""
+        table = self._table
+        record = _TABLE_RECORD.size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = _TABLE_HEADER.size + mid * record
+            if table[offset : offset + 16] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        offset = _TABLE_HEADER.size + lo * record
+        if lo < self._count and table[offset : offset + 16] == digest:
+            return _TABLE_RECORD.unpack_from(table, offset)[1]
+        return None
+
+    def find_codepoint(self, font_hash: str) -> Optional[int]:
+        """
+        通过字体哈希值查找对应的Unicode码位
+
+        Args:
+            font_hash: 字体哈希值
+
+        Returns:
+            对应的Unicode码位，如果未找到则返回None
+        """
         try:
-            with open(full_path, "r", encoding="utf-8") as fp:
-                self.char_map = json.load(fp)
-                self.hash_map = {
-                    hash_val: char for char, hash_val in self.char_map.items()
-                }
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            raise FontDecodeError(f"加载字体映射表失败: {full_path} - {e}") from e
+            return self._found[font_hash]
+        except KeyError:
+            pass
+        if not self._loaded:
+            self._load()
+        if self._table is not None:
+            try:
+                codepoint = self._search(bytes.fromhex(font_hash))
+            except ValueError:
+                codepoint = None
+        else:
+            match = _UNI_NAME_RE.fullmatch(self._hash_map.get(font_hash, ""))
+            codepoint = int(match.group(1), 16) if match else None
+        self._found[font_hash] = codepoint
+        return codepoint
 
     def find_char(self, font_hash: str) -> Optional[str]:
         """
@@ -101,9 +302,10 @@ class FontHashDAO:
             font_hash: 字体哈希值
 
         Returns:
-            对应的Unicode字符编码，如果未找到则返回None
+            对应的Unicode字符编码 (如 "uni4E00")，如果未找到则返回None
         """
-        return self.hash_map.get(font_hash)
+        codepoint = self.find_codepoint(font_hash)
+        return None if codepoint is None else f"uni{codepoint:04X}"
 
     def find_hash(self, char: str) -> Optional[str]:
         """
@@ -117,21 +319,158 @@ class FontHashDAO:
         """
         return self.char_map.get(char)
 
-
-# 初始化字体哈希DAO单例
+    @property
+    def fingerprint(self) -> str:
+        """映射表内容的摘要, 用于区分由不同映射表得到的解密结果"""
+        if self._fingerprint is None:
+            if not self._loaded:
+                self._load()
+            if self._table is not None:
+                content = self._table
+            else:
+                try:
+                    content = Path(self.file_path).read_bytes()
+                except OSError:
+                    content = b""
+            self._fingerprint = hashlib.sha1(content).hexdigest()
+        return self._fingerprint
+
+    @property
+    def char_map(self) -> Dict[str, str]:
+        """字形名称到哈希值的映射, 首次访问时加载JSON映射表"""
+        if self._char_map is None:
+            self._load_json()
+        return self._char_map
+
+    @property
+    def hash_map(self) -> Dict[str, str]:
+        """哈希值到字形名称的映射, 首次访问时加载JSON映射表"""
+        if self._hash_map is None:
+            self._load_json()
+        return self._hash_map
+
+
+# 初始化字体哈希DAO单例, 映射表在首次解密时才加载
 try:
     fonthash_dao = FontHashDAO()
 except Exception as e:
     logger.warning(f"初始化字体哈希数据失败 - {e}")
-    fonthash_dao = FontHashDAO.__new__(FontHashDAO)
-    fonthash_dao.char_map = {}
-    fonthash_dao.hash_map = {}
+    fonthash_dao = FontHashDAO.from_map({})
+
+# 字形轮廓索引, 字形哈希不在映射表中时近似匹配, 索引文件在首次使用时才加载
+outline_index = GlyphOutlineIndex(resource_path("resource/font_glyph_index.npy"))
+
+
+# 字形坐标为 int16, 预先格式化每个取值的十进制字符串, 拼接哈希内容时按下标取用
+_COORD_OFFSET = 1 << 15
+_COORD_WIDTH = len(str(-_COORD_OFFSET))
+_COORD_COLUMNS = np.arange(_COORD_WIDTH)
+_coord_strings: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+def _coord_table() -> Tuple[np.ndarray, np.ndarray]:
+    """int16 取值的十进制字符串表 (按宽度补齐的字节, 长度), 首次使用时生成"""
+    global _coord_strings
+    if _coord_strings is None:
+        strings = [str(v).encode() for v in range(-_COORD_OFFSET, _COORD_OFFSET)]
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+        padded = b"".join(s.ljust(_COORD_WIDTH, b"\0") for s in strings)
+        digits = np.frombuffer(padded, dtype=np.uint8).reshape(-1, _COORD_WIDTH)
+        _coord_strings = (digits, lengths)
+    return _coord_strings
+
+
+def _point_count(glyph: Glyph) -> int:
+    """
+    参与哈希的点数
+
+    Returns:
+        点数, 数据类型或轮廓结束点不规则(与逐点实现的遍历顺序可能不同)时返回-1
+    """
+    flags = glyph.flags
+    if not isinstance(glyph.coordinates, GlyphCoordinates) or not (
+        isinstance(flags, (bytes, bytearray))
+        or (isinstance(flags, array.array) and flags.itemsize == 1)
+    ):
+        return -1
+    ends = list(glyph.endPtsOfContours[: glyph.numberOfContours])
+    if len(ends) < glyph.numberOfContours or ends != sorted(ends):
+        return -1
+    count = ends[-1] + 1
+    if count <= 0 or len(flags) < count or len(glyph.coordinates) < count:
+        return -1
+    return count
+
+
+def hash_glyphs(glyphs: Sequence[Glyph]) -> List[str]:
+    """
+    批量计算TTF字体字形的哈希值
+
+    所有字形的坐标与标志合并为数组, 用预先格式化的字符串表一次拼接出哈希内容,
+    每个字形只需计算一次MD5; 结果与逐点拼接 f"{x}{y}{flag}" 的实现逐字节相同。
+    坐标不是 int16 整数或轮廓数据不规则的字形逐点计算。
+
+    Args:
+        glyphs: TTF字体字形对象
+
+    Returns:
+        与输入顺序一致的MD5哈希值, 没有轮廓的字形为空字符串
+    """
+    hashes = [""] * len(glyphs)
+    coords, flags, counts, batch = [], [], [], []
+    for i, glyph in enumerate(glyphs):
+        if glyph.numberOfContours <= 0:
+            continue
+        count = _point_count(glyph)
+        if count < 0:
+            hashes[i] = _hash_glyph_points(glyph)
+            continue
+        coords.append(memoryview(glyph.coordinates.array)[: 2 * count])
+        flags.append(glyph.flags[:count])
+        counts.append(count)
+        batch.append(i)
+    if not batch:
+        return hashes
+
+    xy = np.frombuffer(b"".join(coords), dtype=np.float64).reshape(-1, 2)
+    if not np.all((xy == np.trunc(xy)) & (xy >= -_COORD_OFFSET) & (xy < _COORD_OFFSET)):
+        for i in batch:
+            hashes[i] = _hash_glyph_points(glyphs[i])
+        return hashes
+
+    # 每个点依次为 x, y, flag, 与逐点实现的拼接顺序相同
+    values = np.empty((len(xy), 3), dtype=np.int64)
+    values[:, :2] = xy
+    values[:, 2] = np.frombuffer(b"".join(flags), dtype=np.uint8) & 0x01
+    digits, lengths = _coord_table()
+    index = values.ravel() + _COORD_OFFSET
+    sizes = lengths[index]
+    content = digits[index][_COORD_COLUMNS < sizes[:, None]].tobytes()
+    point_ends = np.cumsum(sizes.reshape(-1, 3).sum(axis=1))
+    start = 0
+    for i, end in zip(batch, point_ends[np.cumsum(counts) - 1].tolist()):
+        hashes[i] = hashlib.md5(content[start:end]).hexdigest()
+        start = end
+    return hashes
 
 
 def hash_glyph(glyph: Glyph) -> str:
     """
     计算TTF字体字形的哈希值
 
+    Args:
+        glyph: TTF字体字形对象
+
+    Returns:
+        字形的MD5哈希值
+    """
+    return hash_glyphs([glyph])[0]
+
+
+def _hash_glyph_points(glyph: Glyph) -> str:
+    """
+    逐点计算TTF字体字形的哈希值, 用于 hash_glyphs 无法向量化的字形
+
     Args:
         glyph: TTF字体字形对象
 
@@ -156,12 +495,15 @@ def hash_glyph(glyph: Glyph) -> str:
     return hashlib.md5(pos_bin.encode()).hexdigest()
 
 
-def font2map(font_data: Union[IO, Path, str]) -> Dict[str, str]:
+def font2map(
+    font_data: Union[IO, Path, str], glyphs: Optional[Dict[str, Glyph]] = None
+) -> Dict[str, str]:
     """
     从字体文件或Base64编码的字体数据中提取字形哈希映射表
 
     Args:
         font_data: 字体文件路径、文件对象或Base64编码的字体数据
+        glyphs: 传入字典时同时保存有轮廓的字形 {字形名称: 字形}, 供 font2chars 近似匹配
 
     Returns:
         字形名称到哈希值的映射字典 ({"uni4E00": "hash值", ...})
@@ -183,21 +525,89 @@ def font2map(font_data: Union[IO, Path, str]) -> Dict[str, str]:
     try:
         with TTFont(font_data, lazy=False) as font_file:
             table: table__g_l_y_f = font_file["glyf"]
-            for name in table.glyphOrder:
-                if name.startswith("uni"):
-                    glyph_hash = hash_glyph(table.glyphs[name])
-                    if glyph_hash:
-                        font_hashmap[name] = glyph_hash
+            names = [name for name in table.glyphOrder if name.startswith("uni")]
+            glyph_hashes = hash_glyphs([table.glyphs[name] for name in names])
+            for name, glyph_hash in zip(names, glyph_hashes):
+                if glyph_hash:
+                    font_hashmap[name] = glyph_hash
+                    if glyphs is not None:
+                        glyphs[name] = table.glyphs[name]
     except Exception as e:
         raise FontDecodeError(f"无法解析字体文件: {e}") from e
 
     return font_hashmap
 
 
+def font2chars(
+    dst_fontmap: Dict[str, str], glyphs: Optional[Dict[str, Glyph]] = None
+) -> Dict[str, str]:
+    """
+    将目标字体的字形哈希映射表解析为加密字符到原始字符的映射
+
+    结果与 decrypt 逐字查找相同, 可以缓存并由 compile_table 生成转换表。
+    提供字形时, 哈希不在映射表中的字形再按轮廓在 outline_index 中近似匹配。
+
+    Args:
+        dst_fontmap: 目标字体的字形哈希映射表
+        glyphs: font2map 保存的字形
+
+    Returns:
+        {加密字符: 原始字符}, 只包含能够还原的字符
+    """
+    chars = {}
+    unknown = []
+    for name, dst_hash in dst_fontmap.items():
+        match = _UNI_NAME_RE.fullmatch(name)
+        if not match:
+            continue
+        char = chr(int(match.group(1), 16))
+        # decrypt 按 uni+不补零的十六进制 查找字形, 其他写法的字形名称不会被使用
+        if name != f"uni{ord(char):X}":
+            continue
+        codepoint = fonthash_dao.find_codepoint(dst_hash)
+        if codepoint is not None:
+            chars[char] = chr(codepoint)
+        elif glyphs and name in glyphs:
+            unknown.append((name, char))
+
+    if unknown:
+        matches = outline_index.match([glyphs[name] for name, _ in unknown])
+        for (name, char), match in zip(unknown, matches):
+            if match is None:
+                logger.debug(f"字形{name}的哈希未知, 也没有轮廓相近的字符")
+                continue
+            codepoint, confidence = match
+            chars[char] = chr(codepoint)
+            logger.info(
+                f"字形{name}的哈希未知, 按轮廓匹配为「{chr(codepoint)}」, 置信度{confidence:.2f}"
+            )
+    return chars
+
+
+def compile_table(chars: Dict[str, str]) -> Dict[int, str]:
+    """
+    将 font2chars 的结果与康熙部首替换表合并为 str.translate 使用的转换表
+
+    解密文本只需调用一次 text.translate(table), 结果与 decrypt 相同。
+
+    Args:
+        chars: 加密字符到原始字符的映射
+
+    Returns:
+        转换表 {加密字符码位: 解密并替换康熙部首后的字符}
+    """
+    table = {codepoint: chr(radical) for codepoint, radical in KX_RADICALS_TAB.items()}
+    for char, original in chars.items():
+        table[ord(char)] = original.translate(KX_RADICALS_TAB)
+    return table
+
+
 def decrypt(dst_fontmap: Dict[str, str], encrypted_text: str) -> str:
     """
     解密超星学习通加密字体的文本
 
+    逐字查找字形哈希, 用于单次解密; 重复解密同一字体的文本时使用 compile_table 的转换表。
+
     Args:
         dst_fontmap: 目标字体的字形哈希映射表
         encrypted_text: 加密的文本
@@ -215,15 +625,10 @@ def decrypt(dst_fontmap: Dict[str, str], encrypted_text: str) -> str:
         if char_code in dst_fontmap:
             dst_hash = dst_fontmap[char_code]
             # 通过哈希值找回原始字符
-            original_char_code = fonthash_dao.find_char(dst_hash)
-            if original_char_code:
-                # 将Unicode编码转换为字符
-                try:
-                    original_char = chr(int(original_char_code[3:], 16))
-                    result.append(original_char)
-                    continue
-                except (ValueError, IndexError):
-                    pass
+            codepoint = fonthash_dao.find_codepoint(dst_hash)
+            if codepoint is not None:
+                result.append(chr(codepoint))
+                continue
 
         # 如果无法解密，则保留原字符
         result.append(char)
@@ -4,26 +4,68 @@
 
 该模块负责解析超星学习通平台的课程、章节、任务点等各种数据，
 并转换为程序内部使用的结构化数据格式。
+
+页面默认直接用 lxml 解析并以预编译的 XPath 查询, 避免构建 BeautifulSoup 树;
+原有的 BeautifulSoup 实现保留, 可通过 PARSER 或各函数的 parser 参数切换,
+两种实现返回的结果相同。
 """
 import re
 import json
-from typing import List, Dict, Tuple, Any, Optional
+from typing import List, Dict, Tuple, Any, Iterator, Optional
 from bs4 import BeautifulSoup, NavigableString
+from lxml import etree
 from api.logger import logger
 from api.font_decoder import FontDecoder
 
+PARSER_LXML = "lxml"  # lxml + XPath
+PARSER_BS4 = "bs4"  # BeautifulSoup
+PARSER = PARSER_LXML  # 默认的解析方式
+
+_MARG_RE = re.compile(r"mArg\s*=\s*(?=\{)")
+# 章节点的 id 属性, 用于在解析前预估章节数
+_POINT_ID_ATTR_RE = re.compile(r"""\bid\s*=\s*["']cur\d{1,20}["']""")
+# 增量解析时可以在其后切分页面的标记: 注释、完整的 script/style 元素以及标签
+_MARKUP_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style)\b.*?</\1\s*>"
+    r"""|<[A-Za-z/!?](?:"[^"]*"|'[^']*'|[^<>"'])*>""",
+    re.S | re.I,
+)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _use_lxml(parser: Optional[str]) -> bool:
+    """
+    判断是否使用 lxml 实现
+
+    Args:
+        parser: PARSER_LXML / PARSER_BS4, 为None时使用模块的 PARSER
+
+    Raises:
+        ValueError: 未知的解析方式
+    """
+    parser = parser or PARSER
+    if parser not in (PARSER_LXML, PARSER_BS4):
+        raise ValueError(f"未知的解析方式: {parser}")
+    return parser == PARSER_LXML
+
 
-def decode_course_list(html_text: str) -> List[Dict[str, str]]:
+def decode_course_list(
+    html_text: str, parser: Optional[str] = None
+) -> List[Dict[str, str]]:
     """
     解析课程列表页面，提取课程信息
 
     Args:
         html_text: 课程列表页面的HTML内容
+        parser: 解析方式, 默认使用 PARSER
 
     Returns:
         课程信息列表，每个课程包含id、title、teacher等信息
     """
     logger.trace("开始解码课程列表...")
+    if _use_lxml(parser):
+        return _course_list_lxml(_parse_html(html_text))
     soup = BeautifulSoup(html_text, "lxml")
     raw_courses = soup.select("div.course")
     course_list = []
@@ -53,17 +95,22 @@ def decode_course_list(html_text: str) -> List[Dict[str, str]]:
     return course_list
 
 
-def decode_course_folder(html_text: str) -> List[Dict[str, str]]:
+def decode_course_folder(
+    html_text: str, parser: Optional[str] = None
+) -> List[Dict[str, str]]:
     """
     解析二级课程列表页面，提取文件夹信息
 
     Args:
         html_text: 二级课程列表页面的HTML内容
+        parser: 解析方式, 默认使用 PARSER
 
     Returns:
         课程文件夹信息列表
     """
     logger.trace("开始解码二级课程列表...")
+    if _use_lxml(parser):
+        return _course_folder_lxml(_parse_html(html_text))
     soup = BeautifulSoup(html_text, "lxml")
     raw_courses = soup.select("ul.file-list>li")
     course_folder_list = []
@@ -81,17 +128,20 @@ def decode_course_folder(html_text: str) -> List[Dict[str, str]]:
     return course_folder_list
 
 
-def decode_course_point(html_text: str) -> Dict[str, Any]:
+def decode_course_point(html_text: str, parser: Optional[str] = None) -> Dict[str, Any]:
     """
     解析章节列表页面，提取章节点信息
 
     Args:
         html_text: 章节列表页面的HTML内容
+        parser: 解析方式, 默认使用 PARSER
 
     Returns:
         章节信息字典，包含是否锁定状态和章节点列表
     """
     logger.trace("开始解码章节列表...")
+    if _use_lxml(parser):
+        return _course_point_lxml(_parse_html(html_text))
     soup = BeautifulSoup(html_text, "lxml")
     course_point = {
         "hasLocked": False,  # 用于判断该课程任务是否是需要解锁
@@ -162,6 +212,122 @@ def _extract_points_from_chapter(chapter_unit) -> List[Dict[str, Any]]:
     return point_list
 
 
+def iter_course_points(
+    html_text: str, chunk_size: int = 64 * 1024
+) -> Iterator[Dict[str, Any]]:
+    """
+    增量解析章节列表页面, 每解析完一个章节单元就产出其中的章节点
+
+    页面按块送入 lxml 的增量解析器, 章节单元的结束标签解析后才产出其中的章节点,
+    随后从树中释放; 产出的章节点及其顺序与 decode_course_point 的 points 相同。
+
+    Args:
+        html_text: 章节列表页面的HTML内容
+        chunk_size: 每次送入解析器的字符数
+
+    Yields:
+        章节点信息
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    state = {"depth": 0}  # 当前所在章节单元的嵌套层数
+    for chunk in _html_chunks(html_text, chunk_size):
+        parser.feed(chunk)
+        yield from _read_chapter_points(parser, state)
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        # 空页面
+        return
+    yield from _read_chapter_points(parser, state)
+
+
+class CoursePoints:
+    """
+    按需解析的章节列表
+
+    按下标访问时才继续解析页面(多解析一个章节), 因此可以在解析完第一个章节后立即开始学习;
+    已解析的章节点保存在列表中, 支持按下标回滚到之前的章节。
+    has_locked 只在访问时计算, 遇到需要解锁的章节即可确定, 否则解析完整个页面。
+    total 在解析完成前是按页面中章节点 id 的数量得到的预估值, 用于显示进度。
+    """
+
+    def __init__(self, html_text: str, chunk_size: int = 64 * 1024):
+        """
+        Args:
+            html_text: 章节列表页面的HTML内容
+            chunk_size: 每次送入解析器的字符数
+        """
+        self._reader: Optional[Iterator[Dict[str, Any]]] = iter_course_points(
+            html_text, chunk_size
+        )
+        self._points: List[Dict[str, Any]] = []
+        self._has_locked = False
+        self._estimated_total = sum(1 for _ in _POINT_ID_ATTR_RE.finditer(html_text))
+
+    def _parse_next(self) -> bool:
+        """再解析一个章节点, 页面已解析完时返回False"""
+        if self._reader is None:
+            return False
+        point = next(self._reader, None)
+        if point is None:
+            # 释放解析器与页面内容
+            self._reader = None
+            return False
+        self._points.append(point)
+        if point["need_unlock"]:
+            self._has_locked = True
+        return True
+
+    @property
+    def complete(self) -> bool:
+        """页面是否已全部解析"""
+        return self._reader is None
+
+    @property
+    def parsed(self) -> int:
+        """已解析的章节点数"""
+        return len(self._points)
+
+    @property
+    def total(self) -> int:
+        """章节点总数, 页面解析完成前为预估值"""
+        if self.complete:
+            return len(self._points)
+        return max(self._estimated_total, len(self._points))
+
+    @property
+    def has_locked(self) -> bool:
+        """是否存在需要解锁的章节"""
+        while not self._has_locked and self._parse_next():
+            pass
+        return self._has_locked
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            self._parse_all()
+        # 多解析一个章节点, 访问最后一个章节时即可得知页面已解析完
+        while index + 1 >= len(self._points) and self._parse_next():
+            pass
+        return self._points[index]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        index = 0
+        while index < len(self._points) or self._parse_next():
+            yield self._points[index]
+            index += 1
+
+    def __len__(self) -> int:
+        self._parse_all()
+        return len(self._points)
+
+    def __bool__(self) -> bool:
+        return bool(self._points) or self._parse_next()
+
+    def _parse_all(self) -> None:
+        while self._parse_next():
+            pass
+
+
 def decode_course_card(html_text: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     解析任务点列表页面，提取任务点信息
@@ -179,13 +345,8 @@ def decode_course_card(html_text: str) -> Tuple[List[Dict[str, Any]], Dict[str,
     if "章节未开放" in html_text:
         return [], {"notOpen": True}
 
-    # 提取mArg参数
-    temp = re.findall(r"mArg=\{(.*?)\};", html_text.replace(" ", ""))
-    if not temp:
-        return [], {}
-
-    # 解析JSON数据
-    cards_data = json.loads("{" + temp[0] + "}")
+    # 提取并解析mArg参数
+    cards_data = _extract_marg(html_text)
     if not cards_data:
         return [], {}
 
@@ -199,6 +360,33 @@ def decode_course_card(html_text: str) -> Tuple[List[Dict[str, Any]], Dict[str,
     return job_list, job_info
 
 
+def _extract_marg(html_text: str) -> Optional[Dict[str, Any]]:
+    """
+    从任务点页面中提取mArg对象
+
+    从 "mArg = {" 处直接解析JSON, 不复制整个页面, 字符串中的空格保持原样
+
+    Args:
+        html_text: 任务点列表页面的HTML内容
+
+    Returns:
+        mArg对象, 页面中没有时返回None
+
+    Raises:
+        json.JSONDecodeError: 所有mArg都无法解析时抛出第一个错误
+    """
+    error = None
+    for match in _MARG_RE.finditer(html_text):
+        try:
+            cards_data, _ = _JSON_DECODER.raw_decode(html_text, match.end())
+            return cards_data
+        except json.JSONDecodeError as e:
+            error = error or e
+    if error:
+        raise error
+    return None
+
+
 def _extract_job_info(cards_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     从卡片数据中提取任务基本信息
@@ -331,25 +519,30 @@ def _process_work_task(card: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def decode_questions_info(html_content: str) -> Dict[str, Any]:
+def decode_questions_info(
+    html_content: str, parser: Optional[str] = None
+) -> Dict[str, Any]:
     """
     解析题目信息，提取表单数据和问题列表
 
     Args:
         html_content: 题目页面HTML内容
+        parser: 解析方式, 默认使用 PARSER
 
     Returns:
         包含表单数据和问题列表的字典
     """
+    if _use_lxml(parser):
+        return _questions_info_lxml(html_content)
     soup = BeautifulSoup(html_content, "lxml")
     form_data = _extract_form_data(soup)
 
     # 检查是否存在字体加密
-    has_font_encryption = bool(soup.find("style", id="cxSecretStyle"))
+    style_tag = soup.find("style", id="cxSecretStyle")
     font_decoder = None
 
-    if has_font_encryption:
-        font_decoder = FontDecoder(html_content)
+    if style_tag is not None:
+        font_decoder = FontDecoder.from_style(style_tag.text)
     else:
         logger.warning("未找到字体文件，可能是未加密的题目不进行解密")
 
@@ -459,7 +652,7 @@ def _extract_title(element, font_decoder=None) -> str:
 
 def _extract_choices(element, font_decoder=None) -> str:
     """提取选项内容，支持解码加密字体"""
-    if not element:
+    if element is None:
         return ""
 
     # 提取aria-label属性值作为选项，解决#474
@@ -472,3 +665,324 @@ def _extract_choices(element, font_decoder=None) -> str:
         return font_decoder.decode(cleaned_content)
 
     return cleaned_content
+
+
+# ---------------------------------------------------------------------------
+# lxml + XPath 实现
+# ---------------------------------------------------------------------------
+
+
+def _has_class(name: str) -> str:
+    """与 CSS 类选择器等价的 XPath 条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first(path: str) -> etree.XPath:
+    """编译只取第一个匹配元素的 XPath"""
+    return etree.XPath(f"({path})[1]")
+
+
+# BeautifulSoup 对字符串的处理: 全部为空白的字符串压缩为一个换行或空格,
+# get_text 不包含注释与脚本、样式中的文本
+_ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+_PRESERVE_WHITESPACE_TAGS = ("pre", "textarea")
+_NON_TEXT_TAGS = ("script", "style", "template")
+
+_COURSES = etree.XPath(f"//div[{_has_class('course')}]")
+_COURSE_NOT_OPEN = _first(
+    f".//a[{_has_class('not-open-tip')}] | .//div[{_has_class('not-open-tip')}]"
+)
+_COURSE_CLAZZ_ID = _first(f".//input[{_has_class('clazzId')}]")
+_COURSE_COURSE_ID = _first(f".//input[{_has_class('courseId')}]")
+_COURSE_LINK = _first(".//a")
+_COURSE_NAME = _first(f".//span[{_has_class('course-name')}]")
+_COURSE_DESC = _first(f".//p[{_has_class('margint10')}]")
+_COURSE_TEACHER = _first(f".//p[{_has_class('color3')}]")
+
+_FOLDERS = etree.XPath(f"//ul[{_has_class('file-list')}]/li")
+_FOLDER_RENAME = _first(f".//input[{_has_class('rename-input')}]")
+
+_CHAPTER_UNITS = etree.XPath(f"//div[{_has_class('chapter_unit')}]")
+_CHAPTER_UNITS_IN = etree.XPath(
+    f"descendant-or-self::div[{_has_class('chapter_unit')}]"
+)
+_SELF_CHAPTER_UNIT = etree.XPath(f"self::div[{_has_class('chapter_unit')}]")
+_POINT_TITLE = _first(f".//a[{_has_class('clicktitle')}]")
+_POINT_JOB_COUNT = _first(f".//input[{_has_class('knowledgeJobCount')}]")
+_POINT_TIPS = _first(f".//span[{_has_class('bntHoverTips')}]")
+_POINT_ID_RE = re.compile(r"^cur(\d{1,20})$")
+
+_FORM = _first("//form")
+_SECRET_STYLE = _first("//style[@id='cxSecretStyle']")
+_QUESTIONS = etree.XPath(f".//div[{_has_class('singleQuesId')}]")
+_QUESTION_TYPE = _first(f".//div[{_has_class('TiMu')}]")
+_QUESTION_TITLE = _first(f".//div[{_has_class('Zy_TItle')}]")
+_QUESTION_OPTIONS = etree.XPath("(.//ul)[1]//li")
+
+
+def _parse_html(html_text: str) -> etree._Element:
+    """解析HTML, 返回根元素"""
+    try:
+        root = etree.HTML(html_text)
+    except ValueError:
+        # 带有编码声明的字符串需要以字节形式解析
+        root = etree.HTML(html_text.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+    if root is None:
+        # 空文档
+        root = etree.Element("html")
+    return root
+
+
+def _one(query: etree.XPath, element: etree._Element) -> Optional[etree._Element]:
+    result = query(element)
+    return result[0] if result else None
+
+
+def _bs4_string(text: str, preserve: bool) -> str:
+    if preserve or text.translate(_ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def _collect_strings(
+    element: etree._Element, content: List[str], markup: bool, preserve: bool
+) -> None:
+    """
+    按文档顺序收集元素内的字符串, 结果与 BeautifulSoup 相同
+
+    Args:
+        element: 元素
+        content: 收集结果
+        markup: 为True时与 descendants 相同, 包含注释与图片; 否则与 get_text 相同
+        preserve: 是否位于保留空白的元素中
+    """
+    preserve = preserve or element.tag in _PRESERVE_WHITESPACE_TAGS
+    if element.text and (markup or element.tag not in _NON_TEXT_TAGS):
+        content.append(_bs4_string(element.text, preserve))
+    for child in element:
+        if isinstance(child.tag, str):
+            if markup and child.tag == "img":
+                content.append(f'<img src="{child.get("src", "")}">')
+            _collect_strings(child, content, markup, preserve)
+        elif markup:
+            # 注释, lxml 将处理指令也解析为注释
+            content.append(_bs4_string(child.text or "", preserve))
+        if child.tail:
+            content.append(_bs4_string(child.tail, preserve))
+
+
+def _strings(element: etree._Element, markup: bool = False) -> str:
+    preserve = any(
+        ancestor.tag in _PRESERVE_WHITESPACE_TAGS
+        for ancestor in element.iterancestors()
+    )
+    content = []
+    _collect_strings(element, content, markup, preserve)
+    return "".join(content)
+
+
+def _course_list_lxml(root: etree._Element) -> List[Dict[str, str]]:
+    course_list = []
+    for course in _COURSES(root):
+        # 跳过未开放课程
+        if _COURSE_NOT_OPEN(course):
+            continue
+
+        desc = _one(_COURSE_DESC, course)
+        course_list.append(
+            {
+                "id": course.attrib["id"],
+                "info": course.attrib["info"],
+                "roleid": course.attrib["roleid"],
+                "clazzId": _one(_COURSE_CLAZZ_ID, course).attrib["value"],
+                "courseId": _one(_COURSE_COURSE_ID, course).attrib["value"],
+                "cpi": re.findall(
+                    r"cpi=(.*?)&", _one(_COURSE_LINK, course).attrib["href"]
+                )[0],
+                "title": _one(_COURSE_NAME, course).attrib["title"],
+                "desc": desc.attrib["title"] if desc is not None else "",
+                "teacher": _one(_COURSE_TEACHER, course).attrib["title"],
+            }
+        )
+    return course_list
+
+
+def _course_folder_lxml(root: etree._Element) -> List[Dict[str, str]]:
+    course_folder_list = []
+    for course in _FOLDERS(root):
+        if not course.get("fileid"):
+            continue
+        course_folder_list.append(
+            {
+                "id": course.attrib["fileid"],
+                "rename": _one(_FOLDER_RENAME, course).attrib["value"],
+            }
+        )
+    return course_folder_list
+
+
+def _course_point_lxml(root: etree._Element) -> Dict[str, Any]:
+    course_point = {"hasLocked": False, "points": []}
+    for chapter_unit in _CHAPTER_UNITS(root):
+        for point in _chapter_points_lxml(chapter_unit):
+            if point["need_unlock"]:
+                course_point["hasLocked"] = True
+            course_point["points"].append(point)
+    return course_point
+
+
+def _chapter_points_lxml(chapter_unit: etree._Element) -> Iterator[Dict[str, Any]]:
+    """逐个产出章节单元中的章节点"""
+    for raw_point in chapter_unit.iter("li"):
+        # 第一个后代div, 与 BeautifulSoup 的 li.div 相同
+        point = next(raw_point.iter("div"), None)
+        if "id" not in point.attrib:
+            continue
+
+        point_id = _POINT_ID_RE.findall(point.attrib["id"])[0]
+        point_title = _strings(_one(_POINT_TITLE, point)).replace("\n", "").strip()
+
+        # 提示文本只查询一次
+        tips = _one(_POINT_TIPS, point)
+        tips_text = _strings(tips) if tips is not None else ""
+        job_count_input = _one(_POINT_JOB_COUNT, point)
+
+        job_count = 1  # 默认为1
+        need_unlock = False
+        if job_count_input is not None:
+            job_count = job_count_input.attrib["value"]
+        elif "解锁" in tips_text:
+            need_unlock = True
+
+        yield {
+            "id": point_id,
+            "title": point_title,
+            "jobCount": job_count,
+            "has_finished": "已完成" in tips_text,
+            "need_unlock": need_unlock,
+        }
+
+
+def _is_chapter_unit(element: etree._Element) -> bool:
+    # 先用字符串判断排除绝大多数元素, 再用与 _CHAPTER_UNITS 相同的条件确认
+    return (
+        element.tag == "div"
+        and "chapter_unit" in element.get("class", "")
+        and bool(_SELF_CHAPTER_UNIT(element))
+    )
+
+
+def _html_chunks(html_text: str, chunk_size: int) -> Iterator[str]:
+    """
+    按约 chunk_size 个字符切分页面, 每块都在标签之后结束
+
+    libxml2 的 HTML 增量解析器在分块切开标签、注释或 script/style 的内容时
+    会丢失后面的内容甚至破坏内存, 因此每块延长到下一个完整标记的结束处。
+    """
+    start = 0
+    while start < len(html_text):
+        end = len(html_text)
+        # start 总在标记之后, 从这里开始匹配不会落在标记内部
+        for match in _MARKUP_RE.finditer(html_text, start):
+            if match.end() >= start + chunk_size:
+                end = match.end()
+                break
+        yield html_text[start:end]
+        start = end
+
+
+def _release(element: etree._Element) -> None:
+    """释放已处理的子树及其之前的兄弟节点"""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def _read_chapter_points(
+    parser: etree.HTMLPullParser, state: Dict[str, int]
+) -> Iterator[Dict[str, Any]]:
+    for event, element in parser.read_events():
+        if not _is_chapter_unit(element):
+            continue
+        if event == "start":
+            state["depth"] += 1
+            continue
+        state["depth"] -= 1
+        if state["depth"]:
+            # 嵌套的章节单元随最外层一起处理, 保持与整页解析相同的顺序
+            continue
+        for chapter_unit in _CHAPTER_UNITS_IN(element):
+            yield from _chapter_points_lxml(chapter_unit)
+        _release(element)
+
+
+def _questions_info_lxml(html_content: str) -> Dict[str, Any]:
+    root = _parse_html(html_content)
+    form_tag = _one(_FORM, root)
+
+    form_data = {}
+    if form_tag is not None:
+        # 提取所有非答案字段的input
+        for input_tag in form_tag.iter("input"):
+            name = input_tag.get("name")
+            if name is None or "answer" in name:
+                continue
+            form_data[name] = input_tag.get("value", "")
+
+    # 字体直接取自已解析的样式标签, 不再重复解析页面
+    style_tag = _one(_SECRET_STYLE, root)
+    font_decoder = None
+    if style_tag is not None:
+        font_decoder = FontDecoder.from_style(style_tag.text or "")
+    else:
+        logger.warning("未找到字体文件，可能是未加密的题目不进行解密")
+
+    if form_tag is None:
+        # 与 BeautifulSoup 实现相同, 没有表单的页面视为解析失败
+        raise AttributeError("题目页面中没有表单")
+
+    # 先收集全部标题与选项, 再一次性解码
+    parsed = []
+    texts = []
+    for div_tag in _QUESTIONS(form_tag):
+        title_div = _one(_QUESTION_TITLE, div_tag)
+        title = None if title_div is None else _clean(_strings(title_div, markup=True))
+        options = [_clean(li.get("aria-label")) for li in _QUESTION_OPTIONS(div_tag)]
+        parsed.append((div_tag, title, options))
+        if title is not None:
+            texts.append(title)
+        texts.extend(options)
+    if font_decoder and texts:
+        decoded = iter(font_decoder.decode_many(texts))
+    else:
+        decoded = iter(texts)
+
+    questions = []
+    for div_tag, title, options in parsed:
+        question_id = div_tag.get("data", "")
+        q_type_code = _one(_QUESTION_TYPE, div_tag).get("data", "")
+        title = "" if title is None else next(decoded)
+        q_options = sorted(next(decoded) for _ in options)
+        questions.append(
+            {
+                "id": question_id,
+                "title": title,
+                "options": "\n".join(q_options),
+                "type": _get_question_type(q_type_code),
+                "answerField": {
+                    f"answer{question_id}": "",
+                    f"answertype{question_id}": q_type_code,
+                },
+            }
+        )
+
+    form_data["questions"] = questions
+    form_data["answerwqbid"] = ",".join([q["id"] for q in questions]) + ","
+    return form_data
+
+
+def _clean(text: str) -> str:
+    """去除换行与制表符"""
+    return text.replace("\r", "").replace("\t", "").replace("\n", "")
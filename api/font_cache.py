@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+加密字体解析缓存
+
+同一个加密字体经常在多道题目、多个页面与多个用户之间重复出现。解析结果以字体内容与
+字体哈希表的摘要为键, 在进程内的 LRU 中缓存编译好的 str.translate 转换表; 设置目录后
+加密字符到原始字符的映射同时保存为磁盘上的 JSON 文件, 供其他进程与下次运行使用。
+磁盘上的文件数超过上限时按修改时间删除最早的文件, 每写入上限的十分之一个文件检查一次。
+命中时不再调用 fontTools 解析字体, 命中情况计入 answer_metrics 的 fonts 统计。
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import api.cxsecret_font as cxfont
+from api.answer_cache import LRUCache
+from api.answer_metrics import (
+    FONT_DISK_HIT,
+    FONT_HIT,
+    FONT_MISS,
+    METRICS,
+    AnswerMetrics,
+)
+from api.logger import logger
+
+
+class FontMapCache:
+    """以字体内容寻址的解析结果缓存"""
+
+    DEFAULT_SIZE = 256
+    DEFAULT_MAX_FILES = 5000
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_SIZE,
+        directory: Union[Path, str, None] = None,
+        metrics: Optional[AnswerMetrics] = None,
+        max_files: int = DEFAULT_MAX_FILES,
+    ):
+        """
+        Args:
+            maxsize: 内存中缓存的字体数
+            directory: 磁盘缓存目录, 为空时只缓存在内存中
+            metrics: 记录命中情况的统计, 默认为进程内共享的统计
+            max_files: 磁盘缓存的最大文件数, 0表示不限制
+        """
+        self._lru = LRUCache(maxsize)
+        self.directory: Optional[Path] = None
+        self.max_files = max_files
+        self._writes_until_prune = 0
+        self.metrics = metrics or METRICS
+        self.set_directory(directory)
+
+    def set_directory(
+        self, directory: Union[Path, str, None], max_files: Optional[int] = None
+    ) -> None:
+        """
+        设置磁盘缓存目录, 为空时关闭磁盘缓存
+
+        Args:
+            directory: 磁盘缓存目录
+            max_files: 磁盘缓存的最大文件数, 为None时保持原设置
+        """
+        self.directory = Path(directory) if directory else None
+        if max_files is not None:
+            self.max_files = max_files
+        # 下次写入时先检查一次文件数
+        self._writes_until_prune = 0
+
+    @staticmethod
+    def key(font_data: bytes) -> str:
+        """缓存键, 字体哈希表或字形轮廓索引变化时解析结果随之失效"""
+        digest = hashlib.sha256(cxfont.fonthash_dao.fingerprint.encode())
+        digest.update(cxfont.outline_index.fingerprint.encode())
+        digest.update(font_data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, str]]:
+        try:
+            with self._path(key).open("r", encoding="utf8") as fp:
+                chars = json.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"字体缓存{key}读取失败: {e}")
+            return None
+        return chars if isinstance(chars, dict) else None
+
+    def _write(self, key: str, chars: Dict[str, str]) -> None:
+        """先写临时文件再原子替换, 多个进程可以同时写入同一个键"""
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open("w", encoding="utf8") as fp:
+                json.dump(chars, fp, ensure_ascii=False)
+            tmp.replace(path)
+        except OSError as e:
+            logger.debug(f"字体缓存{key}写入失败: {e}")
+            return
+        if self.max_files > 0:
+            self._writes_until_prune -= 1
+            if self._writes_until_prune <= 0:
+                self._writes_until_prune = max(1, self.max_files // 10)
+                self.prune()
+
+    def prune(self) -> int:
+        """
+        文件数超过 max_files 时按修改时间删除最早的缓存文件
+
+        Returns:
+            删除的文件数
+        """
+        if self.directory is None or self.max_files <= 0:
+            return 0
+        files = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    try:
+                        files.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"字体缓存目录读取失败: {e}")
+            return 0
+        excess = len(files) - self.max_files
+        if excess <= 0:
+            return 0
+        files.sort()
+        removed = 0
+        for _, path in files[:excess]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                # 其他进程可能已经删除
+                continue
+        logger.debug(f"字体缓存已删除{removed}个最早的文件")
+        return removed
+
+    def get_table(self, font_data: bytes) -> Dict[int, str]:
+        """
+        获取字体的解密转换表, 未缓存时解析字体
+
+        Args:
+            font_data: TTF字体文件内容
+
+        Returns:
+            cxsecret_font.compile_table 生成的转换表, 调用方不应修改
+
+        Raises:
+            FontDecodeError: 当无法解析字体时
+        """
+        key = self.key(font_data)
+        table = self._lru.get(key)
+        if table is not None:
+            self.metrics.font(FONT_HIT)
+            return table
+
+        chars = self._read(key) if self.directory is not None else None
+        if chars is not None:
+            self.metrics.font(FONT_DISK_HIT)
+        else:
+            glyphs = {}
+            font_map = cxfont.font2map(BytesIO(font_data), glyphs)
+            chars = cxfont.font2chars(font_map, glyphs)
+            self.metrics.font(FONT_MISS)
+            if self.directory is not None:
+                self._write(key, chars)
+        table = cxfont.compile_table(chars)
+        self._lru.put(key, table)
+        return table
+
+    def clear(self) -> None:
+        """清空内存缓存"""
+        self._lru.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+
+# 进程内共享的字体解析缓存
+FONT_CACHE = FontMapCache()
@@ -1,21 +1,26 @@
 from bs4 import BeautifulSoup
+import base64
+import binascii
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-import api.cxsecret_font as cxfont
 from api.exceptions import FontDecodeError
+from api.font_cache import FONT_CACHE
 from api.logger import logger
 
 
 class FontDecoder:
     """超星加密字体解码器。
 
-    用于解码超星平台使用特殊字体加密的内容。
+    用于解码超星平台使用特殊字体加密的内容。字体的解析结果由 FONT_CACHE 缓存,
+    重复出现的字体不再解析。
     """
 
     # 正则表达式常量
     FONT_BASE64_PATTERN = r"base64,([\w\W]+?)\'"
     FONT_DATA_URL_PREFIX = "data:application/font-ttf;charset=utf-8;base64,"
+    # 批量解码时的分隔符
+    BATCH_SEPARATOR = "\n"
 
     def __init__(self, html_content: Optional[str] = None):
         """初始化字体解码器。
@@ -24,34 +29,60 @@ class FontDecoder:
             html_content: 包含加密字体信息的HTML内容
         """
         self.html_content = html_content
-        self.__font_map: Optional[Dict] = None
+        # 解密转换表, 由 cxsecret_font.compile_table 生成
+        self.__table: Optional[Dict[int, str]] = None
 
         if html_content:
             self.__init_font_map(html_content)
 
+    @classmethod
+    def from_style(cls, style_text: str) -> "FontDecoder":
+        """从加密字体样式标签的文本创建解码器。
+
+        用于已经解析过页面的调用方, 避免为查找样式标签再次解析整个页面。
+
+        Args:
+            style_text: style#cxSecretStyle 标签的文本
+
+        Returns:
+            字体解码器, 字体无法解析时解码会抛出 FontDecodeError
+        """
+        decoder = cls()
+        decoder.__init_font_map_from_style(style_text)
+        return decoder
+
     def __init_font_map(self, html_content: str) -> None:
         """从HTML内容中提取字体信息并初始化字体映射。
 
         Args:
             html_content: 包含加密字体信息的HTML内容
         """
-        try:
-            soup = BeautifulSoup(html_content, "lxml")
-            style_tag = soup.find("style", id="cxSecretStyle")
+        soup = BeautifulSoup(html_content, "lxml")
+        style_tag = soup.find("style", id="cxSecretStyle")
+        self.__init_font_map_from_style(style_tag.text if style_tag else "")
+
+    def __init_font_map_from_style(self, style_text: str) -> None:
+        """从样式标签的文本中提取字体数据并初始化字体映射。
 
-            if not style_tag or not style_tag.text:
+        Args:
+            style_text: 加密字体样式标签的文本
+        """
+        try:
+            if not style_text:
                 raise FontDecodeError("未找到加密字体样式标签")
 
-            match = re.search(self.FONT_BASE64_PATTERN, style_tag.text)
+            match = re.search(self.FONT_BASE64_PATTERN, style_text)
             if not match:
                 raise FontDecodeError("无法从样式标签中提取字体数据")
 
-            font_base64 = match.group(1)
-            font_data_url = self.FONT_DATA_URL_PREFIX + font_base64
-            self.__font_map = cxfont.font2map(font_data_url)
+            try:
+                font_data = base64.b64decode(match.group(1))
+            except (binascii.Error, ValueError) as e:
+                raise FontDecodeError(f"无法解码Base64字体数据: {e}") from e
+            self.__table = FONT_CACHE.get_table(font_data)
         except Exception as e:
             logger.warning(f"初始化字体映射失败: {e}")
-            self.__font_map = None
+            self.__table = None
 
     def decode(self, target_str: str) -> str:
         """解码加密字符串。
@@ -65,10 +96,36 @@ class FontDecoder:
         Raises:
             ValueError: 当字体映射未初始化时抛出
         """
-        if not self.__font_map:
+        if self.__table is None:
             raise FontDecodeError("字体映射未初始化，无法解码")
 
-        return cxfont.decrypt(self.__font_map, target_str)
+        return target_str.translate(self.__table)
+
+    def decode_many(self, target_strs: List[str]) -> List[str]:
+        """批量解码加密字符串。
+
+        所有字符串以换行连接后只解码一次, 字符串本身包含换行时逐个解码。
+
+        Args:
+            target_strs: 需要解码的加密字符串列表
+
+        Returns:
+            与输入顺序一致的解码结果
+
+        Raises:
+            FontDecodeError: 当字体映射未初始化时抛出
+        """
+        if self.__table is None:
+            raise FontDecodeError("字体映射未初始化，无法解码")
+        if not target_strs:
+            return []
+
+        separator = self.BATCH_SEPARATOR
+        if ord(separator) in self.__table or any(
+            separator in target for target in target_strs
+        ):
+            return [target.translate(self.__table) for target in target_strs]
+        return separator.join(target_strs).translate(self.__table).split(separator)
 
     def set_html_content(self, html_content: str) -> None:
         """设置新的HTML内容并重新初始化字体映射。
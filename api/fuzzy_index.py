@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+近似题目索引模块
+
+对规范化后的题目标题按字符 n-gram 计算 MinHash 签名, 并用 LSH 分桶建立索引,
+在精确缓存未命中时查找 "相似度高于阈值的最接近题目";
+差异中含有否定词、正误词或数字的题目意思可能不同, 不会被视为近似题目。
+所有桶键保存在一个有序 NumPy 数组中, 查询只需一次 searchsorted;
+新增条目先写入待合并缓冲区, 累积到一定数量后再批量合并, 因此可以随缓存增量更新。
+"""
+import threading
+import zlib
+from difflib import SequenceMatcher
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 两道题只在这些字符上有差异时意思可能相反, 例如 正确/错误、是/不是、能/不能
+_POLARITY_CHARS = frozenset("正确错误对是否非不没无未能")
+_CHINESE_DIGITS = frozenset("零〇一二三四五六七八九十百千万两")
+
+
+def _conflicting(matcher: SequenceMatcher) -> bool:
+    """两段文本的差异中是否含有否定词、正误词或数字"""
+    a, b = matcher.a, matcher.b
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        for char in a[i1:i2] + b[j1:j2]:
+            if char in _POLARITY_CHARS or char in _CHINESE_DIGITS or char.isdigit():
+                return True
+    return False
+
+
+class FuzzyIndex:
+    """基于 MinHash LSH 的近似题目索引"""
+
+    NUM_PERM = 64  # MinHash 签名长度
+    BANDS = 16  # LSH 分段数, 每段 NUM_PERM // BANDS 行
+    NGRAM = 2  # 字符 n-gram 长度
+    MERGE_THRESHOLD = 1024  # 待合并条目达到该数量时合并进有序数组
+    MAX_CANDIDATES = 16  # 参与精确比对的最大候选数
+    SEED = 924
+
+    def __init__(self):
+        rows = self.NUM_PERM // self.BANDS
+        rng = np.random.default_rng(self.SEED)
+        self._a = rng.integers(1, 2**63, size=self.NUM_PERM, dtype=np.uint64) | 1
+        self._b = rng.integers(0, 2**63, size=self.NUM_PERM, dtype=np.uint64)
+        # 每个分段使用不同的乘数, 使不同分段的桶键互不冲突
+        self._band_mul = (
+            rng.integers(1, 2**63, size=(self.BANDS, rows), dtype=np.uint64) | 1
+        )
+
+        self._titles: List[Optional[str]] = []  # id -> 规范化标题, 失效条目为None
+        self._refs: List[Optional[Hashable]] = []  # id -> 外部引用
+        self._ids: Dict[Hashable, int] = {}  # 外部引用 -> id
+        self._sorted_keys = np.empty(0, dtype=np.uint64)
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_ids: List[int] = []
+        self._pending_keys: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        n = self.NGRAM
+        if len(text) <= n:
+            grams = {text}
+        else:
+            grams = {text[i : i + n] for i in range(len(text) - n + 1)}
+        return np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) for g in grams),
+            dtype=np.uint64,
+            count=len(grams),
+        )
+
+    def _band_keys(self, text: str) -> np.ndarray:
+        """计算文本的 MinHash 签名并折叠为每个分段一个桶键"""
+        x = self._shingles(text)
+        # multiply-shift 哈希族, uint64 乘法自然按 2^64 回绕
+        sig = ((self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)).min(
+            axis=1
+        )
+        return (sig.reshape(self.BANDS, -1) * self._band_mul).sum(
+            axis=1, dtype=np.uint64
+        )
+
+    def add(self, text: str, ref: Hashable) -> None:
+        """
+        新增或更新一个条目
+
+        Args:
+            text: 规范化后的题目标题
+            ref: 外部引用, 例如缓存主键
+        """
+        self.add_many([(text, ref)])
+
+    def add_many(self, items: Iterable[Tuple[str, Hashable]]) -> None:
+        """批量新增条目, 结束后按需合并"""
+        with self._lock:
+            for text, ref in items:
+                if not text:
+                    continue
+                old = self._ids.get(ref)
+                if old is not None:
+                    if self._titles[old] == text:
+                        continue
+                    self._titles[old] = None
+                    self._refs[old] = None
+                new_id = len(self._titles)
+                self._titles.append(text)
+                self._refs.append(ref)
+                self._ids[ref] = new_id
+
+                keys = self._band_keys(text)
+                for key in keys.tolist():
+                    self._pending.setdefault(key, []).append(new_id)
+                self._pending_ids.append(new_id)
+                self._pending_keys.append(keys)
+            if len(self._pending_ids) >= self.MERGE_THRESHOLD:
+                self._merge()
+
+    def _merge(self) -> None:
+        """将待合并缓冲区并入有序数组"""
+        if not self._pending_ids:
+            return
+        keys = np.concatenate([self._sorted_keys, *self._pending_keys])
+        ids = np.concatenate(
+            [
+                self._sorted_ids,
+                np.repeat(np.asarray(self._pending_ids, dtype=np.int64), self.BANDS),
+            ]
+        )
+        order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[order]
+        self._sorted_ids = ids[order]
+        self._pending.clear()
+        self._pending_ids.clear()
+        self._pending_keys.clear()
+
+    def query(self, text: str, threshold: float) -> Optional[Tuple[Hashable, float]]:
+        """
+        查找与文本最相似的条目
+
+        Args:
+            text: 规范化后的题目标题
+            threshold: 最低相似度 (0~1, 基于 SequenceMatcher.ratio)
+
+        Returns:
+            (外部引用, 相似度), 没有达到阈值的条目时返回None;
+            差异中含有否定词、正误词或数字的条目不会被返回
+        """
+        if not text:
+            return None
+        keys = self._band_keys(text)
+        with self._lock:
+            candidates = []
+            if self._sorted_keys.size:
+                left = np.searchsorted(self._sorted_keys, keys, side="left")
+                right = np.searchsorted(self._sorted_keys, keys, side="right")
+                for lo, hi in zip(left.tolist(), right.tolist()):
+                    if hi > lo:
+                        candidates.append(self._sorted_ids[lo:hi])
+            for key in keys.tolist():
+                ids = self._pending.get(key)
+                if ids:
+                    candidates.append(np.asarray(ids, dtype=np.int64))
+            if not candidates:
+                return None
+
+            # 按命中的分段数从多到少排序, 只精确比对最有希望的候选
+            ids, counts = np.unique(np.concatenate(candidates), return_counts=True)
+            ranked = ids[np.argsort(-counts, kind="stable")][: self.MAX_CANDIDATES]
+
+            best: Optional[Tuple[Hashable, float]] = None
+            for cid in ranked.tolist():
+                title = self._titles[cid]
+                if title is None:
+                    continue
+                matcher = SequenceMatcher(None, text, title, autojunk=False)
+                floor = best[1] if best else threshold
+                if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                    continue
+                score = matcher.ratio()
+                if score >= floor and not _conflicting(matcher):
+                    best = (self._refs[cid], score)
+            return best
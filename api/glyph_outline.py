@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+加密字体字形的轮廓近似匹配
+
+字形哈希对坐标的任何改动都敏感, 坐标被轻微改动过的字形因哈希不同而无法通过字体哈希表还原。
+轮廓索引保存已知字符字形的归一化轮廓: 轮廓点按外框缩放到单位正方形, 再沿周长重采样为
+固定数量的点; 查询时向量化计算与全部已知轮廓的均方根距离, 距离足够小且明显小于
+其他字符的距离时视为同一个字符。
+索引文件由 tools/build_glyph_index.py 从参考字体生成, 仓库中没有附带, 未生成时近似匹配不生效。
+只有出现哈希未知的字形时才以只读方式将索引映射到内存。
+"""
+import hashlib
+import mmap
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+
+from api.logger import logger
+
+OUTLINE_SAMPLES = 32  # 每个字形重采样的点数
+# 索引文件的记录格式, 以 numpy .npy 文件保存
+OUTLINE_DTYPE = np.dtype(
+    [("codepoint", "<u4"), ("outline", "<f4", (2 * OUTLINE_SAMPLES,))]
+)
+
+
+def outline_vector(
+    glyph: Glyph, samples: int = OUTLINE_SAMPLES
+) -> Optional[np.ndarray]:
+    """
+    计算字形的归一化轮廓
+
+    各轮廓按顺序首尾闭合后视为一条折线(轮廓之间不相连), 沿总长度等距取 samples 个点,
+    坐标按外框的较长边缩放到 [0, 1]。
+
+    Args:
+        glyph: TTF字体字形对象
+        samples: 重采样的点数
+
+    Returns:
+        依次为各点 x, y 的 float32 数组, 没有轮廓或轮廓长度为0时返回None
+    """
+    contours = glyph.numberOfContours
+    if contours <= 0:
+        return None
+    points = np.array([tuple(p) for p in glyph.coordinates], dtype=np.float64)
+    ends = list(glyph.endPtsOfContours[:contours])
+    if not len(points) or not ends:
+        return None
+
+    starts, stops = [], []
+    start = 0
+    for end in ends:
+        contour = points[start : end + 1]
+        start = end + 1
+        if len(contour):
+            starts.append(contour)
+            stops.append(np.roll(contour, -1, axis=0))
+    if not starts:
+        return None
+    seg_start = np.concatenate(starts)
+    seg_vector = np.concatenate(stops) - seg_start
+    lengths = np.hypot(seg_vector[:, 0], seg_vector[:, 1])
+    cumulative = np.cumsum(lengths)
+    total = cumulative[-1]
+    if total <= 0:
+        return None
+
+    # 取各段的中点位置, 结果不依赖轮廓起点处的浮点误差
+    positions = (np.arange(samples) + 0.5) * (total / samples)
+    index = np.minimum(
+        np.searchsorted(cumulative, positions, side="right"), len(lengths) - 1
+    )
+    offset = positions - (cumulative[index] - lengths[index])
+    ratio = np.divide(
+        offset, lengths[index], out=np.zeros(samples), where=lengths[index] > 0
+    )
+    sampled = seg_start[index] + seg_vector[index] * ratio[:, None]
+
+    low = points.min(axis=0)
+    scale = (points.max(axis=0) - low).max() or 1.0
+    return ((sampled - low) / scale).astype(np.float32).ravel()
+
+
+def build_outline_records(
+    codepoints: Sequence[int], glyphs: Sequence[Glyph]
+) -> np.ndarray:
+    """
+    生成轮廓索引记录, 没有轮廓的字形被跳过
+
+    Args:
+        codepoints: 每个字形对应的原始字符码位
+        glyphs: TTF字体字形对象
+
+    Returns:
+        OUTLINE_DTYPE 类型的记录数组
+    """
+    rows = []
+    for codepoint, glyph in zip(codepoints, glyphs):
+        outline = outline_vector(glyph)
+        if outline is not None:
+            rows.append((codepoint, outline))
+    return np.array(rows, dtype=OUTLINE_DTYPE)
+
+
+class GlyphOutlineIndex:
+    """
+    已知字符字形的轮廓索引
+
+    索引文件不存在或格式无效时索引为空, 所有查询都没有结果。
+    """
+
+    MAX_DISTANCE = 0.01  # 视为同一字形的最大均方根距离, 以外框边长为单位
+    MIN_RATIO = 2.0  # 其他字符的距离至少为最近距离的倍数, 否则视为无法区分
+    CANDIDATES = 8  # 每个字形比较的最近记录数, 同一字符可能有多条记录
+    QUERY_BATCH = 256  # 每批查询的字形数, 限制距离矩阵的大小
+
+    def __init__(
+        self,
+        path: Union[Path, str, None] = None,
+        max_distance: float = MAX_DISTANCE,
+    ):
+        """
+        初始化轮廓索引, 索引文件在首次查询时才加载
+
+        Args:
+            path: 索引文件路径(.npy), 为空时索引为空
+            max_distance: 视为同一字形的最大均方根距离
+        """
+        self.path = Path(path) if path else None
+        self.max_distance = max_distance
+        self._records: Optional[np.ndarray] = None
+        self._outlines: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_records(
+        cls, records: np.ndarray, max_distance: float = MAX_DISTANCE
+    ) -> "GlyphOutlineIndex":
+        """
+        由内存中的记录创建, 不读取文件
+
+        Args:
+            records: build_outline_records 生成的记录数组
+            max_distance: 视为同一字形的最大均方根距离
+        """
+        index = cls(max_distance=max_distance)
+        index._open(np.asarray(records, dtype=OUTLINE_DTYPE))
+        return index
+
+    def _open(self, records: np.ndarray) -> None:
+        self._outlines = records["outline"]
+        # 距离按 |q|² + |o|² - 2q·o 计算, 预先求出已知轮廓的平方和
+        self._norms = np.einsum("ij,ij->i", self._outlines, self._outlines)
+        self._records = records
+
+    def _load(self) -> None:
+        """首次查询时映射索引文件"""
+        with self._lock:
+            if self._records is not None:
+                return
+            records = np.zeros(0, dtype=OUTLINE_DTYPE)
+            if self.path is not None:
+                try:
+                    loaded = np.load(self.path, mmap_mode="r", allow_pickle=False)
+                    if loaded.dtype != OUTLINE_DTYPE or loaded.ndim != 1:
+                        raise ValueError(f"记录格式无效: {loaded.dtype}")
+                    records = loaded
+                except (OSError, ValueError) as e:
+                    logger.info(
+                        "字形轮廓索引不可用, 跳过近似匹配"
+                        f"(可用 tools/build_glyph_index.py 生成): {e}"
+                    )
+            self._open(records)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        索引内容的摘要, 用于区分由不同索引得到的解密结果
+
+        直接对映射到内存的索引文件求摘要, 不加载索引; 索引为空或文件不存在时为空字符串
+        """
+        if self._fingerprint is None:
+            if self.path is None:
+                records = self._records
+                self._fingerprint = (
+                    hashlib.sha1(np.ascontiguousarray(records).tobytes()).hexdigest()
+                    if records is not None and len(records)
+                    else ""
+                )
+            else:
+                self._fingerprint = self._file_digest(self.path)
+        return self._fingerprint
+
+    @staticmethod
+    def _file_digest(path: Path) -> str:
+        """文件内容的摘要, 文件不存在或为空时为空字符串"""
+        try:
+            with (
+                path.open("rb") as fp,
+                mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data,
+            ):
+                return hashlib.sha1(data).hexdigest()
+        except (OSError, ValueError):
+            return ""
+
+    def __len__(self) -> int:
+        if self._records is None:
+            self._load()
+        return len(self._records)
+
+    def match(self, glyphs: Sequence[Glyph]) -> List[Optional[Tuple[int, float]]]:
+        """
+        查找与字形轮廓最接近的已知字符
+
+        Args:
+            glyphs: TTF字体字形对象
+
+        Returns:
+            与输入顺序一致的 (原始字符码位, 置信度), 置信度为 1 - 距离/最大距离;
+            索引为空、字形没有轮廓、距离超过 max_distance 或与其他字符无法区分时为None
+        """
+        results: List[Optional[Tuple[int, float]]] = [None] * len(glyphs)
+        if not glyphs or not len(self):
+            return results
+        queries, positions = [], []
+        for i, glyph in enumerate(glyphs):
+            outline = outline_vector(glyph)
+            if outline is not None:
+                queries.append(outline)
+                positions.append(i)
+
+        codepoints = self._records["codepoint"]
+        for start in range(0, len(queries), self.QUERY_BATCH):
+            batch = np.stack(queries[start : start + self.QUERY_BATCH])
+            squared = (
+                np.einsum("ij,ij->i", batch, batch)[:, None]
+                + self._norms[None, :]
+                - 2 * (batch @ self._outlines.T)
+            )
+            count = min(self.CANDIDATES, squared.shape[1])
+            nearest = np.argpartition(squared, count - 1, axis=1)[:, :count]
+            distances = np.sqrt(
+                np.maximum(np.take_along_axis(squared, nearest, axis=1), 0)
+                / OUTLINE_SAMPLES
+            )
+            order = np.argsort(distances, axis=1)
+            for offset in range(len(batch)):
+                records = nearest[offset][order[offset]]
+                ranked = distances[offset][order[offset]]
+                results[positions[start + offset]] = self._pick(
+                    codepoints[records].tolist(), ranked.tolist()
+                )
+        return results
+
+    def _pick(
+        self, codepoints: List[int], distances: List[float]
+    ) -> Optional[Tuple[int, float]]:
+        """在按距离排序的候选记录中选出结果"""
+        best, distance = codepoints[0], distances[0]
+        if distance > self.max_distance:
+            return None
+        for codepoint, other in zip(codepoints[1:], distances[1:]):
+            if codepoint != best:
+                if other < distance * self.MIN_RATIO:
+                    return None
+                break
+        return best, 1.0 - distance / self.max_distance
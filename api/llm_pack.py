@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+大模型多题打包模块
+
+将多道题目打包进一次对话补全请求, 要求模型按题号输出严格的 JSON 数组,
+再按题号解析结果, 只有解析失败的题目才会逐题重新查询。
+打包大小和提示词的 token 预算由各题库分别配置。
+"""
+import json
+import re
+from typing import Callable, Dict, List, Optional
+
+from api.logger import logger
+from api.question_normalizer import strip_option_labels
+
+# Markdown 代码块包装
+_MD_JSON_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+# 中日韩文字与全角符号, 粗略按每字一个 token 估算
+_WIDE_CHAR_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+TYPE_NAMES = {
+    "single": "单选题",
+    "multiple": "多选题",
+    "completion": "填空题",
+    "judgement": "判断题",
+}
+
+PACKED_SYSTEM_PROMPT = (
+    "下面给出多道题目，每道题目以【题号】开头并注明题型，请逐题作答。"
+    "单选题只能选择一个选项，多选题必须选择两个或以上选项，选择题输出选项的具体内容，而不是内容前的ABCD；"
+    "判断题只能回答正确或者错误；填空题按空的顺序给出每个空的答案；其他题型直接给出答案。"
+    "以json数组格式输出，每道题目对应数组中的一个元素，示例回答："
+    '[{"id": 1, "answer": ["答案"]}, {"id": 2, "answer": ["答案1", "答案2"]}]。'
+    "必须包含所有题号，除此之外不要输出任何多余的内容，也不要使用MD语法。"
+    "如果你使用了互联网搜索，也请不要返回搜索的结果和参考资料"
+)
+
+
+def remove_md_json_wrapper(md_str: str) -> str:
+    """去除模型输出中可能存在的 Markdown 代码块包装"""
+    match = _MD_JSON_RE.search(md_str)
+    return match.group(1).strip() if match else md_str.strip()
+
+
+def format_options(options) -> str:
+    """
+    去除选项字母, 防止大模型直接输出字母而非内容
+
+    Args:
+        options: 以换行分隔的选项字符串或选项列表
+
+    Returns:
+        以换行分隔的选项内容
+    """
+    if not options:
+        return ""
+    lines = options if isinstance(options, list) else options.split("\n")
+    return "\n".join(strip_option_labels(lines))
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数: 宽字符每字 1 个, 其余每 4 个字符 1 个"""
+    wide = len(_WIDE_CHAR_RE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def format_question(qid: int, q_info: dict) -> str:
+    """将单道题目格式化为打包提示词中的一段"""
+    type_name = TYPE_NAMES.get(q_info["type"], "简答题")
+    text = f"【{qid}】（{type_name}）{q_info['title']}"
+    if q_info["type"] in ("single", "multiple"):
+        options = format_options(q_info.get("options"))
+        if options:
+            text += f"\n选项：\n{options}"
+    return text
+
+
+def build_packed_prompt(q_infos: List[dict]) -> str:
+    """构造打包请求的用户内容, 题号从 1 开始"""
+    return "\n\n".join(
+        format_question(qid, q_info) for qid, q_info in enumerate(q_infos, 1)
+    )
+
+
+def split_packs(
+    q_infos: List[dict], pack_size: int, token_budget: int = 0
+) -> List[List[int]]:
+    """
+    将题目划分为若干个包
+
+    Args:
+        q_infos: 题目信息列表
+        pack_size: 每个包最多包含的题目数
+        token_budget: 每次请求提示词的 token 预算, 0 表示不限制
+
+    Returns:
+        每个包中题目的下标列表; 单道题目超出预算时仍独立成包
+    """
+    base = estimate_tokens(PACKED_SYSTEM_PROMPT)
+    packs: List[List[int]] = []
+    current: List[int] = []
+    used = base
+    for i, q_info in enumerate(q_infos):
+        cost = estimate_tokens(format_question(len(current) + 1, q_info))
+        if current and (
+            len(current) >= pack_size
+            or (token_budget > 0 and used + cost > token_budget)
+        ):
+            packs.append(current)
+            current, used = [], base
+        current.append(i)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def parse_packed_answers(content: str, count: int) -> Dict[int, str]:
+    """
+    按题号解析模型输出
+
+    Args:
+        content: 模型输出文本
+        count: 本次打包的题目数
+
+    Returns:
+        {题号: 以换行连接的答案}, 无法解析的题目不包含在结果中
+    """
+    try:
+        data = json.loads(remove_md_json_wrapper(content))
+    except (TypeError, ValueError):
+        return {}
+    if isinstance(data, dict):
+        # 兼容模型将数组包装在对象中的情况
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+    if not isinstance(data, list):
+        return {}
+
+    answers: Dict[int, str] = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        try:
+            qid = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        answer = item.get("answer")
+        if isinstance(answer, (str, int, float)):
+            answer = [answer]
+        if not isinstance(answer, list) or not 1 <= qid <= count:
+            continue
+        text = "\n".join(str(a).strip() for a in answer if str(a).strip())
+        if text:
+            answers[qid] = text
+    return answers
+
+
+def query_packed(
+    q_infos: List[dict],
+    complete: Callable[[str, str], Optional[str]],
+    fallback: Callable[[dict], Optional[str]],
+    pack_size: int,
+    token_budget: int = 0,
+) -> List[Optional[str]]:
+    """
+    打包查询多道题目
+
+    Args:
+        q_infos: 题目信息列表
+        complete: 发送一次对话补全的函数, 参数为 (系统提示词, 用户内容),
+            请求失败时返回None, 并由其自行记录请求错误
+        fallback: 单题查询函数, 用于单独成包的题目及响应中未能解析的题目
+        pack_size: 每个包最多包含的题目数
+        token_budget: 每次请求提示词的 token 预算, 0 表示不限制
+
+    Returns:
+        与输入顺序一致的答案列表, 未找到答案的位置为None;
+        整包请求失败时不再逐题查询同一个接口, 该包的题目均为None
+    """
+    results: List[Optional[str]] = [None] * len(q_infos)
+    retry: List[int] = []
+    for pack in split_packs(q_infos, pack_size, token_budget):
+        if len(pack) == 1:
+            retry.extend(pack)
+            continue
+        content = complete(
+            PACKED_SYSTEM_PROMPT, build_packed_prompt([q_infos[i] for i in pack])
+        )
+        if content is None:
+            logger.warning(f"打包查询{len(pack)}道题目的请求失败, 本次不再逐题查询")
+            continue
+        answers = parse_packed_answers(content, len(pack))
+        failed = [i for qid, i in enumerate(pack, 1) if qid not in answers]
+        for qid, i in enumerate(pack, 1):
+            results[i] = answers.get(qid)
+        if failed:
+            logger.warning(
+                f"打包查询的{len(pack)}道题目中有{len(failed)}道未能解析, 将逐题重新查询"
+            )
+        else:
+            logger.debug(f"打包查询{len(pack)}道题目成功")
+        retry.extend(failed)
+
+    for i in sorted(retry):
+        results[i] = fallback(q_infos[i])
+    return results
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+答案与选项匹配模块
+
+将题库返回的答案映射为选择题的选项字母。选项只解析一次, 答案用一个预编译的
+分隔符正则切分; 所有 (答案片段, 选项) 组合的相似度在一次 NumPy 运算中得到:
+以字符与相邻字符对 (bigram) 的多重集交集计算 Dice 系数与答案特征的覆盖率,
+每个答案片段取得分最高的选项。
+"""
+import re
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from api.question_normalizer import normalize_text, strip_option_label
+
+MATCH_THRESHOLD = 0.6  # Dice 系数不低于该值视为匹配
+# 多选题答案在同一行时使用的分隔符, 对应旧实现 cut_char 中除换行与空格外的字符
+_SPLIT_RE = re.compile(r"[\r\t,，|#*\-_+@~/\\.&、;；]+")
+# 答案前的选项字母, 必须带分隔符, 避免误删英文答案的首字母
+_ANSWER_LABEL_RE = re.compile(r"^\s*[A-Za-z]\s*[\.、．:：]\s*")
+# 仅由选项字母组成的答案, 例如 "ABD" "A,C"
+_LETTERS_RE = re.compile(r"^[A-Za-z\s,，、|#/&;；]+$")
+# 匹配时忽略的标点
+_IGNORED_PUNCT = str.maketrans("", "", ".,!?;:")
+
+
+def split_lines(text: str) -> Optional[List[str]]:
+    """
+    按换行切分答案或选项, 去除空行
+
+    Args:
+        text: 以换行分隔的字符串
+
+    Returns:
+        非空行列表, 全部为空时返回None
+    """
+    lines = [line for line in text.split("\n") if line.strip()]
+    return lines or None
+
+
+def _normalize(text: str) -> str:
+    return normalize_text(text).translate(_IGNORED_PUNCT)
+
+
+def parse_options(options: Union[str, Sequence[str]]) -> List[Tuple[str, str]]:
+    """
+    解析选项
+
+    Args:
+        options: 以换行分隔的选项字符串或选项列表, 每项以选项字母开头
+
+    Returns:
+        [(选项字母, 规范化后的选项内容)]
+    """
+    if not options:
+        return []
+    lines = options.split("\n") if isinstance(options, str) else options
+    parsed = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            label = line[:1]
+            parsed.append((label, _normalize(strip_option_label(line, label))))
+    return parsed
+
+
+def _features(text: str) -> List[str]:
+    """单字与相邻字符对, 后者使得分对字符顺序敏感"""
+    return list(text) + [text[i : i + 2] for i in range(len(text) - 1)]
+
+
+def similarity(
+    answers: Sequence[str], contents: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算所有 (答案片段, 选项内容) 组合的相似度
+
+    Args:
+        answers: 规范化后的答案片段
+        contents: 规范化后的选项内容
+
+    Returns:
+        (Dice 系数矩阵, 答案特征覆盖率矩阵), 形状均为 (答案数, 选项数)
+    """
+    vocab = {}
+    indices = []
+    for texts in (answers, contents):
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            for feature in _features(text):
+                rows.append(i)
+                cols.append(vocab.setdefault(feature, len(vocab)))
+        indices.append((rows, cols))
+
+    counts = []
+    for texts, (rows, cols) in zip((answers, contents), indices):
+        matrix = np.zeros((len(texts), max(1, len(vocab))), dtype=np.int32)
+        np.add.at(matrix, (rows, cols), 1)
+        counts.append(matrix)
+    a, o = counts
+
+    inter = np.minimum(a[:, None, :], o[None, :, :]).sum(axis=2)
+    len_a = a.sum(axis=1)[:, None]
+    total = len_a + o.sum(axis=1)[None, :]
+    dice = np.divide(2 * inter, total, out=np.zeros(inter.shape), where=total > 0)
+    recall = np.divide(inter, len_a, out=np.zeros(inter.shape), where=len_a > 0)
+    return dice, recall
+
+
+def _segmentations(answer: str, q_type: str) -> List[List[str]]:
+    """候选的答案切分方式, 优先按换行, 多选题只有一行时再按其他分隔符切分"""
+    lines = split_lines(answer) or []
+    segmentations = [lines]
+    if q_type == "multiple" and len(lines) == 1:
+        parts = [p for p in _SPLIT_RE.split(lines[0]) if p.strip()]
+        if len(parts) > 1:
+            segmentations.append(parts)
+    return segmentations
+
+
+def _match_letters(answer: str, letters: List[str], q_type: str) -> str:
+    """答案直接给出选项字母时的匹配"""
+    answer = answer.strip()
+    if not _LETTERS_RE.match(answer):
+        return ""
+    chosen = {ch.upper() for ch in answer if ch.isalpha()}
+    available = {letter.upper(): letter for letter in letters}
+    if not chosen or not chosen <= set(available):
+        return ""
+    if q_type == "single" and len(chosen) != 1:
+        return ""
+    return "".join(sorted(available[ch] for ch in chosen))
+
+
+def match_options(
+    answer: str,
+    options: Union[str, Sequence[str]],
+    q_type: str = "single",
+    threshold: float = MATCH_THRESHOLD,
+) -> str:
+    """
+    将答案映射为选项字母
+
+    Args:
+        answer: 题库返回的答案, 多个答案以换行分隔
+        options: 以换行分隔的选项字符串或选项列表, 每项以选项字母开头
+        q_type: single 或 multiple
+        threshold: 判定匹配的最低 Dice 系数; 答案的单字与字符对全部出现在选项中时也视为匹配
+
+    Returns:
+        排序后的选项字母, 单选题最多一个, 无法匹配时返回空字符串
+    """
+    parsed = parse_options(options)
+    if not answer or not parsed:
+        return ""
+    letters = [letter for letter, _ in parsed]
+
+    segmentations = _segmentations(answer, q_type)
+    tokens = [
+        _normalize(_ANSWER_LABEL_RE.sub("", part, count=1))
+        for segmentation in segmentations
+        for part in segmentation
+    ]
+    if not tokens:
+        return ""
+    dice, recall = similarity(tokens, [content for _, content in parsed])
+    accepted = (dice >= threshold) | (recall >= 1.0)
+    scores = np.where(accepted, dice, -1.0)
+
+    if q_type == "single":
+        # 所有切分方式中得分最高的一个选项
+        row, col = np.unravel_index(np.argmax(scores), scores.shape)
+        if scores[row, col] >= 0:
+            return letters[col]
+        return _match_letters(answer, letters, q_type)
+
+    best = ""
+    start = 0
+    for segmentation in segmentations:
+        block = scores[start : start + len(segmentation)]
+        start += len(segmentation)
+        cols = block.argmax(axis=1)[block.max(axis=1) >= 0]
+        chosen = "".join(sorted({letters[col] for col in cols}))
+        # 匹配到更多选项的切分方式优先, 相同时保留换行切分的结果
+        if len(chosen) > len(best):
+            best = chosen
+    return best or _match_letters(answer, letters, q_type)
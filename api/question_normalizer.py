@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+题目标准化模块
+
+将题目标题规整为稳定的规范形式, 作为答案缓存的键使用。
+仅在全角/半角标点、空白、图片链接参数、题号、题型前缀或分值上存在差异的标题
+会得到相同的键, 从而提升缓存命中率、减少题库请求。
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+# 行首题号, 例如 "1." "12、" "3 "
+_LEADING_NUMBER_RE = re.compile(r"^\s*\d+\s*[\.、．:：]?\s*")
+# 题型前缀, 例如 "【单选题】" "(多选题)" "[判断题]"
+_TYPE_PREFIX_RE = re.compile(
+    r"^\s*[【\[\(（]\s*(?:单选题|多选题|判断题|填空题|简答题|名词解释|论述题|计算题|其它|其他)\s*[】\]\)）]\s*"
+)
+# 末尾分值, 例如 "（2.0分）" "(5分)"
+_TRAILING_SCORE_RE = re.compile(r"\s*[\(（]\s*\d+(?:\.\d+)?\s*分\s*[\)）]\s*$")
+# 图片标签, 仅保留文件名, 忽略域名与签名参数
+_IMG_RE = re.compile(r"""<img[^>]*?src\s*=\s*["']?([^"'\s>]+)["']?[^>]*>""", re.I)
+# 其余HTML标签 (不包括已替换的图片占位符)
+_TAG_RE = re.compile(r"<(?!img:)[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+# 连续的下划线填空线
+_BLANK_LINE_RE = re.compile(r"_{2,}")
+# 选项字母标签, 例如 "A." "B、" "C 北京"; 字母后必须有分隔符或空白,
+# 空白后紧跟字母时视为英文选项本身 (例如 "I am"), 不去除
+_OPTION_LABEL_RE = re.compile(r"^\s*[A-Za-z](?:\s*[\.、．:：]|\s+(?![A-Za-z]))\s*")
+# 已知选项字母之后的分隔符, 可以没有 (例如 "A北京")
+_LABEL_SEPARATOR_RE = re.compile(r"^\s*[\.、．:：]?\s*")
+# 规范键末尾可忽略的标点
+_TRAILING_PUNCT = ".。?？!！;；:：,，"
+
+# NFKC 之后仍需统一的标点
+_PUNCT_TABLE = str.maketrans(
+    {
+        "。": ".",
+        "、": ",",
+        "“": '"',
+        "”": '"',
+        "‘": "'",
+        "’": "'",
+        "【": "[",
+        "】": "]",
+        "〔": "(",
+        "〕": ")",
+        "—": "-",
+        "－": "-",
+        "…": "...",
+    }
+)
+
+
+def _img_placeholder(match: "re.Match[str]") -> str:
+    src = match.group(1).split("?", 1)[0].split("#", 1)[0]
+    return f"<img:{src.rsplit('/', 1)[-1]}>"
+
+
+def clean_title(title: str) -> str:
+    """
+    去除题号、题型前缀与分值, 并合并空白, 得到用于展示和题库查询的标题
+
+    Args:
+        title: 原始题目标题
+
+    Returns:
+        清理后的标题
+    """
+    if not title:
+        return ""
+    title = _LEADING_NUMBER_RE.sub("", title, count=1)
+    title = _TYPE_PREFIX_RE.sub("", title, count=1)
+    title = _TRAILING_SCORE_RE.sub("", title, count=1)
+    return _WHITESPACE_RE.sub(" ", title).strip()
+
+
+def normalize_title(title: str) -> str:
+    """
+    计算题目的规范形式
+
+    Args:
+        title: 原始题目标题
+
+    Returns:
+        规范化后的标题, 可直接作为缓存键
+    """
+    title = clean_title(title)
+    if not title:
+        return ""
+    title = _IMG_RE.sub(_img_placeholder, title)
+    title = _TAG_RE.sub("", title)
+    title = unicodedata.normalize("NFKC", title).translate(_PUNCT_TABLE)
+    title = _WHITESPACE_RE.sub("", title)
+    title = _BLANK_LINE_RE.sub("_", title)
+    return title.rstrip(_TRAILING_PUNCT).lower()
+
+
+def normalize_text(text: str) -> str:
+    """
+    对选项、答案等短文本做宽松规范化: 统一全角/半角与标点, 去除空白并转为小写
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        规范化后的文本
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).translate(_PUNCT_TABLE)
+    return _WHITESPACE_RE.sub("", text).rstrip(_TRAILING_PUNCT).lower()
+
+
+def question_hash(normalized: str) -> str:
+    """
+    计算规范化标题的哈希值
+
+    Args:
+        normalized: normalize_title 的结果
+
+    Returns:
+        32位十六进制MD5
+    """
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
+
+
+def question_key(title: str) -> Tuple[str, str]:
+    """
+    计算题目的缓存键
+
+    Args:
+        title: 原始题目标题
+
+    Returns:
+        (规范化标题, 哈希值)
+    """
+    normalized = normalize_title(title)
+    return normalized, question_hash(normalized)
+
+
+def strip_option_label(option: str, label: Optional[str] = None) -> str:
+    """
+    去除选项前的字母标签, 例如 "A. 选项" -> "选项"
+
+    已知选项字母时 (例如来自 aria-label 的选项列表), 选项以该字母开头即去除,
+    字母后没有分隔符也一样 ("A北京" -> "北京"); 否则字母后必须有分隔符或空白,
+    以免截断以字母开头的英文选项
+
+    Args:
+        option: 单个选项文本
+        label: 已知的选项字母
+
+    Returns:
+        去除标签后的选项文本
+    """
+    if label and label.isascii() and label.isalpha():
+        stripped = option.lstrip()
+        if stripped[:1].upper() == label.upper():
+            return _LABEL_SEPARATOR_RE.sub("", stripped[1:], count=1)
+    return _OPTION_LABEL_RE.sub("", option, count=1)
+
+
+def strip_option_labels(options: Iterable[str]) -> List[str]:
+    """
+    去除按 A、B、C... 顺序排列的选项列表的字母标签
+
+    Args:
+        options: 选项列表, 第 i 项的标签应为第 i 个字母
+
+    Returns:
+        去除标签后的选项列表
+    """
+    return [
+        strip_option_label(option, chr(ord("A") + i))
+        for i, option in enumerate(options)
+    ]
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+题库请求限流模块
+
+以 "题库:token" 为键的令牌桶, 桶状态保存在 SQLite 文件中,
+同一台机器上的多个线程与进程(例如 Celery 的多个 worker)共享同一份配额。
+获取令牌时允许令牌数为负, 相当于预约后续的令牌, 等待在事务之外进行,
+因此并发的调用者会被均匀地错开, 而不是同时醒来再次争抢。
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from api.logger import logger
+
+
+class TokenBucketLimiter:
+    """线程与进程共享的令牌桶限流器"""
+
+    DEFAULT_FILE = "rate_limit.db"
+
+    _instances: Dict[str, "TokenBucketLimiter"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, file: Optional[str] = DEFAULT_FILE):
+        """
+        Args:
+            file: 桶状态文件路径, 为空时仅在进程内限流
+        """
+        self.file = Path(file) if file else None
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Tuple[float, float]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.file is not None:
+            try:
+                self._conn = self._connect()
+            except sqlite3.Error as e:
+                logger.warning(f"限流状态文件不可用, 改为进程内限流: {e}")
+
+    @classmethod
+    def get_instance(cls, file: Optional[str] = DEFAULT_FILE) -> "TokenBucketLimiter":
+        """获取指定状态文件的共享实例"""
+        key = str(Path(file).resolve()) if file else ""
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls(file)
+                cls._instances[key] = instance
+            return instance
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.file.parent and not self.file.parent.exists():
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.file), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_bucket ("
+            "key TEXT PRIMARY KEY, "
+            "tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        return conn
+
+    @staticmethod
+    def _take(
+        tokens: float,
+        updated_at: float,
+        now: float,
+        rate: float,
+        capacity: float,
+        block: bool,
+    ) -> Tuple[float, Optional[float]]:
+        """
+        补充令牌后取出一个
+
+        Returns:
+            (剩余令牌数, 需要等待的秒数), 不阻塞且没有令牌时等待秒数为None
+        """
+        tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        if not block:
+            return tokens, None
+        return tokens - 1, (1 - tokens) / rate
+
+    def _reserve(
+        self, key: str, rate: float, capacity: float, block: bool
+    ) -> Optional[float]:
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    row = self._conn.execute(
+                        "SELECT tokens, updated_at FROM token_bucket WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                    tokens, updated_at = row if row else (capacity, now)
+                    tokens, wait = self._take(
+                        tokens, updated_at, now, rate, capacity, block
+                    )
+                    if wait is not None:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO token_bucket "
+                            "(key, tokens, updated_at) VALUES (?, ?, ?)",
+                            (key, tokens, now),
+                        )
+                    self._conn.execute("COMMIT")
+                    return wait
+                except sqlite3.Error as e:
+                    try:
+                        self._conn.execute("ROLLBACK")
+                    except sqlite3.Error:
+                        pass
+                    logger.warning(f"限流状态文件读写失败, 改为进程内限流: {e}")
+                    self._conn.close()
+                    self._conn = None
+
+            tokens, updated_at = self._memory.get(key, (capacity, now))
+            tokens, wait = self._take(tokens, updated_at, now, rate, capacity, block)
+            if wait is not None:
+                self._memory[key] = (tokens, now)
+            return wait
+
+    def acquire(self, key: str, rate: float, capacity: float = 1) -> float:
+        """
+        获取一个令牌, 没有可用令牌时阻塞等待
+
+        Args:
+            key: 桶的键, 通常为 "题库:token摘要"
+            rate: 每秒补充的令牌数, 不大于0时不限流
+            capacity: 桶容量, 即允许的突发请求数
+
+        Returns:
+            实际等待的秒数
+        """
+        if rate <= 0:
+            return 0.0
+        wait = self._reserve(key, rate, max(1.0, capacity), block=True)
+        if wait:
+            time.sleep(wait)
+        return wait or 0.0
+
+    def try_acquire(self, key: str, rate: float, capacity: float = 1) -> bool:
+        """
+        尝试获取一个令牌, 不等待
+
+        Returns:
+            是否获取成功
+        """
+        if rate <= 0:
+            return True
+        return self._reserve(key, rate, max(1.0, capacity), block=False) is not None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
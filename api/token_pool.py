@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+题库 token 配额池
+
+记录每个 token 的剩余查询次数, 每次查询选用剩余次数最多的 token,
+次数用完时自动切换到下一个。余额由后台线程定期通过题库的余额接口刷新,
+而不是在查询过程中同步刷新; 状态以 token 摘要为键保存在 JSON 文件中,
+下次运行时继续沿用其中的正余额。次数用完的 token 可能已被充值, 因此不会从文件中
+恢复为已用完, 运行期间也会在 EXHAUSTED_RETRY 秒后重新尝试。
+多个进程(例如 Celery 的多个 worker)共用同一个状态文件, 保存时在 SQLite 锁文件的
+写事务内读取、合并再写回, 每个 token 保留更新时间较新的一条记录。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from api.logger import logger
+
+
+class TokenPool:
+    """多 token 配额池"""
+
+    DEFAULT_FILE = "token_pool.json"
+    STATE_TTL = 24 * 3600  # 超过该时间的历史状态不再采用, 单位秒
+    UNKNOWN_BALANCE = 1  # 余额未知的 token 按该值参与排序
+    EXHAUSTED_RETRY = 600  # 次数用完的 token 在该时间后重新尝试, 单位秒
+
+    def __init__(
+        self,
+        name: str,
+        tokens: List[str],
+        state_file: Optional[str] = DEFAULT_FILE,
+        refresh: Optional[Callable[[str], Optional[int]]] = None,
+        refresh_interval: float = 60,
+    ):
+        """
+        Args:
+            name: 题库名称, 同时作为状态文件中的分区名
+            tokens: token 列表, 顺序决定余额相同时的优先级
+            state_file: 状态文件路径, 为空时不持久化
+            refresh: 查询单个 token 余额的函数, 返回None表示本次未能获取
+            refresh_interval: 后台刷新余额与保存状态的间隔, 单位秒
+        """
+        self.name = name
+        self.tokens = list(dict.fromkeys(t.strip() for t in tokens if t.strip()))
+        if not self.tokens:
+            raise ValueError(f"{name}未配置TOKEN")
+        self.state_file = Path(state_file) if state_file else None
+        self.refresh_interval = refresh_interval
+        self._refresh = refresh
+        self._balances: Dict[str, Optional[int]] = {t: None for t in self.tokens}
+        self._exhausted: Dict[str, bool] = {t: False for t in self.tokens}
+        self._updated_at: Dict[str, float] = {t: 0.0 for t in self.tokens}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """token 摘要, 状态文件与日志中不出现明文 token"""
+        return hashlib.sha1(token.encode("utf-8")).hexdigest()[:16]
+
+    def _load(self) -> None:
+        if self.state_file is None or not self.state_file.is_file():
+            return
+        try:
+            with self.state_file.open("r", encoding="utf8") as fp:
+                state = json.load(fp).get(self.name, {})
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"TOKEN状态文件读取失败, 已忽略: {e}")
+            return
+        now = time.time()
+        for token in self.tokens:
+            item = state.get(self.digest(token))
+            if not isinstance(item, dict):
+                continue
+            updated_at = float(item.get("updated_at", 0))
+            if now - updated_at > self.STATE_TTL:
+                continue
+            # 只沿用正余额, 用完的 token 可能已被充值, 由查询结果或余额刷新重新确认
+            balance = item.get("balance")
+            if isinstance(balance, int) and balance > 0:
+                self._balances[token] = balance
+                self._updated_at[token] = updated_at
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        跨进程的状态文件锁, 借助 SQLite 的写事务实现, 进程退出时由系统释放
+
+        锁文件不可用时记录警告后不加锁继续
+        """
+        lock_file = self.state_file.with_name(f"{self.state_file.name}.lock")
+        conn = None
+        try:
+            conn = sqlite3.connect(str(lock_file), timeout=30, isolation_level=None)
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            logger.warning(f"TOKEN状态文件加锁失败, 本次不加锁保存: {e}")
+        try:
+            yield
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def save(self) -> None:
+        """
+        将状态合并写入文件, 先写临时文件再原子替换
+
+        文件中由其他进程写入的记录比本进程的更新时保留文件中的记录
+        """
+        if self.state_file is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            section = {
+                self.digest(t): {
+                    "balance": self._balances[t],
+                    "exhausted": self._exhausted[t],
+                    "updated_at": self._updated_at[t],
+                }
+                for t in self.tokens
+            }
+            self._dirty = False
+        try:
+            with self._file_lock():
+                state = {}
+                if self.state_file.is_file():
+                    with self.state_file.open("r", encoding="utf8") as fp:
+                        state = json.load(fp)
+                merged = state.get(self.name)
+                merged = dict(merged) if isinstance(merged, dict) else {}
+                for digest, item in section.items():
+                    old = merged.get(digest)
+                    if (
+                        isinstance(old, dict)
+                        and float(old.get("updated_at", 0)) > item["updated_at"]
+                    ):
+                        continue
+                    merged[digest] = item
+                state[self.name] = merged
+                tmp = self.state_file.with_name(
+                    f"{self.state_file.name}.{os.getpid()}.tmp"
+                )
+                with tmp.open("w", encoding="utf8") as fp:
+                    json.dump(state, fp, ensure_ascii=False, indent=2)
+                tmp.replace(self.state_file)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"TOKEN状态文件保存失败: {e}")
+
+    def acquire(self) -> str:
+        """
+        选取剩余次数最多的可用 token, 次数用完超过 EXHAUSTED_RETRY 秒的 token
+        按余额排在最后, 重新参与选用
+
+        Raises:
+            PermissionError: 所有 token 的次数均已用完
+        """
+        with self._lock:
+            retry_before = time.time() - self.EXHAUSTED_RETRY
+            candidates = [
+                t
+                for t in self.tokens
+                if not self._exhausted[t] or self._updated_at[t] <= retry_before
+            ]
+            if not candidates:
+                logger.error("TOKEN用完, 请自行更换再重启脚本")
+                raise PermissionError(f"{self.name} TOKEN 已用完, 请更换")
+            return max(
+                candidates,
+                key=lambda t: (
+                    self._balances[t]
+                    if self._balances[t] is not None
+                    else self.UNKNOWN_BALANCE
+                ),
+            )
+
+    def update(self, token: str, balance: Optional[int] = None, used: int = 0) -> None:
+        """
+        记录 token 的余额
+
+        Args:
+            token: token
+            balance: 题库返回的最新余额, 为None时按本地消耗扣减
+            used: 本地消耗的次数
+        """
+        with self._lock:
+            if token not in self._balances:
+                return
+            if balance is None and self._balances[token] is not None:
+                balance = self._balances[token] - used
+            if balance is None:
+                return
+            balance = int(balance)
+            self._balances[token] = balance
+            exhausted = balance <= 0
+            if exhausted and not self._exhausted[token]:
+                logger.info(f"{self.name} TOKEN({self.digest(token)[:6]})次数已用完")
+            self._exhausted[token] = exhausted
+            self._updated_at[token] = time.time()
+            self._dirty = True
+
+    def mark_exhausted(self, token: str) -> None:
+        """题库提示次数不足时调用, 此后不再选用该 token"""
+        self.update(token, balance=0)
+
+    def balances(self) -> Dict[str, Optional[int]]:
+        """以 token 摘要为键的余额快照"""
+        with self._lock:
+            return {self.digest(t)[:6]: self._balances[t] for t in self.tokens}
+
+    def refresh_all(self) -> None:
+        """通过余额接口刷新所有 token"""
+        if self._refresh is None:
+            return
+        for token in self.tokens:
+            try:
+                balance = self._refresh(token)
+            except Exception as e:
+                logger.warning(f"{self.name}余额刷新失败: {e}")
+                continue
+            if balance is not None:
+                self.update(token, balance=balance)
+
+    def _run(self) -> None:
+        self.refresh_all()
+        self.save()
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh_all()
+            self.save()
+
+    def start(self) -> None:
+        """启动后台刷新线程, 立即刷新一次后按间隔定期刷新并保存状态"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=f"token-pool-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.save()
@@ -11,6 +11,8 @@ from api.logger import logger
 from api.base import Chaoxing, Account
 from api.exceptions import LoginError, InputFormatError
 from api.answer import Tiku
+from api.answer_metrics import format_snapshot
+from api.font_cache import FONT_CACHE
 from api.notification import Notification
 from api.config_validator import ConfigValidator
 from api.secure_config import SecureConfig
@@ -96,6 +98,17 @@ def load_config_from_file(config_path):
             except (ValueError, TypeError):
                 logger.warning("speed配置无效，使用默认值1.0")
                 common_config["speed"] = 1.0
+        # 处理font_cache_max_files，留空时使用默认值
+        if common_config.get("font_cache_max_files"):
+            try:
+                common_config["font_cache_max_files"] = int(
+                    common_config["font_cache_max_files"]
+                )
+            except (ValueError, TypeError):
+                logger.warning("font_cache_max_files配置无效，使用默认值")
+                common_config["font_cache_max_files"] = None
+        else:
+            common_config["font_cache_max_files"] = None
         # 处理notopen_action，设置默认值为retry
         if "notopen_action" not in common_config:
             common_config["notopen_action"] = "retry"
@@ -126,7 +139,7 @@ def load_config_from_file(config_path):
     if config.has_section("tiku"):
         tiku_config = dict(config.items("tiku"))
         # 处理数值类型转换
-        for key in ["delay", "cover_rate"]:
+        for key in ["delay", "cover_rate", "fuzzy_threshold"]:
             if key in tiku_config:
                 try:
                     tiku_config[key] = float(tiku_config[key])
@@ -136,6 +149,8 @@ def load_config_from_file(config_path):
                         tiku_config[key] = 1.0
                     elif key == "cover_rate":
                         tiku_config[key] = 0.8
+                    elif key == "fuzzy_threshold":
+                        tiku_config[key] = 0.0
 
     # 检查并读取notification节
     if config.has_section("notification"):
@@ -190,11 +205,8 @@ def init_chaoxing(common_config, tiku_config):
     tiku = tiku.get_tiku_from_config()  # 载入题库
     tiku.init_tiku()  # 初始化题库
 
-    # 获取查询延迟设置
-    query_delay = tiku_config.get("delay", 0)
-
     # 实例化超星API
-    chaoxing = Chaoxing(account=account, tiku=tiku, query_delay=query_delay)
+    chaoxing = Chaoxing(account=account, tiku=tiku)
 
     return chaoxing
 
@@ -229,6 +241,7 @@ def filter_courses(all_course, course_list):
 
 def main():
     """主程序入口"""
+    chaoxing = None
     try:
         # 初始化配置
         common_config, tiku_config, notification_config = init_config()
@@ -250,6 +263,13 @@ def main():
         speed = min(2.0, max(1.0, common_config.get("speed", 1.0)))
         notopen_action = common_config.get("notopen_action", "retry")
 
+        # 加密字体解析结果保存到磁盘
+        if common_config.get("font_cache_dir"):
+            FONT_CACHE.set_directory(
+                common_config["font_cache_dir"].strip(),
+                common_config.get("font_cache_max_files"),
+            )
+
         # 初始化超星实例
         chaoxing = init_chaoxing(common_config, tiku_config)
 
@@ -302,6 +322,14 @@ def main():
         except Exception:
             pass  # 如果通知发送失败，忽略异常
         raise e
+    finally:
+        # 关闭题库连接
+        if chaoxing is not None and chaoxing.tiku:
+            chaoxing.tiku.close()
+            if not chaoxing.tiku.DISABLE:
+                logger.info(
+                    f"题库查询统计:\n{format_snapshot(chaoxing.tiku.metrics.snapshot())}"
+                )
 
 
 if __name__ == "__main__":
@@ -32,6 +32,7 @@ CORE_DEPS = [
     "cryptography",
     "loguru",
     "argparse",
+    "numpy",
 ]
 
 # Web平台依赖
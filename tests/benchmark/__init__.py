@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准测试包
+基于 pytest-benchmark 衡量热点函数的吞吐量
+"""
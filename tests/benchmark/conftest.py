@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试的公共 fixtures
+"""
+import tracemalloc
+
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    # 未安装 pytest-benchmark 时跳过整个目录
+    collect_ignore_glob = ["test_bench_*.py"]
+
+
+@pytest.fixture
+def benchmark_alloc(benchmark):
+    """
+    计时前先用 tracemalloc 记录一次调用的内存分配峰值
+
+    结果写入 benchmark.extra_info, 随 --benchmark-json 一并输出,
+    由 tools/bench_compare.py 与基线比较:
+        alloc_peak_kib: 一次调用的内存分配峰值
+        input_kib: 输入大小, 用于计算吞吐量
+    """
+
+    def run(func, *args, input_size=None):
+        func(*args)  # 预热, 排除首次调用时的缓存与导入
+        tracemalloc.start()
+        try:
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["alloc_peak_kib"] = round(peak / 1024, 1)
+        if input_size is not None:
+            benchmark.extra_info["input_kib"] = round(input_size / 1024, 1)
+        return benchmark(func, *args)
+
+    return run
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+校准基准测试
+
+固定的纯 Python 工作量, tools/bench_compare.py 以它的耗时归一化其他结果,
+从而可以比较不同机器上的运行结果与基线。
+"""
+import json
+
+import pytest
+
+DATA = [
+    {"id": i, "title": f"第{i}题 {'题目内容' * (i % 7)}", "score": i % 13}
+    for i in range(2000)
+]
+
+
+def workload():
+    text = json.dumps(DATA, ensure_ascii=False)
+    items = json.loads(text)
+    items.sort(key=lambda item: (item["score"], item["title"]))
+    return sum(len(item["title"].replace("题", "")) for item in items)
+
+
+@pytest.mark.slow
+def test_bench_calibration(benchmark):
+    """校准用的固定工作量"""
+    assert benchmark(workload) > 0
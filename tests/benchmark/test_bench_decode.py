@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+页面解析基准测试
+
+逐个解析 tests/fixtures/html 中的样例页面, 并用重复样例内容得到的大页面比较
+lxml 与 BeautifulSoup 两种实现, 每项同时记录内存分配峰值。
+"""
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from api import decode
+from api.decode import (
+    PARSER_BS4,
+    PARSER_LXML,
+    _extract_marg,
+    decode_course_point,
+    decode_questions_info,
+    iter_course_points,
+)
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "html"
+CORPUS = json.loads((FIXTURES / "corpus.json").read_text(encoding="utf-8"))
+CHAPTERS = 300
+QUESTIONS = 60
+
+
+def _cases():
+    for entry in CORPUS:
+        if entry["decoder"] == "decode_course_card":
+            yield pytest.param(entry, None, id=entry["name"])
+            continue
+        for parser in (PARSER_LXML, PARSER_BS4):
+            yield pytest.param(entry, parser, id=f"{entry['name']}-{parser}")
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("entry,parser", list(_cases()))
+def test_bench_corpus(benchmark_alloc, load_html, request, entry, parser):
+    """解析单个样例页面"""
+    if entry.get("font"):
+        request.getfixturevalue("encrypted_font")
+    html = load_html(entry["name"])
+    decoder = getattr(decode, entry["decoder"])
+    args = (html,) if parser is None else (html, parser)
+    benchmark_alloc(decoder, *args, input_size=len(html.encode("utf-8")))
+
+
+@pytest.fixture(scope="module")
+def large_course(load_html):
+    """由样例章节重复得到的大型课程"""
+    html = load_html("course_point")
+    start = html.index('<div class="chapter_unit">')
+    end = html.index('<div class="chapter_unit"></div>')
+    return html[:start] + html[start:end] * (CHAPTERS // 2) + html[end:]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("parser", [PARSER_LXML, PARSER_BS4])
+def test_bench_course_point(benchmark_alloc, large_course, parser):
+    """解析约300个章节的章节列表"""
+    result = benchmark_alloc(
+        decode_course_point,
+        large_course,
+        parser,
+        input_size=len(large_course.encode("utf-8")),
+    )
+    assert len(result["points"]) == 5 * (CHAPTERS // 2)
+
+
+def _first_point_full(html):
+    return decode_course_point(html)["points"][0]
+
+
+def _first_point_incremental(html):
+    return next(iter_course_points(html))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    "first_point",
+    [_first_point_full, _first_point_incremental],
+    ids=["full", "incremental"],
+)
+def test_bench_first_point(benchmark_alloc, large_course, first_point):
+    """大型课程从收到页面到得到第一个章节的耗时"""
+    point = benchmark_alloc(
+        first_point, large_course, input_size=len(large_course.encode("utf-8"))
+    )
+    assert point["id"] == "100000001"
+
+
+@pytest.fixture(scope="module")
+def quiz_page(load_html):
+    """由样例题目重复得到的加密字体测验页面"""
+    html = load_html("questions_font")
+    start = html.index('<div class="singleQuesId"')
+    end = html.index("</form>")
+    return html[:start] + html[start:end] * (QUESTIONS // 3) + html[end:]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("parser", [PARSER_LXML, PARSER_BS4])
+def test_bench_questions_info(benchmark_alloc, quiz_page, parser):
+    """解析并解码约60道题目的测验页面"""
+    result = benchmark_alloc(
+        decode_questions_info,
+        quiz_page,
+        parser,
+        input_size=len(quiz_page.encode("utf-8")),
+    )
+    assert len(result["questions"]) == QUESTIONS
+
+
+def _extract_marg_legacy(html_text):
+    """原实现: 去除整个页面的空格后用正则截取"""
+    temp = re.findall(r"mArg=\{(.*?)\};", html_text.replace(" ", ""))
+    return json.loads("{" + temp[0] + "}") if temp else None
+
+
+@pytest.fixture(scope="module")
+def card_page(load_html):
+    """在样例任务点页面前填充约200KB的页面内容"""
+    html = load_html("course_card")
+    # 原实现无法处理字符串中的 "};"
+    html = html.replace("测验 };", "测验")
+    filler = (
+        '<div class="ans-job-icon" style="width: 100%"> 任务点 说明 </div>\n' * 3000
+    )
+    return html.replace("<body>", "<body>" + filler)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    "extract", [_extract_marg, _extract_marg_legacy], ids=["raw_decode", "legacy"]
+)
+def test_bench_course_card(benchmark_alloc, card_page, extract):
+    """从约200KB的任务点页面中提取 mArg"""
+    result = benchmark_alloc(
+        extract, card_page, input_size=len(card_page.encode("utf-8"))
+    )
+    assert len(result["attachments"]) == 6
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+加密字体解析与解密基准测试
+"""
+import re
+
+import pytest
+
+from api import font_decoder
+from api.cxsecret_font import (
+    FontHashDAO,
+    _hash_glyph_points,
+    compile_table,
+    decrypt,
+    font2chars,
+    font2map,
+    hash_glyphs,
+    resource_path,
+)
+from api.font_cache import FontMapCache
+from api.font_decoder import FontDecoder
+from api.glyph_outline import OUTLINE_DTYPE, GlyphOutlineIndex, build_outline_records
+
+TEXT = "字体加密一普通文本，abc 123。" * 100
+JSON_TABLE = resource_path("resource/font_map_table.json")
+# 字体映射表中 uni4E08 的哈希
+GLYPH_HASH = "7673aecf161a22877d333342341dbdbb"
+
+
+@pytest.fixture
+def font_style(encrypted_font):
+    start = encrypted_font.index('<style id="cxSecretStyle">')
+    return encrypted_font[start : encrypted_font.index("</style>", start)]
+
+
+@pytest.fixture
+def font_data_url(font_style):
+    data = re.search(FontDecoder.FONT_BASE64_PATTERN, font_style).group(1)
+    return FontDecoder.FONT_DATA_URL_PREFIX + data
+
+
+@pytest.mark.slow
+def test_bench_font2map(benchmark_alloc, font_data_url):
+    """解析样例字体并计算字形哈希"""
+    result = benchmark_alloc(font2map, font_data_url, input_size=len(font_data_url))
+    assert len(result) == 5
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("cached", [True, False], ids=["cached", "uncached"])
+def test_bench_from_style(benchmark_alloc, monkeypatch, font_style, cached):
+    """从样式标签创建解码器, 字体已缓存时无需解析"""
+    cache = FontMapCache(maxsize=FontMapCache.DEFAULT_SIZE if cached else 0)
+    monkeypatch.setattr(font_decoder, "FONT_CACHE", cache)
+    decoder = benchmark_alloc(
+        FontDecoder.from_style, font_style, input_size=len(font_style.encode("utf-8"))
+    )
+    assert decoder.decode("字体") == "题目"
+
+
+def _decrypt(font_map, text):
+    """原实现: 逐字查找字形哈希"""
+    return decrypt(font_map, text)
+
+
+def _translate(font_map, text):
+    """编译好的转换表"""
+    return text.translate(compile_table(font2chars(font_map)))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("text", [TEXT, TEXT * 50], ids=["2k", "100k"])
+@pytest.mark.parametrize("run", [_decrypt, _translate], ids=["decrypt", "translate"])
+def test_bench_decrypt(benchmark_alloc, font_data_url, text, run):
+    """解密约2000字与约10万字(长测验页面)的文本, 转换表的耗时包含编译"""
+    font_map = font2map(font_data_url)
+    result = benchmark_alloc(run, font_map, text, input_size=len(text.encode()))
+    assert result.startswith("题目答案一")
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("batched", [True, False], ids=["decode_many", "decode"])
+def test_bench_decode_texts(benchmark_alloc, font_style, batched):
+    """解码200个短字符串"""
+    decoder = FontDecoder.from_style(font_style)
+    texts = [f"字体{i}加密" for i in range(200)]
+
+    def run(texts):
+        if batched:
+            return decoder.decode_many(texts)
+        return [decoder.decode(text) for text in texts]
+
+    assert benchmark_alloc(run, texts)[0] == "题目0答案"
+
+
+def _load_json_table():
+    """原实现: 加载JSON映射表并反转为字典"""
+    dao = FontHashDAO(table_path="resource/not_exists.bin")
+    return dao.find_char(GLYPH_HASH)
+
+
+def _open_binary_table():
+    """映射二进制表并二分查找"""
+    return FontHashDAO().find_char(GLYPH_HASH)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    "load", [_load_json_table, _open_binary_table], ids=["json", "mmap"]
+)
+def test_bench_hash_table_open(benchmark_alloc, load):
+    """创建字体哈希表并完成第一次查找, 即每个进程首次解密前的开销"""
+    assert benchmark_alloc(load) == "uni4E08"
+
+
+@pytest.mark.slow
+def test_bench_hash_table_lookup(benchmark_alloc):
+    """在二进制表中查找1000个不同的哈希"""
+    hashes = [f"{i:032x}" for i in range(999)] + [GLYPH_HASH]
+
+    def lookup(hashes):
+        dao = FontHashDAO()
+        return [dao.find_codepoint(h) for h in hashes]
+
+    assert benchmark_alloc(lookup, hashes)[-1] == 0x4E08
+
+
+def _synthetic_glyphs(count=500, contours=3, points=40):
+    """点数与常见汉字字形相当的随机字形"""
+    import random
+
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    rng = random.Random(0)
+    glyphs = []
+    for _ in range(count):
+        pen = TTGlyphPen(None)
+        for _ in range(contours):
+            pen.moveTo((rng.randint(-100, 1100), rng.randint(-200, 900)))
+            for _ in range(points - 1):
+                pen.lineTo((rng.randint(-100, 1100), rng.randint(-200, 900)))
+            pen.closePath()
+        glyphs.append(pen.glyph())
+    return glyphs
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("batched", [False, True], ids=["per_point", "vectorized"])
+def test_bench_hash_glyphs(benchmark_alloc, batched):
+    """计算一个字体(500个字形)全部字形的哈希"""
+    glyphs = _synthetic_glyphs()
+    hash_glyphs([])  # 预先生成坐标字符串表
+    run = hash_glyphs if batched else lambda gs: [_hash_glyph_points(g) for g in gs]
+    result = benchmark_alloc(run, glyphs, input_size=len(glyphs))
+    assert len(set(result)) == len(glyphs)
+
+
+@pytest.mark.slow
+def test_bench_outline_match(benchmark_alloc):
+    """在2万条记录的轮廓索引中匹配一个字体中50个哈希未知的字形"""
+    import numpy as np
+
+    glyphs = _synthetic_glyphs(50)
+    records = build_outline_records(range(len(glyphs)), glyphs)
+    noise = np.zeros(20000 - len(records), dtype=OUTLINE_DTYPE)
+    noise["codepoint"] = 0x4E00
+    noise["outline"] = np.random.default_rng(0).random(noise["outline"].shape)
+    index = GlyphOutlineIndex.from_records(np.concatenate([records, noise]))
+    result = benchmark_alloc(index.match, glyphs, input_size=len(glyphs))
+    assert [match[0] for match in result] == list(range(len(glyphs)))
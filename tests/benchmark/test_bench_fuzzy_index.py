@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+近似题目索引基准测试
+"""
+import random
+
+import pytest
+
+from api.fuzzy_index import FuzzyIndex
+
+CHARS = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出"
+    "就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所"
+    "民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都"
+    "两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日"
+    "那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比"
+    "或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想"
+    "已通并提直题"
+)
+ENTRIES = 100_000
+
+
+@pytest.fixture(scope="module")
+def large_index():
+    rng = random.Random(42)
+    titles = [
+        "".join(rng.choice(CHARS) for _ in range(rng.randint(12, 40)))
+        for _ in range(ENTRIES)
+    ]
+    index = FuzzyIndex()
+    index.add_many((title, i) for i, title in enumerate(titles))
+    return index, titles
+
+
+@pytest.mark.slow
+def test_bench_query_hit(benchmark, large_index):
+    """10万条目中查找只差一个字的题目"""
+    index, titles = large_index
+    query = list(titles[500])
+    query[5] = "乙"
+    query = "".join(query)
+    result = benchmark(index.query, query, 0.9)
+    assert result is not None and result[0] == 500
+
+
+@pytest.mark.slow
+def test_bench_query_miss(benchmark, large_index):
+    """10万条目中查找不存在的题目"""
+    index, _ = large_index
+    result = benchmark(index.query, "这是一道在索引中完全不存在的题目内容", 0.9)
+    assert result is None
+
+
+@pytest.mark.slow
+def test_bench_incremental_add(benchmark, large_index):
+    """在10万条目的索引上增量写入"""
+    index, _ = large_index
+    counter = iter(range(ENTRIES, ENTRIES * 100))
+    benchmark(lambda: index.add(f"增量写入的新题目{next(counter)}", next(counter)))
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+题目标准化基准测试
+"""
+import pytest
+
+from api.question_normalizer import clean_title, question_key
+
+TITLES = [
+    "1【单选题】中国的首都是（ ）（2.0分）",
+    "2【多选题】下列关于 DNA 复制的说法，正确的是（   ）。（5.0分）",
+    '3【判断题】如图<img src="https://p.ananas.chaoxing.com/star3/origin/abc.png?t=1">所示，该电路为串联电路。',
+    "4【填空题】马克思主义的三个组成部分是____、____和____。",
+    "5 (简答题) 请简述“实事求是”的科学内涵及其在新时代的意义？（10分）",
+] * 20
+
+
+@pytest.mark.slow
+def test_bench_clean_title(benchmark):
+    """清理100个标题"""
+    result = benchmark(lambda: [clean_title(t) for t in TITLES])
+    assert len(result) == len(TITLES)
+
+
+@pytest.mark.slow
+def test_bench_question_key(benchmark):
+    """计算100个标题的规范化键与哈希"""
+    result = benchmark(lambda: [question_key(t) for t in TITLES])
+    assert len(result) == len(TITLES)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+答案与选项匹配基准测试
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from api.option_matcher import match_options
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "option_matching.json"
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return json.loads(FIXTURE.read_text(encoding="utf-8"))
+
+
+@pytest.mark.slow
+def test_bench_golden_cases(benchmark, cases):
+    """匹配全部样例题目"""
+
+    def run():
+        return [match_options(c["answer"], c["options"], c["type"]) for c in cases]
+
+    result = benchmark(run)
+    assert result == [c["expected"] for c in cases]
+
+
+@pytest.mark.slow
+def test_bench_long_multiple(benchmark):
+    """8个长选项的多选题, 答案在同一行以顿号分隔"""
+    contents = [f"第{i}条关于社会主义核心价值观的较长表述内容{i * 7}" for i in range(8)]
+    options = "\n".join(f"{chr(65 + i)}{c}" for i, c in enumerate(contents))
+    answer = "、".join(contents[i] for i in (0, 3, 5, 7))
+    assert benchmark(match_options, answer, options, "multiple") == "ADFH"
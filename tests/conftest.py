@@ -188,6 +188,43 @@ def mock_course_data():
         "has_finished": False,
     }
 
+# 页面解析样例, 清单见 tests/fixtures/html/corpus.json
+HTML_FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+# 样例字体中字形对应的原始字符, uni2F00 为康熙部首"⼀", 解码后替换为"一"
+FONT_ORIGINALS = {
+    "uni5B57": "uni9898",
+    "uni4F53": "uni76EE",
+    "uni52A0": "uni7B54",
+    "uni5BC6": "uni6848",
+    "uni4E00": "uni2F00",
+}
+
+
+@pytest.fixture(scope="session")
+def load_html():
+    """读取页面样例"""
+    def load(name: str) -> str:
+        return (HTML_FIXTURES / f"{name}.html").read_text(encoding="utf-8")
+    return load
+
+
+@pytest.fixture
+def encrypted_font(monkeypatch, load_html):
+    """用只包含样例字体字形哈希的字体哈希表代替默认的表, 返回加密字体测验页面"""
+    import re
+    from api import cxsecret_font
+    from api.font_decoder import FontDecoder
+
+    html = load_html("questions_font")
+    data = re.search(FontDecoder.FONT_BASE64_PATTERN, html).group(1)
+    font_map = cxsecret_font.font2map(FontDecoder.FONT_DATA_URL_PREFIX + data)
+    dao = cxsecret_font.FontHashDAO.from_map(
+        {original: font_map[name] for name, original in FONT_ORIGINALS.items()}
+    )
+    monkeypatch.setattr(cxsecret_font, "fonthash_dao", dao)
+    return html
+
 # 标记所有异步测试
 def pytest_collection_modifyitems(items):
     """自动标记异步测试"""
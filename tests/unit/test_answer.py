@@ -43,3 +43,205 @@ class TestTiku:
         """测试query方法存在"""
         tiku = Tiku()
         assert hasattr(tiku, "query")
+
+
+class _FakeTiku(Tiku):
+    """记录查询调用的测试题库"""
+
+    def __init__(self, answers, cache_file):
+        super().__init__()
+        self.name = "测试题库"
+        self.CACHE_FILE = cache_file
+        self.answers = answers
+        self.calls = []
+        self.batch_calls = []
+        self.config_set({"fuzzy_threshold": 0})
+        self.init_tiku()
+
+    def _query(self, q_info):
+        self.calls.append(q_info["title"])
+        return self.answers.get(q_info["title"])
+
+    def _query_batch(self, q_infos):
+        self.batch_calls.append([q["title"] for q in q_infos])
+        return [self.answers.get(q["title"]) for q in q_infos]
+
+
+def _question(title, q_type="completion"):
+    return {"title": title, "type": q_type, "options": ""}
+
+
+@pytest.mark.unit
+class TestQueryBatch:
+    """测试批量查询"""
+
+    def test_keeps_input_order(self, tmp_path):
+        """并发查询的结果与输入顺序一致"""
+        answers = {f"题目{i}": f"答案{i}" for i in range(20)}
+        tiku = _FakeTiku(answers, tmp_path / "cache.db")
+        questions = [_question(f"{i + 1}. 题目{i}") for i in range(20)]
+        assert tiku.query_batch(questions) == [f"答案{i}" for i in range(20)]
+
+    def test_cache_hits_skip_provider(self, tmp_path):
+        """命中缓存的题目不再请求题库, 重复题目只查询一次"""
+        tiku = _FakeTiku({"题目二": "答案二"}, tmp_path / "cache.db")
+        tiku.cache_dao.add_cache("题目一", "答案一")
+        questions = [
+            _question("题目一"),
+            _question("题目二"),
+            _question("题目三"),
+            _question("题目二"),
+        ]
+        assert tiku.query_batch(questions) == ["答案一", "答案二", None, "答案二"]
+        assert sorted(tiku.calls) == ["题目三", "题目二"]
+
+    def test_batch_endpoint(self, tmp_path):
+        """支持批量接口的题库按BATCH_SIZE分批请求"""
+        answers = {f"题目{i}": f"答案{i}" for i in range(5)}
+        tiku = _FakeTiku(answers, tmp_path / "cache.db")
+        tiku.BATCH_SIZE = 2
+        result = tiku.query_batch([_question(f"题目{i}") for i in range(5)])
+        assert result == [f"答案{i}" for i in range(5)]
+        assert [len(c) for c in tiku.batch_calls] == [2, 2, 1]
+        assert tiku.calls == []
+
+    @pytest.mark.parametrize("batch_size", [0, 2])
+    def test_provider_exception_contained(self, tmp_path, batch_size):
+        """一批(或一题)请求异常时只有这些题目没有答案, 并记录为provider_error"""
+        answers = {f"题目{i}": f"答案{i}" for i in range(5)}
+        tiku = _FakeTiku(answers, tmp_path / "cache.db")
+        tiku.BATCH_SIZE = batch_size
+        query, query_batch = tiku._query, tiku._query_batch
+
+        def failing_query(q_info):
+            if q_info["title"] == "题目2":
+                raise RuntimeError("boom")
+            return query(q_info)
+
+        def failing_batch(q_infos):
+            if any(q["title"] == "题目2" for q in q_infos):
+                raise RuntimeError("boom")
+            return query_batch(q_infos)
+
+        tiku._query, tiku._query_batch = failing_query, failing_batch
+        result = tiku.query_batch([_question(f"题目{i}") for i in range(5)])
+        failed = {2, 3} if batch_size else {2}
+        assert result == [None if i in failed else f"答案{i}" for i in range(5)]
+        for i in failed:
+            reason = tiku.cache_dao.get_negative(f"题目{i}", tiku.provider_id)
+            assert reason == "provider_error"
+
+    def test_delay_uses_rate_limiter(self, tmp_path):
+        """delay配置转为按题库与token共享的令牌桶限流"""
+        tiku = _FakeTiku({}, tmp_path / "cache.db")
+        tiku.config_set(
+            {"delay": "0.5", "rate_limit_file": str(tmp_path / "rate_limit.db")}
+        )
+        tiku.init_tiku()
+        assert tiku.REQUEST_INTERVAL == 0.5
+        with patch.object(tiku.rate_limiter, "acquire", return_value=0.0) as acquire:
+            tiku._wait_rate_limit("token")
+        key, rate = acquire.call_args[0]
+        assert key == tiku.rate_limit_key("token") and "token" not in key
+        assert rate == 2.0
+
+    def test_concurrency_capped_by_provider(self, tmp_path):
+        """并发数不超过题库允许的上限"""
+        tiku = _FakeTiku({}, tmp_path / "cache.db")
+        tiku.MAX_CONCURRENCY = 1
+        tiku.config_set({"query_concurrency": "8", "fuzzy_threshold": 0})
+        tiku.init_tiku()
+        assert tiku.QUERY_CONCURRENCY == 1
+
+
+@pytest.mark.unit
+class TestTikuSession:
+    """测试题库长连接"""
+
+    def test_session_reused_and_closed(self):
+        """会话在多次查询之间复用, 关闭后重新创建"""
+        tiku = Tiku()
+        session = tiku.session
+        assert tiku.session is session
+        tiku.close()
+        assert tiku.session is not session
+        tiku.close()
+
+    def test_pool_and_timeout_config(self, tmp_path):
+        """连接池大小与超时可配置"""
+        tiku = _FakeTiku({}, tmp_path / "cache.db")
+        tiku.config_set(
+            {
+                "http_pool_size": "3",
+                "http_connect_timeout": "5",
+                "http_read_timeout": "",
+                "query_concurrency": "2",
+            }
+        )
+        tiku.init_tiku()
+        assert tiku.HTTP_POOL_SIZE == 3
+        assert tiku.HTTP_TIMEOUT == (5.0, 30)
+        adapter = tiku.session.get_adapter("https://example.com")
+        assert adapter._pool_maxsize == 3
+        tiku.close()
+
+    def test_ai_client_persistent(self):
+        """AI题库复用同一个OpenAI客户端"""
+        from api.answer import AI
+
+        tiku = AI()
+        tiku.config_set(
+            {
+                "endpoint": "https://example.com/v1",
+                "key": "sk-test",
+                "model": "test",
+                "http_proxy": "",
+                "min_interval_seconds": "0",
+            }
+        )
+        tiku.init_tiku()
+        client = tiku.client
+        assert tiku.client is client
+        tiku.close()
+        assert tiku._client is None
+
+
+@pytest.mark.unit
+class TestNegativeCache:
+    """测试未命中记录"""
+
+    def test_repeated_miss_answered_locally(self, tmp_path):
+        """有效期内再次查询未命中的题目不再请求题库"""
+        tiku = _FakeTiku({}, tmp_path / "cache.db")
+        assert tiku.query(_question("题目")) is None
+        assert tiku.query(_question("1. 题目")) is None
+        assert tiku.query_batch([_question("题目")]) == [None]
+        assert tiku.calls == ["题目"]
+        assert tiku.cache_dao.get_negative("题目", tiku.provider_id) == "not_found"
+
+    def test_type_mismatch_not_cached_as_answer(self, tmp_path):
+        """与题型不符的答案不写入缓存, 记录为type_mismatch"""
+        tiku = _FakeTiku({"题目": "不确定"}, tmp_path / "cache.db")
+        assert tiku.query(_question("题目", "judgement")) is None
+        assert tiku.cache_dao.get_cache("题目") is None
+        assert tiku.cache_dao.get_negative("题目", tiku.provider_id) == "type_mismatch"
+
+    def test_provider_error_uses_own_ttl(self, tmp_path):
+        """请求失败按provider_error的有效期记录, 有效期为0时不记录"""
+        tiku = _FakeTiku({}, tmp_path / "cache.db")
+        tiku.config_set({"fuzzy_threshold": 0, "negative_ttl": "provider_error:0"})
+        tiku.init_tiku()
+        tiku._query = lambda q_info: tiku._mark_provider_error()
+        assert tiku.query(_question("题目")) is None
+        assert tiku.cache_dao.get_negative("题目", tiku.provider_id) is None
+
+    def test_provider_specific_ttl(self, tmp_path):
+        """题库专属配置优先于通用配置"""
+        tiku = _FakeTiku({}, tmp_path / "cache.db")
+        tiku.config_set({"negative_ttl": "60", "_faketiku_negative_ttl": "not_found:5"})
+        tiku.init_tiku()
+        assert tiku.NEGATIVE_TTL == {
+            "not_found": 5.0,
+            "type_mismatch": 60.0,
+            "provider_error": 60.0,
+        }
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+测试答案缓存
+"""
+import json
+import sqlite3
+import time
+
+import pytest
+from api.answer_cache import (
+    NOT_FOUND,
+    PROVIDER_ERROR,
+    TYPE_MISMATCH,
+    CacheDAO,
+    LRUCache,
+    parse_negative_ttl,
+)
+
+
+@pytest.mark.unit
+class TestLRUCache:
+    """测试有界LRU"""
+
+    def test_evicts_least_recently_used(self):
+        """超出容量时淘汰最久未使用的条目"""
+        lru = LRUCache(maxsize=2)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        assert lru.get("a") == 1  # a 变为最近使用
+        lru.put("c", 3)
+        assert "b" not in lru
+        assert lru.get("a") == 1
+        assert lru.get("c") == 3
+
+    def test_zero_size_disables_cache(self):
+        """容量为0时不缓存"""
+        lru = LRUCache(maxsize=0)
+        lru.put("a", 1)
+        assert len(lru) == 0
+
+
+@pytest.mark.unit
+class TestCacheDAO:
+    """测试SQLite答案缓存"""
+
+    def test_add_and_get(self, tmp_path):
+        """写入后可读取, 未命中返回None"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        assert dao.get_cache("题目") is None
+        dao.add_cache("题目", "答案")
+        assert dao.get_cache("题目") == "答案"
+        dao.add_cache("题目", "新答案")
+        assert dao.get_cache("题目") == "新答案"
+        assert len(dao) == 1
+        dao.close()
+
+    def test_persistence(self, tmp_path):
+        """数据在重新打开后仍然存在"""
+        path = tmp_path / "cache.db"
+        dao = CacheDAO(path)
+        dao.add_cache("题目", "答案")
+        dao.close()
+
+        reopened = CacheDAO(path)
+        assert reopened.get_cache("题目") == "答案"
+        reopened.close()
+
+    def test_migrate_legacy_json(self, tmp_path):
+        """自动迁移旧版cache.json并备份原文件"""
+        legacy = tmp_path / "cache.json"
+        legacy.write_text(
+            json.dumps({"题目一": "A", "题目二": "B"}, ensure_ascii=False),
+            encoding="utf8",
+        )
+        dao = CacheDAO(tmp_path / "cache.db")
+        assert dao.get_cache("题目一") == "A"
+        assert dao.get_cache("题目二") == "B"
+        assert not legacy.exists()
+        assert (tmp_path / "cache.json.bak").exists()
+        dao.close()
+
+    def test_legacy_path_argument(self, tmp_path):
+        """传入旧版json路径时使用同名db文件"""
+        legacy = tmp_path / "answers.json"
+        legacy.write_text(json.dumps({"题目": "答案"}), encoding="utf8")
+        dao = CacheDAO(legacy)
+        assert dao.cache_file == tmp_path / "answers.db"
+        assert dao.get_cache("题目") == "答案"
+        dao.close()
+
+    def test_get_instance_is_shared(self, tmp_path):
+        """同一文件返回同一实例"""
+        path = tmp_path / "shared.db"
+        assert CacheDAO.get_instance(path) is CacheDAO.get_instance(str(path))
+
+    def test_acquire_release(self, tmp_path):
+        """最后一个使用者释放后实例被关闭并移除, 待写答案已写入"""
+        path = tmp_path / "released.db"
+        dao = CacheDAO.acquire(path)
+        assert CacheDAO.acquire(str(path)) is dao
+        dao.add_cache("题目", "答案")
+        thread = dao._journal._thread
+        CacheDAO.release(path)
+        assert CacheDAO.get_instance(path) is dao
+        CacheDAO.release(path)
+        assert not thread.is_alive()
+        assert CacheDAO.instance_key(path) not in CacheDAO._instances
+        reopened = CacheDAO(path, write_behind=False)
+        assert reopened.get_cache("题目") == "答案"
+        reopened.close()
+        CacheDAO.release(path)  # 多余的释放被忽略
+
+    def test_normalized_key_hit(self, tmp_path):
+        """仅在标点、空白、题号上不同的标题命中同一条缓存"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        dao.add_cache("中国的首都是（ ）", "北京")
+        assert dao.get_cache("1【单选题】中国的首都是( )（2.0分）") == "北京"
+        dao.close()
+
+    def test_upgrade_v1_schema(self, tmp_path):
+        """旧结构数据表升级后数据保留"""
+        path = tmp_path / "cache.db"
+        conn = sqlite3.connect(str(path))
+        conn.execute(
+            "CREATE TABLE answer_cache (question TEXT PRIMARY KEY, "
+            "answer TEXT NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("INSERT INTO answer_cache VALUES ('地球是圆的', '正确', 0)")
+        conn.commit()
+        conn.close()
+
+        dao = CacheDAO(path)
+        assert dao.get_cache("地球是圆的。") == "正确"
+        dao.close()
+
+
+@pytest.mark.unit
+class TestNegativeCache:
+    """测试未命中记录"""
+
+    def test_expires_after_ttl(self, tmp_path, monkeypatch):
+        """有效期内返回原因, 过期后返回None"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        dao.add_negative("题目", "TikuYanxi", NOT_FOUND, 60)
+        assert dao.get_negative("1. 题目", "TikuYanxi") == NOT_FOUND
+        assert dao.get_negative("题目", "DeepSeek") is None
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert dao.get_negative("题目", "TikuYanxi") is None
+        assert dao.clear_negative() == 1
+        dao.close()
+
+    def test_answer_clears_negative(self, tmp_path):
+        """写入答案后删除该题目的未命中记录"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        dao.add_negative("题目", "TikuYanxi", PROVIDER_ERROR, 60)
+        dao.add_cache("题目", "答案")
+        assert dao.get_negative("题目", "TikuYanxi") is None
+        dao.close()
+
+    def test_persistence(self, tmp_path):
+        """未命中记录写入数据库, 重新打开后仍有效"""
+        path = tmp_path / "cache.db"
+        dao = CacheDAO(path)
+        dao.add_negative("题目", "AI", TYPE_MISMATCH, 60)
+        dao.close()
+        dao = CacheDAO(path)
+        assert dao.get_negative("题目", "AI") == TYPE_MISMATCH
+        dao.close()
+
+    def test_upgrade_v2_schema(self, tmp_path):
+        """v2 数据库升级后可写入未命中记录"""
+        path = tmp_path / "cache.db"
+        conn = sqlite3.connect(str(path))
+        conn.execute(
+            "CREATE TABLE answer_cache (key_hash TEXT PRIMARY KEY, "
+            "question_key TEXT NOT NULL, title TEXT NOT NULL, "
+            "answer TEXT NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+
+        dao = CacheDAO(path)
+        dao.add_negative("题目", "AI", NOT_FOUND, 60)
+        assert dao.get_negative("题目", "AI") == NOT_FOUND
+        dao.close()
+
+    def test_parse_ttl(self):
+        """有效期配置可整体设置或按原因设置"""
+        default = {NOT_FOUND: 10, TYPE_MISMATCH: 10, PROVIDER_ERROR: 1}
+        assert parse_negative_ttl("", default) == default
+        assert parse_negative_ttl("0", default) == dict.fromkeys(default, 0.0)
+        assert parse_negative_ttl("provider_error:30", default)[PROVIDER_ERROR] == 30
+        with pytest.raises(ValueError):
+            parse_negative_ttl("timeout:30", default)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+测试Web数据库共享答案缓存
+"""
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from answer_cache_backend import DatabaseCacheBackend
+from api.answer_cache import CacheDAO
+from models import AnswerCache
+
+
+@pytest.fixture
+def session_factory(sync_db_engine):
+    return sessionmaker(bind=sync_db_engine, expire_on_commit=False)
+
+
+@pytest.mark.unit
+class TestDatabaseCacheBackend:
+    """测试共享答案缓存后端"""
+
+    def test_shared_between_workers(self, tmp_path, session_factory):
+        """一个worker写入的答案其他worker可以读取"""
+        backend = DatabaseCacheBackend(user_id=1, session_factory=session_factory)
+        worker_a = CacheDAO(tmp_path / "a.db", backend=backend)
+        worker_b = CacheDAO(
+            tmp_path / "b.db",
+            backend=DatabaseCacheBackend(user_id=2, session_factory=session_factory),
+        )
+        worker_a.add_cache("1. 中国的首都是（ ）", "北京")
+        # 答案由后台线程写入共享存储, 这里等待写入完成
+        assert worker_a.flush()
+        assert worker_b.get_cache("中国的首都是( )") == "北京"
+        assert len(worker_b) == 1
+        worker_a.close()
+        worker_b.close()
+
+    def test_private_namespace(self, tmp_path, session_factory):
+        """私有答案仅对本用户可见, 且优先于全局答案"""
+        public = DatabaseCacheBackend(user_id=1, session_factory=session_factory)
+        private = DatabaseCacheBackend(
+            user_id=2, private=True, session_factory=session_factory
+        )
+        other = DatabaseCacheBackend(user_id=3, session_factory=session_factory)
+        public.put("k", "题目", "题目", "全局答案")
+        private.put("k", "题目", "题目", "私有答案")
+        assert private.get("k") == ("题目", "私有答案")
+        assert other.get("k") == ("题目", "全局答案")
+        assert private.write_namespace == AnswerCache.user_namespace(2)
+
+    def test_overwrite(self, session_factory):
+        """同一命名空间同一题目只保留最新答案"""
+        backend = DatabaseCacheBackend(session_factory=session_factory)
+        backend.put("k", "题目", "题目", "旧答案")
+        backend.put("k", "题目", "题目", "新答案")
+        assert backend.get("k") == ("题目", "新答案")
+        assert backend.count() == 1
+
+    def test_fuzzy_match_through_backend(self, tmp_path, session_factory):
+        """近似题目匹配使用后端中的答案"""
+        backend = DatabaseCacheBackend(session_factory=session_factory)
+        dao = CacheDAO(tmp_path / "cache.db", backend=backend)
+        dao.add_cache("下列哪一项是中华人民共和国的首都城市", "北京")
+        match = dao.find_similar("下列哪一项是中华人民共和国的首都城市呢", 0.5)
+        assert match is not None and match[1] == "北京"
+        dao.close()
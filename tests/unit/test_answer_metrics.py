@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+测试题库查询统计
+"""
+import json
+
+import pytest
+from api.answer import Tiku
+from api.answer_metrics import (
+    AnswerMetrics,
+    Histogram,
+    format_snapshot,
+    merge_snapshots,
+)
+
+
+class _FakeTiku(Tiku):
+    """按字典返回答案的测试题库"""
+
+    def __init__(self, answers, cache_file, batch_size=0):
+        super().__init__()
+        self.name = "测试题库"
+        self.CACHE_FILE = cache_file
+        self.BATCH_SIZE = batch_size
+        self.answers = answers
+        self.metrics = AnswerMetrics()
+        self.config_set({"fuzzy_threshold": 0})
+        self.init_tiku()
+
+    def _query(self, q_info):
+        answer = self.answers.get(q_info["title"])
+        if isinstance(answer, Exception):
+            raise answer
+        if answer == "error":
+            self._mark_provider_error()
+            return None
+        self._record_tokens(10)
+        return answer
+
+
+def _question(title, q_type="completion"):
+    return {"title": title, "type": q_type, "options": ""}
+
+
+@pytest.mark.unit
+class TestHistogram:
+    """测试直方图"""
+
+    def test_percentile(self):
+        """分位数取所在分桶的上界, 超出最后一个分桶时取最大值"""
+        histogram = Histogram((1, 2, 5))
+        for value in (0.5, 0.8, 1.5, 4, 9):
+            histogram.observe(value)
+        assert histogram.percentile(0.4) == 1
+        assert histogram.percentile(0.6) == 2
+        assert histogram.percentile(1.0) == 9
+        assert Histogram().percentile(0.5) is None
+
+    def test_merge_via_snapshot(self):
+        """快照还原后可以合并"""
+        a, b = Histogram((1, 2)), Histogram((1, 2))
+        a.observe(0.5)
+        b.observe(3)
+        merged = Histogram.from_snapshot(a.snapshot())
+        merged.merge(Histogram.from_snapshot(b.snapshot()))
+        assert merged.count == 2
+        assert merged.buckets == [1, 0, 1]
+        assert merged.max == 3
+        with pytest.raises(ValueError):
+            merged.merge(Histogram((5,)))
+
+
+@pytest.mark.unit
+class TestTikuMetrics:
+    """测试题库查询过程中的统计"""
+
+    def test_cache_and_provider_counters(self, tmp_path):
+        """缓存命中、未命中、跳过与题库结果分别计数"""
+        tiku = _FakeTiku({"题目1": "答案1", "题目3": "error"}, tmp_path / "c.db")
+        tiku.query(_question("题目1"))
+        tiku.query(_question("题目1"))
+        tiku.query(_question("题目2"))
+        tiku.query(_question("题目2"))
+        tiku.query(_question("题目3"))
+
+        snapshot = tiku.metrics.snapshot()
+        assert snapshot["cache"]["hit"] == 1
+        # 跳过的题目同样计入未命中
+        assert snapshot["cache"]["miss"] == 4
+        assert snapshot["cache"]["negative_skip"] == 1
+        assert snapshot["cache"]["hit_rate"] == 0.2
+        provider = snapshot["providers"]["_FakeTiku"]
+        assert provider["requests"] == 3
+        assert provider["answered"] == 1
+        assert provider["not_found"] == 2
+        assert provider["errors"] == 1
+        assert provider["tokens"] == 20
+        assert provider["latency"]["count"] == 3
+
+    def test_rejected_answer(self, tmp_path):
+        """未通过类型校验的答案计入rejected"""
+        tiku = _FakeTiku({"题目": "不确定"}, tmp_path / "c.db")
+        tiku.query(_question("题目", "judgement"))
+        assert tiku.metrics.snapshot()["providers"]["_FakeTiku"]["rejected"] == 1
+
+    def test_exception_counted_as_error(self, tmp_path):
+        """查询抛出异常时计为错误"""
+        tiku = _FakeTiku({"题目": RuntimeError("boom")}, tmp_path / "c.db")
+        with pytest.raises(RuntimeError):
+            tiku.query(_question("题目"))
+        provider = tiku.metrics.snapshot()["providers"]["_FakeTiku"]
+        assert provider["errors"] == 1 and provider["requests"] == 1
+
+    def test_batch_counts_one_request_per_chunk(self, tmp_path):
+        """批量接口每个批次计一次请求, 题目数按结果计数"""
+        answers = {f"题目{i}": f"答案{i}" for i in range(3)}
+        tiku = _FakeTiku(answers, tmp_path / "c.db", batch_size=2)
+        tiku.query_batch([_question(f"题目{i}") for i in range(4)])
+        snapshot = tiku.metrics.snapshot()
+        assert snapshot["cache"]["miss"] == 4
+        provider = snapshot["providers"]["_FakeTiku"]
+        assert provider["requests"] == 2
+        assert provider["answered"] == 3
+        assert provider["not_found"] == 1
+
+
+@pytest.mark.unit
+class TestSnapshots:
+    """测试快照的合并、保存与格式化"""
+
+    def test_merge_and_save(self, tmp_path):
+        """多个进程的快照合并后计数相加"""
+        first, second = AnswerMetrics(), AnswerMetrics()
+        first.cache("hit", 3)
+        second.cache("miss", 1)
+        first.latency("AI", 0.3)
+        second.latency("AI", 1.5)
+        second.provider("AI", "tokens", 100)
+        second.save(tmp_path / "worker.json")
+        saved = json.loads((tmp_path / "worker.json").read_text(encoding="utf8"))
+
+        merged = merge_snapshots([first.snapshot(), saved])
+        assert merged["cache"]["hit"] == 3 and merged["cache"]["miss"] == 1
+        assert merged["cache"]["hit_rate"] == 0.75
+        assert merged["providers"]["AI"]["requests"] == 2
+        assert merged["providers"]["AI"]["tokens"] == 100
+        assert merged["providers"]["AI"]["latency"]["count"] == 2
+
+    def test_format(self):
+        """格式化输出包含缓存与各题库的统计"""
+        metrics = AnswerMetrics()
+        metrics.cache("hit")
+        metrics.latency("TikuYanxi", 0.2)
+        metrics.provider("TikuYanxi", "answered")
+        text = format_snapshot(metrics.snapshot())
+        assert "命中1" in text and "命中率100%" in text
+        assert "TikuYanxi: 请求1, 有答案1" in text
+
+    def test_font_counters(self):
+        """字体缓存计数可以合并, 兼容没有字体计数的旧快照"""
+        first, second = AnswerMetrics(), AnswerMetrics()
+        assert "加密字体" not in format_snapshot(first.snapshot())
+        first.font("hit", 2)
+        second.font("disk_hit")
+        second.font("miss")
+        old = first.snapshot()
+        del old["fonts"]
+
+        merged = merge_snapshots([first.snapshot(), second.snapshot(), old])
+        assert merged["fonts"]["hit"] == 2 and merged["fonts"]["miss"] == 1
+        assert merged["fonts"]["hit_rate"] == 0.75
+        assert "加密字体: 命中2, 磁盘命中1, 未命中1, 命中率75%" in format_snapshot(
+            merged
+        )
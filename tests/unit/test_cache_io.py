@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+测试题库批量导入导出
+"""
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from api.answer_cache import CacheDAO
+from api.cache_io import (
+    ADDED,
+    CHANGED,
+    SAME,
+    detect_format,
+    diff_records,
+    export_records,
+    import_records,
+    read_records,
+    write_records,
+)
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "tools"))
+import cache_tool  # noqa: E402
+
+
+def _jsonl(*items):
+    return io.StringIO(
+        "\n".join(json.dumps(item, ensure_ascii=False) for item in items)
+    )
+
+
+@pytest.fixture
+def dao(tmp_path):
+    dao = CacheDAO(tmp_path / "cache.db")
+    yield dao
+    dao.close()
+
+
+@pytest.mark.unit
+class TestCacheIO:
+    """测试导入导出"""
+
+    def test_import_normalizes_and_dedupes(self, dao):
+        """标题规范化后去重, 跨块重复的题目不重复写入"""
+        records = read_records(
+            _jsonl(
+                {"title": "1. 中国的首都是（ ）", "answer": "北京"},
+                {"question": "【单选题】中国的首都是( )（2.0分）", "answer": "北京"},
+                {"title": "多选题目", "answer": ["甲", "乙"]},
+                {"title": "中国的首都是()", "answer": "北京"},
+                {"title": "", "answer": "无标题"},
+            ),
+            "jsonl",
+        )
+        stats = import_records(dao, records, chunk_size=3)
+        assert stats["total"] == 5
+        assert stats["added"] == 2
+        assert stats["duplicate"] == 1
+        assert stats["unchanged"] == 1
+        assert stats["invalid"] == 1
+        assert dao.get_cache("中国的首都是( )") == "北京"
+        assert dao.get_cache("多选题目") == "甲\n乙"
+
+    def test_conflict_and_overwrite(self, dao):
+        """已有不同答案时默认保留, 指定overwrite时覆盖"""
+        dao.add_cache("题目", "旧答案")
+        new = [("题目", "新答案")]
+        assert import_records(dao, new)["conflict"] == 1
+        assert dao.get_cache("题目") == "旧答案"
+        assert import_records(dao, new, overwrite=True)["updated"] == 1
+        assert dao.get_cache("题目") == "新答案"
+
+    def test_import_clears_negative(self, dao):
+        """导入的题目删除未命中记录"""
+        dao.add_negative("题目", "AI", "not_found", 60)
+        import_records(dao, [("题目", "答案")])
+        assert dao.get_negative("题目", "AI") is None
+
+    def test_export_roundtrip_csv(self, dao, tmp_path):
+        """导出的CSV可以原样导入另一个缓存"""
+        import_records(dao, [(f"题目{i}", f"答案{i}\n第二行") for i in range(5)])
+        buffer = io.StringIO(newline="")
+        assert write_records(export_records(dao, chunk_size=2), buffer, "csv") == 5
+
+        other = CacheDAO(tmp_path / "other.db")
+        buffer.seek(0)
+        assert import_records(other, read_records(buffer, "csv"))["added"] == 5
+        assert other.get_cache("题目3") == "答案3\n第二行"
+        other.close()
+
+    def test_diff(self, dao):
+        """比较文件与缓存的差异"""
+        dao.add_cache("相同", "答案")
+        dao.add_cache("不同", "旧答案")
+        records = [("相同", "答案"), ("不同", "新答案"), ("新增", "答案")]
+        result = {title: status for status, title, _, _ in diff_records(dao, records)}
+        assert result == {"相同": SAME, "不同": CHANGED, "新增": ADDED}
+
+    def test_invalid_json_line_skipped(self):
+        """无法解析的行计为无效记录"""
+        records = list(read_records(io.StringIO('{"title": "题目"\n'), "jsonl"))
+        assert records == [("", "")]
+
+    def test_detect_format(self):
+        """按扩展名判断格式, 不支持的格式抛出ValueError"""
+        assert detect_format("bank.JSONL") == "jsonl"
+        assert detect_format("bank.txt", "csv") == "csv"
+        with pytest.raises(ValueError):
+            detect_format("bank.xlsx")
+
+
+@pytest.mark.unit
+class TestCacheTool:
+    """测试命令行工具"""
+
+    def test_import_export_diff(self, tmp_path, capsys):
+        """命令行导入后导出, 再与原文件比较没有差异"""
+        bank = tmp_path / "bank.jsonl"
+        bank.write_text(
+            json.dumps({"title": "题目", "answer": "答案"}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        cache = str(tmp_path / "cache.db")
+        cache_tool.main(["--cache", cache, "import", str(bank)])
+        assert "新增1" in capsys.readouterr().out
+
+        out = tmp_path / "out.csv"
+        cache_tool.main(["--cache", cache, "export", str(out)])
+        assert "题目,答案" in out.read_text(encoding="utf-8")
+
+        cache_tool.main(["--cache", cache, "diff", str(out)])
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "相同1条" in captured.err
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+测试答案缓存写后日志
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from api.answer_cache import CacheBackend, CacheDAO
+from api.cache_journal import CacheJournal, process_alive
+
+
+class _Sink:
+    """记录写入内容的测试写入函数"""
+
+    def __init__(self):
+        self.rows = {}
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.fail:
+            return False
+        self.rows.update((row[0], row) for row in rows)
+        return True
+
+
+def _row(i, answer="答案"):
+    return (f"h{i}", f"题目{i}", f"题目{i}", f"{answer}{i}")
+
+
+def _dead_pid() -> int:
+    """一个已退出进程的进程号"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class _MemoryBackend(CacheBackend):
+    """内存中的共享存储"""
+
+    def __init__(self, key):
+        self.key = key
+        self.rows = {}
+
+    def get(self, key_hash):
+        row = self.rows.get(key_hash)
+        return (row[2], row[3]) if row else None
+
+    def put(self, key_hash, question_key, title, answer):
+        self.rows[key_hash] = (key_hash, question_key, title, answer)
+
+    def iter_keys(self):
+        return [(row[1], row[0]) for row in self.rows.values()]
+
+    def iter_items(self, after="", limit=1000):
+        return []
+
+    def count(self):
+        return len(self.rows)
+
+
+@pytest.mark.unit
+class TestCacheJournal:
+    """测试写后日志"""
+
+    def test_append_then_flush(self, tmp_path):
+        """追加只写日志, 刷新后写入数据库并清空待写表"""
+        sink = _Sink()
+        journal = CacheJournal(tmp_path / "c.answers-1.jsonl", sink, 3600)
+        journal.append(_row(1))
+        journal.append(_row(1, "新答案"))
+        assert sink.calls == 0
+        assert journal.get("h1")[3] == "新答案1"
+        assert journal.flush()
+        assert sink.rows["h1"][3] == "新答案1" and len(journal) == 0
+        journal.close()
+        assert not (tmp_path / "c.answers-1.jsonl").exists()
+
+    def test_failed_flush_is_retried(self, tmp_path):
+        """写入失败的记录保留在待写表中"""
+        sink = _Sink()
+        sink.fail = True
+        journal = CacheJournal(tmp_path / "c.answers-1.jsonl", sink, 3600)
+        journal.append(_row(1))
+        assert not journal.flush()
+        assert "h1" in journal
+        sink.fail = False
+        assert journal.flush()
+        assert "h1" in sink.rows
+        journal.close()
+
+    def test_recover_after_crash(self, tmp_path):
+        """启动时重放其他进程遗留的日志, 忽略写了一半的行"""
+        leftover = tmp_path / f"c.answers-{_dead_pid()}.jsonl"
+        lines = [json.dumps(_row(i), ensure_ascii=False) for i in range(3)]
+        leftover.write_text("\n".join(lines) + '\n["h9", "题', encoding="utf8")
+        sink = _Sink()
+        journal = CacheJournal(tmp_path / "c.answers-1.jsonl", sink, 3600)
+        assert sorted(sink.rows) == ["h0", "h1", "h2"]
+        assert not leftover.exists()
+        journal.close()
+
+    def test_live_journal_untouched(self, tmp_path):
+        """仍在运行的其他进程的日志不会被重放或删除"""
+        live = tmp_path / f"c.answers-{os.getppid()}.jsonl"
+        live.write_text(json.dumps(_row(1)) + "\n", encoding="utf8")
+        sink = _Sink()
+        CacheJournal(tmp_path / "c.answers-1.jsonl", sink, 3600).close()
+        assert sink.calls == 0 and live.exists()
+        assert process_alive(os.getpid()) and not process_alive(_dead_pid())
+
+    def test_compaction_keeps_pending(self, tmp_path, monkeypatch):
+        """日志过大时压缩为仅包含未写入记录的新文件"""
+        monkeypatch.setattr(CacheJournal, "COMPACT_SIZE", 1)
+        sink = _Sink()
+        path = tmp_path / "c.answers-1.jsonl"
+        journal = CacheJournal(path, sink, 3600)
+        for i in range(5):
+            journal.append(_row(i))
+        assert journal.flush()
+        assert path.read_text(encoding="utf8") == ""
+        journal.append(_row(7))
+        assert json.loads(path.read_text(encoding="utf8"))[0] == "h7"
+        journal.close()
+
+
+@pytest.mark.unit
+class TestCacheDAOWriteBehind:
+    """测试答案缓存的写后写入"""
+
+    def test_pending_answers_visible(self, tmp_path):
+        """尚未写入数据库的答案可以读取, 并使未命中记录失效"""
+        dao = CacheDAO(tmp_path / "cache.db", lru_size=1)
+        dao.add_negative("题目", "AI", "not_found", 60)
+        dao.add_cache("题目", "答案")
+        dao.add_cache("其他题目", "其他答案")  # 挤出LRU
+        assert dao.get_cache("题目") == "答案"
+        assert dao.get_negative("题目", "AI") is None
+        dao.close()
+
+    def test_journal_replayed_on_open(self, tmp_path):
+        """进程崩溃遗留的日志在下次打开时写入数据库"""
+        path = tmp_path / "cache.db"
+        dao = CacheDAO(path)
+        dao.add_cache("题目", "答案")
+        (journal_file,) = tmp_path.glob(f"cache.db.answers-*-{os.getpid()}.jsonl")
+        # 模拟崩溃: 不刷新直接丢弃日志对象, 并换成其他进程的文件名
+        dao._journal._stop.set()
+        dao._journal._wakeup.set()
+        dao._journal._thread.join()
+        dao._journal._fp.close()
+        dao._journal_finalizer.detach()
+        dao._journal = None
+        dao._conn.close()
+        prefix = journal_file.name.rsplit("-", 1)[0]
+        journal_file.rename(path.with_name(f"{prefix}-{_dead_pid()}.jsonl"))
+
+        reopened = CacheDAO(path, write_behind=False)
+        assert reopened.get_cache("题目") is None
+        reopened.close()
+        reopened = CacheDAO(path)
+        reopened.close()
+        assert CacheDAO(path, write_behind=False).get_cache("题目") == "答案"
+
+    def test_instances_use_own_journal(self, tmp_path, monkeypatch):
+        """同一缓存文件的不同后端各自写入自己的日志, 不会取走其他实例的待写记录"""
+        monkeypatch.setattr(CacheJournal, "COMPACT_SIZE", 1)
+        path = tmp_path / "cache.db"
+        first, second = _MemoryBackend("user-a"), _MemoryBackend("user-b")
+        dao_a = CacheDAO(path, backend=first)
+        dao_a._journal.flush_interval = 3600
+        dao_a.add_cache("题目A", "答案A")
+        dao_b = CacheDAO(path, backend=second)
+        dao_b.add_cache("题目B", "答案B")
+        assert dao_b.flush()
+        assert dao_a.get_cache("题目A") == "答案A"
+        dao_a.close()
+        dao_b.close()
+        assert [row[3] for row in first.rows.values()] == ["答案A"]
+        assert [row[3] for row in second.rows.values()] == ["答案B"]
+        assert not list(tmp_path.glob("*.jsonl"))
+
+    def test_dropped_instance_stops_thread(self, tmp_path):
+        """实例被回收时后台线程随之退出, 未写入的记录留在日志中"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        dao._journal.flush_interval = 3600
+        dao.add_cache("题目", "答案")
+        thread = dao._journal._thread
+        del dao
+        gc.collect()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert list(tmp_path.glob("*.jsonl"))
+        reopened = CacheDAO(tmp_path / "cache.db")
+        assert reopened.get_cache("题目") == "答案"
+        reopened.close()
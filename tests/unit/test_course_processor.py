@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+测试课程处理器按需解析章节列表
+"""
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import api.course_processor as course_processor
+from api.course_processor import CourseProcessor
+from api.decode import CoursePoints
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "html"
+COURSE = {"title": "测试课程", "courseId": "1", "clazzId": "2", "cpi": "3"}
+
+
+def _course_html(chapters: int) -> str:
+    """每个章节单元一个未完成章节的课程"""
+    units = "".join(
+        f'<div class="chapter_unit"><ul><li><div id="cur{i}">'
+        f'<a class="clicktitle">第{i}章</a>'
+        f'<input class="knowledgeJobCount" value="1"/></div></li></ul></div>'
+        for i in range(1, chapters + 1)
+    )
+    return f"<html><body>{units}</body></html>"
+
+
+class FakeChaoxing:
+    """记录访问顺序的超星接口, closed 中的章节第一次访问时未开放"""
+
+    def __init__(self, html, closed=()):
+        self.html = html
+        self.closed = set(closed)
+        self.tiku = SimpleNamespace(DISABLE=False, SUBMIT=True)
+        self.visited = []
+        self.points = None
+        self.parsed_on_first_visit = None
+
+    def get_course_point(self, _courseid, _clazzid, _cpi, lazy=False):
+        assert lazy
+        self.points = CoursePoints(self.html, chunk_size=256)
+        return self.points
+
+    def get_job_list(self, _clazzid, _courseid, _cpi, knowledge_id):
+        if self.parsed_on_first_visit is None:
+            self.parsed_on_first_visit = self.points.complete
+        self.visited.append(knowledge_id)
+        if knowledge_id in self.closed:
+            self.closed.discard(knowledge_id)
+            return [], {"notOpen": True}
+        return [], {}
+
+    def study_emptypage(self, course, point):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(course_processor.time, "sleep", lambda _: None)
+
+
+@pytest.mark.unit
+class TestProcessCourse:
+    """测试课程遍历"""
+
+    def test_starts_before_page_parsed(self):
+        """解析完第一个章节即开始学习, 全部章节按顺序处理"""
+        chaoxing = FakeChaoxing(_course_html(50))
+        progress = []
+        processor = CourseProcessor(
+            chaoxing, progress_callback=lambda m, p: progress.append((m, p))
+        )
+        assert processor.process_course(COURSE) is True
+        assert chaoxing.parsed_on_first_visit is False
+        assert chaoxing.visited == [str(i) for i in range(1, 51)]
+        assert ("处理章节 1/50", 0) in progress and ("处理章节 2/50", 2) in progress
+        assert ("处理章节 50/50", 98) in progress
+
+    def test_rollback(self):
+        """未开放章节回滚到上一章节"""
+        chaoxing = FakeChaoxing(_course_html(4), closed={"3"})
+        assert CourseProcessor(chaoxing).process_course(COURSE) is True
+        assert chaoxing.visited == ["1", "2", "3", "2", "3", "4"]
+
+    def test_empty_course(self):
+        """没有章节的课程直接完成"""
+        chaoxing = FakeChaoxing("<html><body></body></html>")
+        assert CourseProcessor(chaoxing).process_course(COURSE) is True
+        assert chaoxing.visited == []
+
+    def test_fixture_course(self):
+        """样例页面中已完成的章节不请求任务点"""
+        html = (FIXTURES / "course_point.html").read_text(encoding="utf-8")
+        chaoxing = FakeChaoxing(html)
+        assert CourseProcessor(chaoxing).process_course(COURSE) is True
+        assert chaoxing.visited == ["100000002", "100000003", "100000004"]
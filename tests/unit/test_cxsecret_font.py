@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+测试加密字体解析与解密
+"""
+import array
+import base64
+import json
+import re
+import shutil
+from io import BytesIO
+
+import pytest
+from api import cxsecret_font
+from api.cxsecret_font import (
+    FontHashDAO,
+    _hash_glyph_points,
+    build_hash_table,
+    decrypt,
+    font2map,
+    hash_glyph,
+    hash_glyphs,
+    resource_path,
+)
+from api.exceptions import FontDecodeError
+from api.font_decoder import FontDecoder
+
+
+@pytest.fixture
+def font_data_url(encrypted_font):
+    data = re.search(FontDecoder.FONT_BASE64_PATTERN, encrypted_font).group(1)
+    return FontDecoder.FONT_DATA_URL_PREFIX + data
+
+
+@pytest.mark.unit
+class TestFont2Map:
+    """测试字形哈希表的提取"""
+
+    def test_glyph_hashes(self, font_data_url):
+        """只包含 uni 开头且有轮廓的字形, 哈希为32位十六进制"""
+        font_map = font2map(font_data_url)
+        assert sorted(font_map) == [
+            "uni4E00",
+            "uni4F53",
+            "uni52A0",
+            "uni5B57",
+            "uni5BC6",
+        ]
+        assert all(re.fullmatch(r"[0-9a-f]{32}", h) for h in font_map.values())
+        assert len(set(font_map.values())) == len(font_map)
+
+    def test_deterministic(self, font_data_url):
+        """同一字体的结果相同"""
+        assert font2map(font_data_url) == font2map(font_data_url)
+
+    def test_empty_glyph(self):
+        """没有轮廓的字形哈希为空字符串"""
+
+        class Glyph:
+            numberOfContours = 0
+
+        assert hash_glyph(Glyph()) == ""
+
+    def test_invalid_font(self):
+        """无法解析的字体抛出 FontDecodeError"""
+        with pytest.raises(FontDecodeError):
+            font2map(FontDecoder.FONT_DATA_URL_PREFIX + "bm90IGEgZm9udA==")
+        with pytest.raises(FontDecodeError):
+            font2map(FontDecoder.FONT_DATA_URL_PREFIX + "%%%")
+
+
+def _glyph(*contours, flags=None):
+    """由轮廓点列表构造字形"""
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    pen = TTGlyphPen(None)
+    for points in contours:
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+    glyph = pen.glyph()
+    if flags is not None:
+        glyph.flags[: len(flags)] = array.array("B", flags)
+    return glyph
+
+
+@pytest.mark.unit
+class TestHashGlyphs:
+    """测试批量字形哈希与逐点实现一致"""
+
+    def test_fixture_font(self, font_data_url):
+        """样例字体的全部字形"""
+        from fontTools.ttLib import TTFont
+
+        data = base64.b64decode(font_data_url.split(",", 1)[1])
+        table = TTFont(BytesIO(data), lazy=False)["glyf"]
+        glyphs = [table.glyphs[name] for name in table.glyphOrder]
+        assert hash_glyphs(glyphs) == [_hash_glyph_points(g) for g in glyphs]
+        assert any(hash_glyphs(glyphs))
+
+    def test_synthetic(self):
+        """负数, int16 边界, 多轮廓, 标志高位与空字形"""
+        glyphs = [
+            _glyph([(0, 0), (10, 0), (10, 10)]),
+            _glyph([(-32768, 32767), (-1, -10), (999, -999)]),
+            _glyph([(1, 2), (3, 4), (5, 6)], [(-7, 8), (9, -10), (0, 0), (1, 1)]),
+            _glyph([(5, 5), (6, 6), (7, 7)], flags=[0x31, 0x00, 0xFE]),
+            _glyph(),
+        ]
+        expected = [_hash_glyph_points(g) for g in glyphs]
+        assert hash_glyphs(glyphs) == expected
+        assert [hash_glyph(g) for g in glyphs] == expected
+        assert expected[-1] == "" and len(set(expected)) == len(expected)
+
+    def test_fallback(self):
+        """非整数坐标与不规则轮廓逐点计算, 不影响同批其他字形"""
+        fractional = _glyph([(0, 0), (10, 0), (10, 10)])
+        fractional.coordinates[1] = (10.5, 0)
+        unordered = _glyph([(0, 0), (1, 0), (1, 1)], [(2, 2), (3, 2), (3, 3)])
+        unordered.endPtsOfContours = [5, 2]
+        truncated = _glyph([(0, 0), (10, 0), (10, 10)])
+        truncated.flags = truncated.flags[:2]
+        glyphs = [_glyph([(4, 4), (5, 5), (6, 4)]), fractional, unordered]
+        assert hash_glyphs(glyphs) == [_hash_glyph_points(g) for g in glyphs]
+        # 点数据不足时与逐点实现一样报错
+        with pytest.raises(IndexError):
+            hash_glyphs([truncated])
+
+
+@pytest.mark.unit
+class TestDecrypt:
+    """测试解密"""
+
+    def test_decrypt(self, font_data_url):
+        """字体中的字形还原为原始字符, 康熙部首替换为对应汉字"""
+        font_map = font2map(font_data_url)
+        assert decrypt(font_map, "字体加密一") == "题目答案一"
+
+    def test_unknown_chars_kept(self, font_data_url):
+        """字体中没有或哈希表中没有的字符保持原样"""
+        font_map = font2map(font_data_url)
+        assert decrypt(font_map, "abc 普通") == "abc 普通"
+        assert decrypt({"uni4E2D": "0" * 32}, "中") == "中"
+
+    def test_radicals(self):
+        """未加密的康熙部首同样被替换"""
+        assert decrypt({}, "⼈⼝⻢") == "人口马"
+
+
+@pytest.mark.unit
+class TestFontHashDAO:
+    """测试字体哈希表"""
+
+    def test_lookup(self):
+        """字符与哈希双向查找"""
+        dao = cxsecret_font.fonthash_dao
+        char, font_hash = next(
+            (c, h) for c, h in dao.char_map.items() if c.startswith("uni")
+        )
+        assert dao.find_hash(char) == font_hash
+        assert dao.find_char(font_hash) is not None
+        assert dao.find_char("0" * 32) is None
+
+    def test_missing_file(self):
+        """映射表不存在时抛出 FontDecodeError"""
+        with pytest.raises(FontDecodeError):
+            FontHashDAO("resource/not_exists.json")
+
+    def test_lazy_load(self):
+        """创建时不加载映射表"""
+        dao = FontHashDAO()
+        assert dao._table is None and dao._char_map is None
+        dao.find_char("0" * 32)
+        assert dao._table is not None and dao._char_map is None
+
+
+@pytest.fixture(scope="module")
+def json_table():
+    with open(resource_path("resource/font_map_table.json"), encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+@pytest.mark.unit
+class TestFontHashTable:
+    """测试字体哈希二进制表"""
+
+    def test_up_to_date(self, json_table):
+        """resource 中的二进制表与JSON映射表一致"""
+        with open(resource_path("resource/font_map_table.bin"), "rb") as fp:
+            assert fp.read() == build_hash_table(json_table)
+
+    def test_parity(self, json_table):
+        """与反转JSON映射表得到的字典查找结果相同, 只包含 uni 字形"""
+        dao = FontHashDAO()
+        for font_hash, char in {h: c for c, h in json_table.items()}.items():
+            expected = char if re.fullmatch(r"uni[0-9A-F]+", char) else None
+            assert dao.find_char(font_hash) == expected
+        assert dao.find_char("f" * 32) is None
+        assert dao.find_char("not a hash") is None
+
+    def test_duplicate_hash(self):
+        """多个字形的哈希相同时以最后一个为准"""
+        dao = FontHashDAO.from_map(
+            {
+                "uni4E00": "1" * 32,
+                "uni4E8C": "1" * 32,
+                "uni4E09": "2" * 32,
+                "A": "2" * 32,
+            }
+        )
+        assert dao.find_codepoint("1" * 32) == 0x4E8C
+        assert dao.find_codepoint("2" * 32) is None
+
+    @pytest.mark.parametrize("content", [b"", b"CXFT", b"XXXX" + bytes(8)])
+    def test_invalid_table(self, tmp_path, json_table, content):
+        """二进制表无效时使用JSON映射表"""
+        shutil.copy(resource_path("resource/font_map_table.json"), tmp_path / "t.json")
+        (tmp_path / "t.bin").write_bytes(content)
+        dao = FontHashDAO(str(tmp_path / "t.json"))
+        char, font_hash = "uni4E08", json_table["uni4E08"]
+        assert dao.find_char(font_hash) == char
+        assert dao._table is None
+
+    def test_table_only(self, tmp_path):
+        """只有二进制表时同样可以查找"""
+        (tmp_path / "t.bin").write_bytes(build_hash_table({"uni4E00": "a" * 32}))
+        dao = FontHashDAO(str(tmp_path / "t.json"))
+        assert dao.find_char("a" * 32) == "uni4E00"
+
+    def test_invalid_hash(self):
+        """哈希不是32位十六进制时抛出 ValueError"""
+        with pytest.raises(ValueError):
+            build_hash_table({"uni4E00": "abcd"})
+
+    def test_fingerprint(self, tmp_path):
+        """摘要随映射表内容变化"""
+        first = FontHashDAO.from_map({"uni4E00": "a" * 32})
+        second = FontHashDAO.from_map({"uni4E00": "b" * 32})
+        assert first.fingerprint != second.fingerprint
+        (tmp_path / "t.json").write_text('{"uni4E00": "' + "a" * 32 + '"}')
+        assert FontHashDAO(str(tmp_path / "t.json")).fingerprint != first.fingerprint
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+测试页面解析, lxml 实现与 BeautifulSoup 实现的结果必须相同
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+from api import decode
+from api.decode import (
+    PARSER_BS4,
+    PARSER_LXML,
+    CoursePoints,
+    decode_course_card,
+    decode_course_folder,
+    decode_course_list,
+    decode_course_point,
+    decode_questions_info,
+    iter_course_points,
+)
+from api.exceptions import FontDecodeError
+from api.font_decoder import FontDecoder
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "html"
+CORPUS = json.loads((FIXTURES / "corpus.json").read_text(encoding="utf-8"))
+# 设置该环境变量时重新生成 expected/ 中的解析结果
+UPDATE_EXPECTED = bool(os.environ.get("UPDATE_DECODE_FIXTURES"))
+DECODERS = {
+    "course_list": decode_course_list,
+    "course_folder": decode_course_folder,
+    "course_point": decode_course_point,
+    "questions": decode_questions_info,
+}
+
+
+def load(name: str) -> str:
+    return (FIXTURES / f"{name}.html").read_text(encoding="utf-8")
+
+
+def font_style(html: str) -> str:
+    start = html.index('<style id="cxSecretStyle">') + len('<style id="cxSecretStyle">')
+    return html[start : html.index("</style>", start)]
+
+
+@pytest.mark.unit
+class TestDecodeCorpus:
+    """测试样例页面的解析结果与记录的结果一致"""
+
+    @pytest.mark.parametrize("entry", CORPUS, ids=[e["name"] for e in CORPUS])
+    def test_expected(self, entry, request):
+        """解析结果与 expected/ 中的记录相同"""
+        if entry.get("font"):
+            request.getfixturevalue("encrypted_font")
+        result = getattr(decode, entry["decoder"])(load(entry["name"]))
+        # 元组等转换为 JSON 中的类型后比较
+        result = json.loads(json.dumps(result, ensure_ascii=False))
+        path = FIXTURES / "expected" / f"{entry['name']}.json"
+        if UPDATE_EXPECTED:
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(
+                json.dumps(result, ensure_ascii=False, indent=2) + "\n",
+                encoding="utf-8",
+            )
+        assert result == json.loads(path.read_text(encoding="utf-8"))
+
+    @pytest.mark.parametrize(
+        "entry",
+        [e for e in CORPUS if e["decoder"] != "decode_course_card"],
+        ids=lambda e: e["name"],
+    )
+    def test_parity(self, entry, request):
+        """lxml 与 BeautifulSoup 两种解析方式的结果相同"""
+        if entry.get("font"):
+            request.getfixturevalue("encrypted_font")
+        html = load(entry["name"])
+        decoder = getattr(decode, entry["decoder"])
+        assert decoder(html, parser=PARSER_LXML) == decoder(html, parser=PARSER_BS4)
+
+
+@pytest.mark.unit
+class TestDecodeParity:
+    """测试两种解析方式的一致性"""
+
+    @pytest.mark.parametrize("name", ["course_list", "course_folder", "course_point"])
+    def test_empty_page(self, name):
+        """空页面"""
+        decoder = DECODERS[name]
+        assert decoder("", parser=PARSER_LXML) == decoder("", parser=PARSER_BS4)
+
+    def test_encoding_declaration(self):
+        """带有XML编码声明的页面"""
+        html = '<?xml version="1.0" encoding="utf-8"?>' + load("course_folder")
+        assert decode_course_folder(html, parser=PARSER_LXML) == decode_course_folder(
+            html, parser=PARSER_BS4
+        )
+
+    def test_missing_form(self):
+        """没有表单的题目页面两种实现都抛出 AttributeError"""
+        for parser in (PARSER_LXML, PARSER_BS4):
+            with pytest.raises(AttributeError):
+                decode_questions_info("<html><body></body></html>", parser=parser)
+
+
+@pytest.mark.unit
+class TestDecodeLxml:
+    """测试 lxml 实现的解析结果"""
+
+    def test_course_list(self):
+        """跳过未开放课程, 描述缺失时为空字符串"""
+        courses = decode_course_list(load("course_list"), parser=PARSER_LXML)
+        assert [c["courseId"] for c in courses] == [
+            "230000001",
+            "230000002",
+            "230000005",
+        ]
+        assert courses[0]["cpi"] == "300000001"
+        assert courses[0]["desc"] == "2024-2025 第一学期"
+        assert courses[1]["title"] == "大学英语 & 写作"
+        assert courses[1]["desc"] == ""
+
+    def test_course_point(self):
+        """锁定、已完成与任务数"""
+        result = decode_course_point(load("course_point"), parser=PARSER_LXML)
+        assert result["hasLocked"] is True
+        points = {p["id"]: p for p in result["points"]}
+        assert list(points) == [f"10000000{i}" for i in range(1, 6)]
+        assert points["100000001"]["jobCount"] == "2"
+        assert points["100000001"]["has_finished"] is True
+        assert points["100000002"]["title"] == "1.2 学习方法"
+        assert points["100000003"]["jobCount"] == 1
+        assert points["100000004"]["need_unlock"] is True
+        assert points["100000004"]["title"] == "2.1 锁定章节"
+
+    def test_questions(self):
+        """表单字段与题目"""
+        result = decode_questions_info(load("questions"), parser=PARSER_LXML)
+        assert "answer501" not in result
+        assert result["courseId"] == "230000001"
+        assert result["enc_work"] == "abc&def"
+        first = result["questions"][0]
+        assert first["type"] == "single"
+        assert first["options"] == "A 鲨鱼\nB 鲸鱼\nC金枪鱼"
+        assert result["answerwqbid"].startswith("501,502,")
+
+    def test_default_parser(self, monkeypatch):
+        """未指定时使用模块的 PARSER, 未知的解析方式抛出 ValueError"""
+        html = load("course_folder")
+        monkeypatch.setattr(decode, "PARSER", PARSER_BS4)
+        assert decode_course_folder(html) == decode_course_folder(
+            html, parser=PARSER_LXML
+        )
+        with pytest.raises(ValueError):
+            decode_course_folder(html, parser="html5lib")
+
+
+def nested_course() -> str:
+    """最后一个章节单元中嵌套了一个完整的章节单元"""
+    html = load("course_point")
+    empty = '<div class="chapter_unit"></div>'
+    unit = html[html.index('<div class="chapter_unit">') : html.index(empty)]
+    extra = (
+        '<ul><li><div id="cur100000009"><a class="clicktitle">附录</a></div></li></ul>'
+    )
+    return html.replace(empty, f'<div class="x chapter_unit">{unit}{extra}</div>')
+
+
+@pytest.mark.unit
+class TestIncrementalCoursePoint:
+    """测试章节列表的增量解析"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 7, 13, 64, 64 * 1024])
+    def test_parity(self, chunk_size):
+        """分块大小不影响结果, 与整页解析相同"""
+        html = load("course_point")
+        expected = decode_course_point(html)["points"]
+        assert len(expected) == 5
+        assert list(iter_course_points(html, chunk_size)) == expected
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 13, 64 * 1024])
+    def test_nested_units(self, chunk_size):
+        """嵌套的章节单元按文档顺序产出, 与整页解析一样随外层单元重复出现"""
+        html = nested_course()
+        expected = decode_course_point(html, parser=PARSER_BS4)["points"]
+        assert len(expected) == 5 + 6 + 5
+        assert list(iter_course_points(html, chunk_size)) == expected
+
+    @pytest.mark.parametrize("chunk_size", range(1, 40))
+    def test_markup_not_split(self, chunk_size):
+        """分块不会切开脚本、样式、注释与属性值中的标记"""
+        html = (
+            load("course_point")
+            .replace(
+                "<script>x()</script>",
+                '<script>if (a<b && c>d) {x("<b>")}</script>'
+                "<!-- a > b <div> --><style>p>a{}</style>",
+            )
+            .replace('href="javascript:;"', 'href="javascript:;" title="a>b"')
+        )
+        expected = decode_course_point(html, parser=PARSER_BS4)["points"]
+        assert expected[3]["need_unlock"] is True
+        assert list(iter_course_points(html, chunk_size)) == expected
+
+    @pytest.mark.parametrize("html", ["", "<html><body></body></html>"])
+    def test_empty_page(self, html):
+        """空页面没有章节"""
+        assert list(iter_course_points(html)) == []
+        points = CoursePoints(html)
+        assert not points
+        assert len(points) == 0
+        assert points.has_locked is False
+
+    def test_lazy_access(self):
+        """按下标访问时才继续解析, 已解析的章节可以回退访问"""
+        html = load("course_point")
+        expected = decode_course_point(html)
+        points = CoursePoints(html, chunk_size=64)
+        assert points.parsed == 0
+        assert points[1] == expected["points"][1]
+        assert points.parsed == 3
+        assert points[0] == expected["points"][0]
+        assert points.parsed == 3
+        assert not points.complete
+        assert points[4] == expected["points"][4]
+        assert points.complete
+        with pytest.raises(IndexError):
+            points[5]
+        assert list(points) == expected["points"]
+        assert points[-1] == expected["points"][-1]
+
+    def test_estimated_total(self):
+        """解析完成前按章节点id预估总数, 解析完成后为实际数量"""
+        html = load("course_point")
+        expected = decode_course_point(html)["points"]
+        points = CoursePoints(html, chunk_size=64)
+        assert points.parsed == 0 and points.total == len(expected)
+        points[0]
+        assert not points.complete and points.total == len(expected)
+        assert len(points) == points.total == len(expected)
+        assert CoursePoints("").total == 0
+
+    def test_has_locked(self):
+        """遇到需要解锁的章节即停止解析"""
+        html = load("course_point")
+        points = CoursePoints(html)
+        assert points.has_locked is True
+        assert points.parsed == 4
+        assert not points.complete
+        unlocked = html.replace("解锁", "")
+        assert CoursePoints(unlocked).has_locked is False
+
+
+@pytest.mark.unit
+class TestFontDecoding:
+    """测试加密字体的批量解码"""
+
+    def test_questions_decoded(self, encrypted_font):
+        """标题与选项全部解码, 选项在解码后排序"""
+        result = decode_questions_info(encrypted_font, parser=PARSER_LXML)
+        first, second, third = result["questions"]
+        assert first["title"] == "【单选题】题目：下列哪一项正确"
+        assert first["options"] == "A 题目\nB 答案一\nC 普通选项"
+        assert second["title"] == (
+            '【多选题】答案<img src="https://p.ananas.chaoxing.com/a.png">一题'
+        )
+        assert second["options"] == "A 一\nB 案题"
+        assert third["title"] == "【判断题】目"
+
+    def test_from_style(self, encrypted_font):
+        """从样式文本创建的解码器与从整个页面创建的结果相同"""
+        texts = ["字体", "加密一", "", "普通文本"]
+        legacy = FontDecoder(encrypted_font)
+        decoder = FontDecoder.from_style(font_style(encrypted_font))
+        assert decoder.decode_many(texts) == [legacy.decode(t) for t in texts]
+        assert decoder.decode_many([]) == []
+
+    def test_decode_many_with_newline(self, encrypted_font):
+        """字符串包含换行时逐个解码"""
+        decoder = FontDecoder.from_style(font_style(encrypted_font))
+        assert decoder.decode_many(["字\n体", "密"]) == ["题\n目", "案"]
+
+    def test_invalid_font(self):
+        """字体无法解析时解码抛出 FontDecodeError"""
+        decoder = FontDecoder.from_style("@font-face{src:url('data:,')}")
+        with pytest.raises(FontDecodeError):
+            decoder.decode_many(["字"])
+
+
+@pytest.mark.unit
+class TestDecodeCourseCard:
+    """测试任务点页面中 mArg 的提取"""
+
+    def test_titles_with_spaces(self):
+        """字符串中的空格保持原样"""
+        jobs, info = decode_course_card(load("course_card"))
+        assert [job["jobid"] for job in jobs] == [
+            "1700000000001",
+            "1700000000002",
+            "work-3",
+            "r4",
+        ]
+        assert jobs[0]["name"] == "1.1 Introduction to Marxism.mp4"
+        assert jobs[0]["objectid"] == "obj video 1"
+        assert jobs[1]["jtoken"] == "jt 2"
+        assert jobs[3]["title"] == '阅读 材料："马克思 主义"'
+        assert info["ktoken"] == "kt 1"
+        assert info["knowledgeid"] == 100000001
+
+    def test_terminator_inside_string(self):
+        """字符串中的 "};" 不会截断对象"""
+        html = '<script>mArg = {"defaults": {"ktoken": "a };b"}};</script>'
+        jobs, info = decode_course_card(html)
+        assert jobs == []
+        assert info["ktoken"] == "a };b"
+
+    def test_multiline(self):
+        """对象跨越多行"""
+        html = '<script>\nmArg =\n{"defaults":\n  {"ktoken": "k"},\n "attachments": []\n};</script>'
+        assert decode_course_card(html)[1]["ktoken"] == "k"
+
+    def test_no_marg(self):
+        """没有 mArg 对象或章节未开放"""
+        assert decode_course_card('<script>var mArg = "";</script>') == ([], {})
+        assert decode_course_card("<html></html>") == ([], {})
+        assert decode_course_card("<p>章节未开放</p>mArg = {}") == (
+            [],
+            {"notOpen": True},
+        )
+
+    def test_invalid_json(self):
+        """无法解析时尝试下一个 mArg, 全部失败时抛出异常"""
+        valid = json.dumps({"defaults": {"ktoken": "k"}, "attachments": []})
+        html = f"mArg = {{broken}}; mArg={valid};"
+        assert decode_course_card(html)[1]["ktoken"] == "k"
+        with pytest.raises(json.JSONDecodeError):
+            decode_course_card("mArg = {broken};")
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+测试加密字体解析缓存
+"""
+import base64
+import os
+import re
+from io import BytesIO
+
+import pytest
+from api import cxsecret_font
+from api.answer_metrics import AnswerMetrics
+from api.cxsecret_font import (
+    FontHashDAO,
+    compile_table,
+    decrypt,
+    font2chars,
+    font2map,
+)
+from api.exceptions import FontDecodeError
+from api.font_cache import FontMapCache
+from api.font_decoder import FontDecoder
+
+
+@pytest.fixture
+def font_data(encrypted_font):
+    data = re.search(FontDecoder.FONT_BASE64_PATTERN, encrypted_font).group(1)
+    return base64.b64decode(data)
+
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    """记录 font2map 的调用次数"""
+    calls = []
+    original = cxsecret_font.font2map
+
+    def counted(font_data, glyphs=None):
+        calls.append(1)
+        return original(font_data, glyphs)
+
+    monkeypatch.setattr(cxsecret_font, "font2map", counted)
+    return calls
+
+
+@pytest.mark.unit
+class TestFont2Chars:
+    """测试加密字符映射"""
+
+    def test_parity(self, font_data):
+        """与逐字查找的 decrypt 结果相同"""
+        font_map = font2map(BytesIO(font_data))
+        chars = font2chars(font_map)
+        assert chars == {"字": "题", "体": "目", "加": "答", "密": "案", "一": "⼀"}
+        for text in ("字体加密一", "abc 普通", "⼈⼝⻢", ""):
+            assert text.translate(compile_table(chars)) == decrypt(font_map, text)
+
+    def test_padded_names_ignored(self, monkeypatch):
+        """decrypt 不会查找的补零字形名称不出现在映射中"""
+        dao = FontHashDAO.from_map({"uni4E00": "1" * 32, "uni0041": "2" * 32})
+        monkeypatch.setattr(cxsecret_font, "fonthash_dao", dao)
+        font_map = {"uni4E8C": "1" * 32, "uni0042": "2" * 32, "uni43": "2" * 32}
+        assert font2chars(font_map) == {"二": "一", "C": "A"}
+        table = compile_table(font2chars(font_map))
+        assert "二BC".translate(table) == decrypt(font_map, "二BC")
+
+    def test_radicals_folded(self, monkeypatch):
+        """康熙部首替换合并在转换表中, 加密字符本身是部首时以字体为准"""
+        originals = {"uni4E00": "1" * 32, "uni2F08": "2" * 32, "uni4EBA": "3" * 32}
+        monkeypatch.setattr(
+            cxsecret_font, "fonthash_dao", FontHashDAO.from_map(originals)
+        )
+        # 字 -> 一, 体 -> ⼈(部首), ⼝(部首) -> 人
+        font_map = {"uni5B57": "1" * 32, "uni4F53": "2" * 32, "uni2F1D": "3" * 32}
+        table = compile_table(font2chars(font_map))
+        text = "字体⼝⼀⻢abc"
+        assert text.translate(table) == decrypt(font_map, text) == "一人人一马abc"
+
+
+@pytest.mark.unit
+class TestFontMapCache:
+    """测试字体解析缓存"""
+
+    def test_memory_hit(self, font_data, parse_count):
+        """同一字体只解析一次"""
+        metrics = AnswerMetrics()
+        cache = FontMapCache(metrics=metrics)
+        first = cache.get_table(font_data)
+        assert cache.get_table(font_data) is first
+        assert len(parse_count) == 1
+        fonts = metrics.snapshot()["fonts"]
+        assert (fonts["hit"], fonts["disk_hit"], fonts["miss"]) == (1, 0, 1)
+        assert fonts["hit_rate"] == 0.5
+
+    def test_disk_hit(self, tmp_path, font_data, parse_count):
+        """其他进程保存到磁盘的结果无需再次解析"""
+        FontMapCache(directory=tmp_path, metrics=AnswerMetrics()).get_table(font_data)
+        metrics = AnswerMetrics()
+        cache = FontMapCache(directory=tmp_path, metrics=metrics)
+        assert "字".translate(cache.get_table(font_data)) == "题"
+        assert len(parse_count) == 1
+        assert metrics.snapshot()["fonts"]["disk_hit"] == 1
+        assert list(tmp_path.iterdir()) == [tmp_path / f"{cache.key(font_data)}.json"]
+
+    def test_corrupt_file(self, tmp_path, font_data, parse_count):
+        """磁盘缓存损坏时重新解析并覆盖"""
+        cache = FontMapCache(directory=tmp_path, metrics=AnswerMetrics())
+        path = tmp_path / f"{cache.key(font_data)}.json"
+        path.write_text("{broken", encoding="utf8")
+        assert "字".translate(cache.get_table(font_data)) == "题"
+        assert len(parse_count) == 1
+        cache.clear()
+        cache.get_table(font_data)
+        assert len(parse_count) == 1
+
+    def test_prune_oldest(self, tmp_path, font_data):
+        """磁盘缓存超过文件数上限时删除最早的文件"""
+        cache = FontMapCache(directory=tmp_path, metrics=AnswerMetrics(), max_files=3)
+        for i in range(5):
+            path = tmp_path / f"old{i}.json"
+            path.write_text("{}", encoding="utf8")
+            os.utime(path, (1000 + i, 1000 + i))
+        cache.get_table(font_data)
+        names = sorted(p.name for p in tmp_path.iterdir())
+        assert names == sorted(
+            ["old3.json", "old4.json", f"{cache.key(font_data)}.json"]
+        )
+
+        unlimited = FontMapCache(directory=tmp_path, max_files=0)
+        (tmp_path / "extra.json").write_text("{}", encoding="utf8")
+        assert unlimited.prune() == 0
+
+    def test_key_depends_on_hash_table(self, monkeypatch, font_data):
+        """字体哈希表不同时缓存键不同"""
+        key = FontMapCache.key(font_data)
+        assert key == FontMapCache.key(font_data)
+        monkeypatch.setattr(
+            cxsecret_font, "fonthash_dao", FontHashDAO.from_map({"uni4E00": "1" * 32})
+        )
+        assert FontMapCache.key(font_data) != key
+
+    def test_lru_size(self, font_data, parse_count):
+        """超出容量时淘汰最久未使用的字体, 解析失败的字体不缓存"""
+        cache = FontMapCache(maxsize=1, metrics=AnswerMetrics())
+        other = font_data + b"\0"  # 内容不同的同一字体
+        for data in (font_data, other, other, font_data):
+            cache.get_table(data)
+        assert len(parse_count) == 3
+        with pytest.raises(FontDecodeError):
+            cache.get_table(b"not a font")
+        assert len(cache) == 1
+
+    def test_decoder_uses_cache(self, monkeypatch, encrypted_font, parse_count):
+        """解码器从缓存获取映射"""
+        from api import font_decoder
+
+        monkeypatch.setattr(
+            font_decoder, "FONT_CACHE", FontMapCache(metrics=AnswerMetrics())
+        )
+        style = encrypted_font[encrypted_font.index("<style") :]
+        for _ in range(3):
+            assert FontDecoder.from_style(style).decode("字体") == "题目"
+        assert len(parse_count) == 1
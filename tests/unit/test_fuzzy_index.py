@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+测试近似题目索引
+"""
+import pytest
+from api.answer_cache import CacheDAO
+from api.answer_check import check_options
+from api.fuzzy_index import FuzzyIndex
+
+
+@pytest.mark.unit
+class TestFuzzyIndex:
+    """测试MinHash LSH索引"""
+
+    def test_find_near_duplicate(self):
+        """措辞略有不同的题目可以被找到"""
+        index = FuzzyIndex()
+        index.add("下列关于马克思主义基本原理的说法正确的是", "a")
+        index.add("中华人民共和国成立于哪一年", "b")
+        ref, score = index.query("下列关于马克思主义基本原理的叙述正确的是", 0.8)
+        assert ref == "a"
+        assert 0.8 <= score < 1
+
+    @pytest.mark.parametrize(
+        "cached, question",
+        [
+            (
+                "关于社会主义核心价值观，下列说法中，正确的是（ ）",
+                "关于社会主义核心价值观，下列说法中，错误的是（ ）",
+            ),
+            ("下列选项中属于我国四大发明的是", "下列选项中不属于我国四大发明的是"),
+            ("以下哪种情况能够适用该条款的规定", "以下哪种情况不能够适用该条款的规定"),
+            (
+                "中华人民共和国成立于1949年的哪一天",
+                "中华人民共和国成立于1950年的哪一天",
+            ),
+            ("第三次全国人口普查开始于哪一年", "第四次全国人口普查开始于哪一年"),
+        ],
+    )
+    def test_reject_opposite_question(self, cached, question):
+        """差异中含有正误词、否定词或数字的题目不视为近似题目"""
+        index = FuzzyIndex()
+        index.add(cached, "a")
+        assert index.query(question, 0.5) is None
+        assert index.query(cached, 0.5)[0] == "a"
+
+    def test_threshold(self):
+        """相似度低于阈值时返回None"""
+        index = FuzzyIndex()
+        index.add("中华人民共和国成立于哪一年", "b")
+        assert index.query("光合作用发生在植物细胞的哪个部位", 0.5) is None
+
+    def test_merge_keeps_entries(self):
+        """合并进有序数组后仍可查到, 更新后旧标题失效"""
+        index = FuzzyIndex()
+        index.add_many((f"第{i}题题目内容示例文本", i) for i in range(2000))
+        assert len(index) == 2000
+        assert index.query("第1234题题目内容示例文本", 0.99)[0] == 1234
+
+        index.add("完全不同的一道新题目内容", 1234)
+        assert index.query("第1234题题目内容示例文本", 0.99) is None
+        assert index.query("完全不同的一道新题目内容", 0.99)[0] == 1234
+
+
+@pytest.mark.unit
+class TestCacheDAOFindSimilar:
+    """测试缓存近似查找"""
+
+    def test_find_similar(self, tmp_path):
+        """已有条目和之后写入的条目都能被近似查找"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        dao.add_cache("下列关于光合作用的说法正确的是", "A\nB")
+        title, answer, score = dao.find_similar("下列关于光合作用的叙述正确的是", 0.8)
+        assert title == "下列关于光合作用的说法正确的是"
+        assert answer == "A\nB"
+
+        dao.add_cache("细胞膜的主要成分是什么", "脂质和蛋白质")
+        assert dao.find_similar("细胞膜的主要成份是什么", 0.8)[1] == "脂质和蛋白质"
+        dao.close()
+
+    def test_opposite_question_not_reused(self, tmp_path):
+        """问"错误的是"时不会复用"正确的是"的答案, 即使答案在当前选项中"""
+        dao = CacheDAO(tmp_path / "cache.db")
+        dao.add_cache("关于中国共产党的性质，下列说法中，正确的是（ ）", "先锋队")
+        question = "关于中国共产党的性质，下列说法中，错误的是（ ）"
+        assert check_options("先锋队", "A 先锋队\nB 领导核心")
+        assert dao.find_similar(question, 0.9) is None
+        dao.close()
+
+
+@pytest.mark.unit
+class TestCheckOptions:
+    """测试答案与选项的对应校验"""
+
+    def test_all_parts_in_options(self):
+        options = "A 脂质和蛋白质\nB 糖类\nC 核酸"
+        assert check_options("脂质和蛋白质", options)
+        assert check_options("糖类\n核酸", options)
+
+    def test_part_missing(self):
+        options = "A 脂质和蛋白质\nB 糖类\nC 核酸"
+        assert not check_options("淀粉", options)
+        assert not check_options("糖类\n淀粉", options)
+        assert not check_options("糖类", "")
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+测试字形轮廓近似匹配
+"""
+import copy
+import re
+
+import numpy as np
+import pytest
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+from api import cxsecret_font
+from api.cxsecret_font import FontHashDAO, font2chars, font2map, hash_glyph
+from api.font_decoder import FontDecoder
+from api.glyph_outline import (
+    OUTLINE_DTYPE,
+    GlyphOutlineIndex,
+    build_outline_records,
+    outline_vector,
+)
+from api.logger import logger
+
+SQUARE = [(0, 0), (1000, 0), (1000, 1000), (0, 1000)]
+TRIANGLE = [(0, 0), (1000, 0), (500, 900)]
+
+
+def _glyph(*contours):
+    """由轮廓点列表构造字形"""
+    pen = TTGlyphPen(None)
+    for points in contours:
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+    return pen.glyph()
+
+
+def _moved(points, dx=0, dy=0, scale=1):
+    return [(x * scale + dx, y * scale + dy) for x, y in points]
+
+
+@pytest.fixture
+def fixture_glyphs(encrypted_font):
+    """样例字体的字形与原始字符码位"""
+    data = re.search(FontDecoder.FONT_BASE64_PATTERN, encrypted_font).group(1)
+    glyphs = {}
+    font_map = font2map(FontDecoder.FONT_DATA_URL_PREFIX + data, glyphs)
+    originals = {
+        name: cxsecret_font.fonthash_dao.find_codepoint(h)
+        for name, h in font_map.items()
+    }
+    return font_map, glyphs, originals
+
+
+@pytest.mark.unit
+class TestOutlineVector:
+    """测试轮廓归一化"""
+
+    def test_translation_and_scale(self):
+        """平移与等比缩放后的轮廓相同"""
+        base = outline_vector(_glyph(SQUARE, TRIANGLE))
+        moved = outline_vector(
+            _glyph(_moved(SQUARE, 30, -20, 3), _moved(TRIANGLE, 30, -20, 3))
+        )
+        assert base.shape == (64,) and base.dtype == np.float32
+        np.testing.assert_allclose(base, moved, atol=1e-6)
+        assert 0 <= base.min() and base.max() <= 1
+
+    def test_empty(self):
+        """没有轮廓或轮廓长度为0的字形没有结果"""
+        assert outline_vector(_glyph()) is None
+        assert outline_vector(_glyph([(5, 5), (5, 5), (5, 5)])) is None
+
+
+@pytest.mark.unit
+class TestGlyphOutlineIndex:
+    """测试轮廓索引查询"""
+
+    @pytest.fixture
+    def index(self):
+        records = build_outline_records(
+            [0x4E00, 0x4E8C, 0x4E09],
+            [_glyph(SQUARE), _glyph(TRIANGLE), _glyph(SQUARE, TRIANGLE), _glyph()],
+        )
+        return GlyphOutlineIndex.from_records(records)
+
+    def test_nearest(self, index):
+        """轻微改动坐标的字形匹配到原字符, 差异大的字形没有结果"""
+        square = _glyph([(0, 0), (1003, 0), (1000, 998), (0, 1000)])
+        changed = _glyph([(0, 0), (1000, 0), (1000, 300), (0, 1000)])
+        results = index.match([changed, square, _glyph(), _glyph(TRIANGLE)])
+        assert results[0] is None and results[2] is None
+        assert results[1][0] == 0x4E00 and 0.5 < results[1][1] < 1
+        assert results[3] == (0x4E8C, pytest.approx(1.0))
+
+    def test_query_batches(self, index, monkeypatch):
+        """分批查询的结果与输入顺序一致"""
+        monkeypatch.setattr(GlyphOutlineIndex, "QUERY_BATCH", 2)
+        glyphs = [_glyph(SQUARE), _glyph(TRIANGLE), _glyph(SQUARE, TRIANGLE)] * 2
+        results = index.match(glyphs)
+        assert [r[0] for r in results] == [0x4E00, 0x4E8C, 0x4E09] * 2
+
+    def test_file(self, tmp_path):
+        """索引文件在首次查询时加载, 不存在或无效时索引为空"""
+        path = tmp_path / "index.npy"
+        np.save(path, build_outline_records([0x4E00], [_glyph(SQUARE)]))
+        index = GlyphOutlineIndex(path)
+        assert index._records is None
+        assert index.match([_glyph(SQUARE)])[0][0] == 0x4E00
+        assert len(index) == 1
+
+        np.save(tmp_path / "bad.npy", np.zeros(3))
+        for bad in (tmp_path / "missing.npy", tmp_path / "bad.npy", None):
+            empty = GlyphOutlineIndex(bad)
+            assert len(empty) == 0 and empty.match([_glyph(SQUARE)]) == [None]
+        assert GlyphOutlineIndex(tmp_path / "missing.npy").fingerprint == ""
+        assert GlyphOutlineIndex().fingerprint == ""
+        assert index.fingerprint not in (
+            "",
+            GlyphOutlineIndex(tmp_path / "bad.npy").fingerprint,
+        )
+
+    def test_fingerprint_without_loading(self, tmp_path):
+        """摘要直接由文件内容计算, 不加载索引, 内容不同时摘要不同"""
+        path = tmp_path / "index.npy"
+        np.save(path, build_outline_records([0x4E00], [_glyph(SQUARE)]))
+        index = GlyphOutlineIndex(path)
+        fingerprint = index.fingerprint
+        assert fingerprint and index._records is None
+
+        np.save(path, build_outline_records([0x4E8C], [_glyph(SQUARE)]))
+        assert GlyphOutlineIndex(path).fingerprint != fingerprint
+        records = build_outline_records([0x4E00], [_glyph(SQUARE)])
+        assert GlyphOutlineIndex.from_records(records).fingerprint
+        assert GlyphOutlineIndex.from_records(records[:0]).fingerprint == ""
+
+
+@pytest.mark.unit
+class TestUnknownHashFallback:
+    """测试哈希未知时按轮廓解密"""
+
+    def test_font2chars(self, monkeypatch, fixture_glyphs):
+        """坐标被改动的字形按轮廓还原, 并记录置信度"""
+        font_map, glyphs, originals = fixture_glyphs
+        names = sorted(font_map)
+        records = build_outline_records(
+            [originals[name] for name in names], [glyphs[name] for name in names]
+        )
+        monkeypatch.setattr(
+            cxsecret_font, "outline_index", GlyphOutlineIndex.from_records(records)
+        )
+        expected = font2chars(font_map)
+        assert len(expected) == len(font_map)
+
+        # 每个字形改动一个坐标, 哈希全部失效
+        changed = {}
+        for name, glyph in glyphs.items():
+            glyph = copy.deepcopy(glyph)
+            x, y = glyph.coordinates[0]
+            glyph.coordinates[0] = (x + 1, y)
+            changed[name] = glyph
+        changed_map = {name: hash_glyph(g) for name, g in changed.items()}
+        assert not font2chars(changed_map)
+        messages = []
+        handler = logger.add(messages.append, level="INFO")
+        try:
+            assert font2chars(changed_map, changed) == expected
+        finally:
+            logger.remove(handler)
+        assert sum("置信度" in m for m in messages) == len(expected)
+
+    def test_index_loaded_only_for_unknown(self, monkeypatch, tmp_path, fixture_glyphs):
+        """所有字形的哈希都已知时不加载索引"""
+        font_map, glyphs, _ = fixture_glyphs
+        index = GlyphOutlineIndex(tmp_path / "index.npy")
+        monkeypatch.setattr(cxsecret_font, "outline_index", index)
+        assert font2chars(font_map, glyphs)
+        assert index._records is None
+
+    def test_no_index(self, monkeypatch, fixture_glyphs):
+        """索引为空时哈希未知的字符保持原样"""
+        font_map, glyphs, _ = fixture_glyphs
+        monkeypatch.setattr(cxsecret_font, "fonthash_dao", FontHashDAO.from_map({}))
+        monkeypatch.setattr(cxsecret_font, "outline_index", GlyphOutlineIndex())
+        assert font2chars(font_map, glyphs) == {}
+
+    def test_index_records(self):
+        """记录格式"""
+        records = build_outline_records([0x4E00], [_glyph(SQUARE)])
+        assert records.dtype == OUTLINE_DTYPE and records["codepoint"][0] == 0x4E00
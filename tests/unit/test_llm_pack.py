@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+测试大模型多题打包
+"""
+import json
+from unittest.mock import Mock
+
+import pytest
+from api.answer import DeepSeek
+from api.llm_pack import (
+    build_packed_prompt,
+    parse_packed_answers,
+    query_packed,
+    split_packs,
+)
+
+
+def _question(title, q_type="single", options="A. 北京\nB. 上海"):
+    return {"title": title, "type": q_type, "options": options}
+
+
+@pytest.mark.unit
+class TestPackPrompt:
+    """测试打包与提示词"""
+
+    def test_prompt_strips_option_labels(self):
+        """提示词按题号列出题目, 并去除选项字母"""
+        prompt = build_packed_prompt(
+            [_question("中国的首都是"), _question("地球是圆的", "judgement", "")]
+        )
+        assert "【1】（单选题）中国的首都是" in prompt
+        assert "北京\n上海" in prompt and "A." not in prompt
+        assert "【2】（判断题）地球是圆的" in prompt
+
+    def test_prompt_strips_labels_without_separator(self):
+        """aria-label 中字母后没有分隔符的选项同样去除字母, 英文选项保持完整"""
+        prompt = build_packed_prompt(
+            [_question("中国的首都是", options="A北京\nB上海\nCBanana")]
+        )
+        assert "北京\n上海\nBanana" in prompt and "A北京" not in prompt
+
+    def test_split_by_pack_size(self):
+        """按打包大小划分"""
+        packs = split_packs([_question(f"题目{i}") for i in range(5)], pack_size=2)
+        assert packs == [[0, 1], [2, 3], [4]]
+
+    def test_split_by_token_budget(self):
+        """超出token预算时拆分, 单题超出预算时仍独立成包"""
+        questions = [_question("很长的题目" * 200) for _ in range(3)]
+        assert split_packs(questions, pack_size=10, token_budget=500) == [
+            [0],
+            [1],
+            [2],
+        ]
+
+
+@pytest.mark.unit
+class TestParsePackedAnswers:
+    """测试按题号解析"""
+
+    def test_parse_with_markdown_wrapper(self):
+        """兼容Markdown代码块与字符串答案"""
+        content = (
+            '```json\n[{"id": 2, "answer": "上海"}, {"id": 1, "answer": ["北京"]}]\n```'
+        )
+        assert parse_packed_answers(content, 2) == {1: "北京", 2: "上海"}
+
+    def test_skip_invalid_items(self):
+        """越界题号、空答案和格式错误的条目被忽略"""
+        content = json.dumps(
+            [
+                {"id": 1, "answer": []},
+                {"id": 3, "answer": ["越界"]},
+                {"id": "2", "answer": ["A", "B"]},
+                "无效条目",
+            ]
+        )
+        assert parse_packed_answers(content, 2) == {2: "A\nB"}
+
+    def test_invalid_json(self):
+        """无法解析的输出返回空结果"""
+        assert parse_packed_answers("抱歉, 我无法回答", 2) == {}
+
+
+@pytest.mark.unit
+class TestQueryPacked:
+    """测试打包查询"""
+
+    def test_requery_only_failed_items(self):
+        """只有解析失败的题目会逐题重新查询"""
+        calls = []
+
+        def complete(system_prompt, content):
+            calls.append(content)
+            return json.dumps(
+                [{"id": 1, "answer": ["答案0"]}, {"id": 3, "answer": ["答案2"]}]
+            )
+
+        fallback_calls = []
+
+        def fallback(q_info):
+            fallback_calls.append(q_info["title"])
+            return "重查答案"
+
+        questions = [_question(f"题目{i}") for i in range(3)]
+        result = query_packed(questions, complete, fallback, pack_size=5)
+        assert result == ["答案0", "重查答案", "答案2"]
+        assert len(calls) == 1
+        assert fallback_calls == ["题目1"]
+
+    def test_failed_request_not_fanned_out(self):
+        """整包请求失败时该包的题目没有答案, 不再逐题查询同一个接口"""
+        questions = [_question(f"题目{i}") for i in range(3)]
+        fallback = Mock(side_effect=lambda q: q["title"])
+        result = query_packed(questions, lambda s, c: None, fallback, pack_size=2)
+        assert result == [None, None, "题目2"]
+        fallback.assert_called_once_with(questions[2])
+
+    def test_unparsable_response_falls_back(self):
+        """响应无法解析时逐题重新查询"""
+        questions = [_question(f"题目{i}") for i in range(2)]
+        result = query_packed(
+            questions, lambda s, c: "抱歉", lambda q: q["title"], pack_size=5
+        )
+        assert result == ["题目0", "题目1"]
+
+
+@pytest.mark.unit
+class TestProviderPacking:
+    """测试大模型题库的打包配置"""
+
+    def test_pack_config(self, tmp_path):
+        """题库专属配置优先于通用配置, 打包大小为1时关闭打包"""
+        tiku = DeepSeek()
+        tiku.config_set(
+            {"deepseek_key": "key", "pack_size": "1", "min_interval_seconds": "0"}
+        )
+        tiku.init_tiku()
+        assert tiku.BATCH_SIZE == 0
+
+        tiku.config_set(
+            {
+                "deepseek_key": "key",
+                "pack_size": "1",
+                "deepseek_pack_size": "8",
+                "pack_token_budget": "1000",
+            }
+        )
+        tiku.init_tiku()
+        assert tiku.BATCH_SIZE == 8
+        assert tiku.pack_token_budget == 1000
+
+    def test_query_batch_single_request(self, tmp_path, monkeypatch):
+        """整章测验只发送一次打包请求"""
+        tiku = DeepSeek()
+        tiku.CACHE_FILE = tmp_path / "cache.db"
+        tiku.config_set(
+            {"deepseek_key": "key", "min_interval_seconds": "0", "fuzzy_threshold": 0}
+        )
+        tiku.init_tiku()
+
+        requests_sent = []
+
+        def complete(system_prompt, content):
+            requests_sent.append(content)
+            return json.dumps(
+                [{"id": i, "answer": ["北京"]} for i in range(1, 11)],
+                ensure_ascii=False,
+            )
+
+        monkeypatch.setattr(tiku, "_complete", complete)
+        result = tiku.query_batch([_question(f"题目{i}") for i in range(10)])
+        assert result == ["北京"] * 10
+        assert len(requests_sent) == 1
+
+    def test_failed_pack_recorded_as_provider_error(self, tmp_path, monkeypatch):
+        """打包请求失败时记录为请求错误, 不逐题重试"""
+        tiku = DeepSeek()
+        tiku.CACHE_FILE = tmp_path / "cache.db"
+        tiku.config_set(
+            {"deepseek_key": "key", "min_interval_seconds": "0", "fuzzy_threshold": 0}
+        )
+        tiku.init_tiku()
+
+        def complete(system_prompt, content):
+            tiku._mark_provider_error()
+            return None
+
+        single = Mock(return_value="北京")
+        monkeypatch.setattr(tiku, "_complete", complete)
+        monkeypatch.setattr(tiku, "_query", single)
+        result = tiku.query_batch([_question(f"题目{i}") for i in range(3)])
+        assert result == [None] * 3
+        single.assert_not_called()
+        reason = tiku.cache_dao.get_negative("题目0", tiku.provider_id)
+        assert reason == "provider_error"
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+测试多题库组合查询
+"""
+import time
+
+import pytest
+import api.answer as answer_module
+from api.answer import MultiTiku, ProviderStats, Tiku
+
+
+def _make_provider(name, answer, delay=0.0):
+    """构造一个固定延迟、固定答案的测试题库类"""
+
+    class _Provider(Tiku):
+        calls = 0
+
+        def __init__(self):
+            super().__init__()
+            self.name = name
+
+        def _query(self, q_info):
+            type(self).calls += 1
+            time.sleep(delay)
+            return answer
+
+    _Provider.__name__ = name
+    return _Provider
+
+
+@pytest.fixture
+def make_multi(monkeypatch, tmp_path):
+    def factory(*providers, **conf):
+        for cls in providers:
+            monkeypatch.setattr(answer_module, cls.__name__, cls, raising=False)
+        tiku = Tiku()
+        tiku.config_set(
+            {
+                "provider": ",".join(cls.__name__ for cls in providers),
+                "fuzzy_threshold": 0,
+                **conf,
+            }
+        )
+        tiku = tiku.get_tiku_from_config()
+        tiku.CACHE_FILE = tmp_path / "cache.db"
+        tiku.init_tiku()
+        return tiku
+
+    return factory
+
+
+def _question(title="题目"):
+    return {"title": title, "type": "completion", "options": ""}
+
+
+@pytest.mark.unit
+class TestMultiTiku:
+    """测试多题库组合"""
+
+    def test_comma_separated_provider(self, make_multi):
+        """逗号分隔的provider组合为MultiTiku"""
+        tiku = make_multi(_make_provider("FakeA", "A"), _make_provider("FakeB", "B"))
+        assert isinstance(tiku, MultiTiku)
+        assert [p.name for p in tiku.providers] == ["FakeA", "FakeB"]
+        tiku.close()
+
+    def test_falls_through_missing_answer(self, make_multi):
+        """首个题库没有答案时使用下一个题库的答案"""
+        tiku = make_multi(_make_provider("Empty", None), _make_provider("Hit", "答案"))
+        assert tiku.query(_question()) == "答案"
+        tiku.close()
+
+    def test_hedge_after_delay(self, make_multi):
+        """首个题库过慢时对冲查询下一个题库"""
+        slow = _make_provider("Slow", "慢答案", delay=1.0)
+        fast = _make_provider("Fast", "快答案")
+        tiku = make_multi(slow, fast)
+        tiku.HEDGE_DEFAULT_DELAY = 0.05
+        start = time.monotonic()
+        assert tiku.query(_question()) == "快答案"
+        assert time.monotonic() - start < 0.8
+        tiku.close()
+
+    def test_rejects_invalid_answer(self, make_multi):
+        """未通过校验的答案不会被采用"""
+        tiku = make_multi(
+            _make_provider("Wrong", "不确定"), _make_provider("Right", "正确")
+        )
+        assert (
+            tiku.query({"title": "题目", "type": "judgement", "options": ""}) == "正确"
+        )
+        assert tiku.stats[0].hits == 0
+        tiku.close()
+
+    def test_parallel_mode(self, make_multi):
+        """parallel模式同时查询所有题库"""
+        a = _make_provider("ParA", "答案", delay=0.2)
+        b = _make_provider("ParB", "答案", delay=0.2)
+        tiku = make_multi(a, b, race_mode="parallel")
+        tiku.query(_question())
+        assert a.calls == 1 and b.calls == 1
+        tiku.close()
+
+    def test_adaptive_order(self, make_multi):
+        """样本充足后按期望延迟重新排序"""
+        tiku = make_multi(_make_provider("First", None), _make_provider("Second", "答"))
+        for _ in range(tiku.MIN_SAMPLES):
+            tiku.stats[0].record(1.0, False)
+            tiku.stats[1].record(0.1, True)
+        assert tiku.ordered_providers() == [1, 0]
+        tiku.close()
+
+    def test_init_failure_skipped(self, make_multi):
+        """初始化失败的题库被忽略"""
+
+        class Broken(Tiku):
+            def _init_tiku(self):
+                raise KeyError("tokens")
+
+        tiku = make_multi(Broken, _make_provider("Works", "答案"))
+        assert [p.name for p in tiku.providers] == ["Works"]
+        tiku.close()
+
+
+@pytest.mark.unit
+class TestProviderStats:
+    """测试题库统计"""
+
+    def test_percentile_and_hit_rate(self):
+        stats = ProviderStats()
+        assert stats.percentile(0.5) is None
+        for latency in (0.1, 0.2, 0.3, 0.4):
+            stats.record(latency, hit=latency < 0.25)
+        assert stats.percentile(0.5) == 0.3
+        assert stats.hit_rate == pytest.approx(3 / 6)
+
+
+@pytest.mark.unit
+class TestMultiTikuNegativeCache:
+    """测试多题库的未命中记录"""
+
+    def test_skips_provider_with_recent_miss(self, make_multi):
+        """近期未命中的题库不再查询, 全部未命中时直接返回"""
+        empty = _make_provider("NegEmpty", None)
+        tiku = make_multi(empty, _make_provider("NegAlsoEmpty", None))
+        assert tiku.query(_question()) is None
+        assert tiku.query(_question()) is None
+        assert empty.calls == 1
+        tiku.close()
+
+    def test_queries_remaining_provider(self, make_multi):
+        """只跳过未命中的题库, 其余题库照常查询"""
+        empty = _make_provider("PartEmpty", None)
+        hit = _make_provider("PartHit", "答案")
+        tiku = make_multi(empty, hit)
+        tiku.cache_dao.add_negative("题目", "PartEmpty", "not_found", 60)
+        assert tiku.query(_question()) == "答案"
+        assert empty.calls == 0 and hit.calls == 1
+        tiku.close()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+测试答案与选项匹配
+"""
+import json
+from pathlib import Path
+
+import pytest
+from api.answer_check import check_multiple, check_single, cut
+from api.option_matcher import match_options, parse_options, similarity
+
+FIXTURE = Path(__file__).parent.parent / "fixtures" / "option_matching.json"
+CASES = json.loads(FIXTURE.read_text(encoding="utf-8"))
+
+
+@pytest.mark.unit
+class TestMatchOptions:
+    """测试选项匹配"""
+
+    @pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+    def test_golden(self, case):
+        """真实题目样例的匹配结果"""
+        assert (
+            match_options(case["answer"], case["options"], case["type"])
+            == case["expected"]
+        )
+
+    def test_options_list(self):
+        """选项可以是列表"""
+        assert match_options("上海", ["A北京", "B上海"], "single") == "B"
+
+    def test_empty(self):
+        """答案或选项为空时返回空字符串"""
+        assert match_options("", "A北京\nB上海") == ""
+        assert match_options("北京", "") == ""
+        assert match_options("\n\n", "A北京\nB上海", "multiple") == ""
+
+    def test_threshold(self):
+        """提高阈值后只接受更接近的选项"""
+        options = "A中华人民共和国成立\nB改革开放"
+        assert match_options("中华人民共和国", options) == "A"
+        assert match_options("人民共和国的成立", options, threshold=0.95) == ""
+
+    def test_parse_options(self):
+        """解析选项字母与规范化内容"""
+        assert parse_options("A. 北京。\nB、Shanghai\n\n") == [
+            ("A", "北京"),
+            ("B", "shanghai"),
+        ]
+
+    def test_similarity_shape(self):
+        """相似度矩阵覆盖所有组合"""
+        dice, recall = similarity(["北京", "上海", ""], ["北京", "上海市"])
+        assert dice.shape == recall.shape == (3, 2)
+        assert dice[0, 0] == 1.0
+        assert recall[1, 1] == 1.0 and dice[1, 1] < 1.0
+        assert dice[2].tolist() == [0.0, 0.0]
+
+
+@pytest.mark.unit
+class TestCut:
+    """测试答案切分"""
+
+    def test_cut_lines(self):
+        """按换行切分并去除空行"""
+        assert cut("北京\n\n上海\n") == ["北京", "上海"]
+        assert cut("北京,上海") == ["北京,上海"]
+        assert cut(" \n") is None
+
+    def test_checks(self):
+        """单选与多选校验沿用换行切分"""
+        assert check_single("北京,上海")
+        assert not check_single("北京\n上海")
+        assert check_multiple("北京\n上海")
+        assert not check_multiple("")
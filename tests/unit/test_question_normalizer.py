@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+测试题目标准化
+"""
+import pytest
+from api.question_normalizer import (
+    clean_title,
+    normalize_title,
+    question_hash,
+    question_key,
+    strip_option_label,
+    strip_option_labels,
+)
+
+
+@pytest.mark.unit
+class TestCleanTitle:
+    """测试标题清理"""
+
+    def test_strip_number_prefix_and_score(self):
+        """去除题号、题型前缀和分值"""
+        assert (
+            clean_title("1【单选题】中国的首都是（ ）（2.0分）") == "中国的首都是（ ）"
+        )
+        assert clean_title("12. (多选题) 下列说法正确的是 (5分)") == "下列说法正确的是"
+
+    def test_collapse_whitespace(self):
+        """合并空白字符"""
+        assert clean_title("  题目\t内容\n  ") == "题目 内容"
+
+    def test_empty(self):
+        """空标题"""
+        assert clean_title("") == ""
+        assert normalize_title("") == ""
+
+
+@pytest.mark.unit
+class TestNormalizeTitle:
+    """测试规范化键"""
+
+    @pytest.mark.parametrize(
+        "variant",
+        [
+            "中国的首都是（  ）？",
+            "中国的首都是( )?",
+            "1【单选题】中国的首都是（ ）（1.0分）",
+            "中国的首都是 ( )",
+            "中国的首都是（）。",
+        ],
+    )
+    def test_variants_share_key(self, variant):
+        """仅在标点、空白、题号、题型、分值上不同的标题得到相同的键"""
+        assert normalize_title(variant) == normalize_title("中国的首都是（）")
+
+    def test_full_width_letters(self):
+        """全角字母数字转为半角并统一小写"""
+        assert normalize_title("ＤＮＡ的全称") == normalize_title("dna的全称")
+
+    def test_img_src_ignores_host_and_query(self):
+        """图片仅保留文件名"""
+        a = '如图<img src="https://p.ananas.chaoxing.com/star3/origin/abc.png?t=1">所示'
+        b = "如图<img src='http://img.example.com/x/abc.png'>所示"
+        assert normalize_title(a) == normalize_title(b)
+        assert "<img:abc.png>" in normalize_title(a)
+        assert normalize_title(a) != normalize_title(a.replace("abc", "def"))
+
+    def test_blank_lines(self):
+        """填空线长度不影响键"""
+        assert normalize_title("____是首都") == normalize_title("__是首都")
+
+    def test_different_questions_differ(self):
+        """不同题目得到不同的键"""
+        assert normalize_title("中国的首都是") != normalize_title("法国的首都是")
+
+
+@pytest.mark.unit
+class TestQuestionKey:
+    """测试缓存键与哈希"""
+
+    def test_hash_is_stable(self):
+        """哈希为规范化标题的MD5"""
+        normalized, key_hash = question_key("1【判断题】地球是圆的。")
+        assert normalized == "地球是圆的"
+        assert key_hash == question_hash(normalized)
+        assert len(key_hash) == 32
+
+
+@pytest.mark.unit
+class TestStripOptionLabel:
+    """测试选项标签去除"""
+
+    @pytest.mark.parametrize(
+        "option", ["A. 北京", "A、北京", "A 北京", "a.北京", "A：北京", " B ．北京"]
+    )
+    def test_strip(self, option):
+        assert strip_option_label(option) == "北京"
+
+    @pytest.mark.parametrize(
+        "option, expected",
+        [
+            ("Apple", "Apple"),
+            ("True", "True"),
+            ("False", "False"),
+            ("I am fine", "I am fine"),
+            ("A. I am fine", "I am fine"),
+            ("A北京", "A北京"),
+        ],
+    )
+    def test_english_option_kept(self, option, expected):
+        """未知选项字母时, 字母后没有分隔符视为选项内容, 不是标签"""
+        assert strip_option_label(option) == expected
+
+    @pytest.mark.parametrize(
+        "option, label, expected",
+        [
+            ("A北京", "A", "北京"),
+            ("C金枪鱼", "C", "金枪鱼"),
+            ("B Banana", "B", "Banana"),
+            ("BBanana", "B", "Banana"),
+            ("a. I am fine", "A", "I am fine"),
+            ("Apple", "B", "Apple"),
+            ("北京", "北", "北京"),
+        ],
+    )
+    def test_known_label(self, option, label, expected):
+        """已知选项字母时, 字母后没有分隔符也去除, 其他字母开头的选项保留"""
+        assert strip_option_label(option, label) == expected
+
+    def test_strip_labels(self):
+        """选项列表按位置对应选项字母"""
+        options = ["A北京", "BBanana", "C. 上海", "Apple"]
+        assert strip_option_labels(options) == ["北京", "Banana", "上海", "Apple"]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+测试题库请求限流
+"""
+import threading
+import time
+
+import pytest
+from api.rate_limiter import TokenBucketLimiter
+
+
+@pytest.mark.unit
+class TestTokenBucketLimiter:
+    """测试令牌桶限流器"""
+
+    def test_first_request_not_delayed(self, tmp_path):
+        """桶初始为满, 首次请求无需等待"""
+        limiter = TokenBucketLimiter(tmp_path / "rate_limit.db")
+        assert limiter.acquire("AI:abc", rate=1) == 0.0
+        limiter.close()
+
+    def test_try_acquire(self):
+        """无可用令牌时立即返回False, 补充后可再次获取"""
+        limiter = TokenBucketLimiter(None)
+        assert limiter.try_acquire("key", rate=20)
+        assert not limiter.try_acquire("key", rate=20)
+        time.sleep(0.06)
+        assert limiter.try_acquire("key", rate=20)
+
+    def test_keys_are_independent(self):
+        """不同题库或token的配额互不影响"""
+        limiter = TokenBucketLimiter(None)
+        assert limiter.try_acquire("TikuYanxi:a", rate=1)
+        assert limiter.try_acquire("TikuYanxi:b", rate=1)
+        assert not limiter.try_acquire("TikuYanxi:a", rate=1)
+
+    def test_threads_share_quota(self, tmp_path):
+        """多个线程共享配额, 请求被均匀错开"""
+        limiter = TokenBucketLimiter(tmp_path / "rate_limit.db")
+        times = []
+        lock = threading.Lock()
+
+        def worker():
+            limiter.acquire("key", rate=20)
+            with lock:
+                times.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 5个请求以每秒20个的速率, 至少需要约0.2秒
+        assert max(times) - start >= 0.18
+        limiter.close()
+
+    def test_state_shared_across_instances(self, tmp_path):
+        """同一状态文件的多个实例(模拟多个进程)共享配额"""
+        path = tmp_path / "rate_limit.db"
+        first = TokenBucketLimiter(path)
+        second = TokenBucketLimiter(path)
+        assert first.try_acquire("key", rate=1)
+        assert not second.try_acquire("key", rate=1)
+        first.close()
+        second.close()
+
+    def test_zero_rate_unlimited(self):
+        """速率不大于0时不限流"""
+        limiter = TokenBucketLimiter(None)
+        for _ in range(3):
+            assert limiter.acquire("key", rate=0) == 0.0
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+测试题库token配额池
+"""
+import json
+from unittest.mock import Mock
+
+import pytest
+from api.answer import TikuYanxi
+from api.token_pool import TokenPool
+
+
+@pytest.mark.unit
+class TestTokenPool:
+    """测试token配额池"""
+
+    def test_pick_most_remaining(self):
+        """选用剩余次数最多的token"""
+        pool = TokenPool("测试", ["a", "b", "c"], None)
+        pool.update("a", balance=5)
+        pool.update("b", balance=50)
+        assert pool.acquire() == "b"
+
+    def test_unknown_balance_keeps_config_order(self):
+        """余额未知时按配置顺序选用"""
+        pool = TokenPool("测试", ["a", "b"], None)
+        assert pool.acquire() == "a"
+
+    def test_rotate_on_exhausted(self):
+        """次数用完后切换, 全部用完时抛出PermissionError"""
+        pool = TokenPool("测试", ["a", "b"], None)
+        pool.update("a", balance=1)
+        pool.update("a", used=1)
+        assert pool.acquire() == "b"
+        pool.mark_exhausted("b")
+        with pytest.raises(PermissionError):
+            pool.acquire()
+
+    def test_refresh_all(self):
+        """通过余额接口刷新, 失败的token保持原状态"""
+        balances = {"a": 3, "b": None}
+        pool = TokenPool("测试", ["a", "b"], None, refresh=balances.get)
+        pool.refresh_all()
+        assert pool.balances()[TokenPool.digest("a")[:6]] == 3
+        assert pool.acquire() == "a"
+
+    def test_persist_state(self, tmp_path):
+        """状态以token摘要保存, 下次运行时沿用"""
+        path = tmp_path / "token_pool.json"
+        pool = TokenPool("测试", ["secret-a", "secret-b"], path)
+        pool.update("secret-a", balance=0)
+        pool.update("secret-b", balance=10)
+        pool.close()
+        assert "secret" not in path.read_text(encoding="utf8")
+
+        reopened = TokenPool("测试", ["secret-a", "secret-b"], path)
+        assert reopened.acquire() == "secret-b"
+        assert json.loads(path.read_text(encoding="utf8"))["测试"]
+
+    def test_exhausted_not_restored(self, tmp_path):
+        """用完的token可能已被充值, 重新打开后仍可选用"""
+        path = tmp_path / "token_pool.json"
+        pool = TokenPool("测试", ["a", "b"], path)
+        pool.mark_exhausted("a")
+        pool.mark_exhausted("b")
+        pool.close()
+
+        reopened = TokenPool("测试", ["a", "b"], path)
+        assert reopened.acquire() == "a"
+        assert reopened.balances() == {
+            TokenPool.digest("a")[:6]: None,
+            TokenPool.digest("b")[:6]: None,
+        }
+
+    def test_concurrent_writers_merge(self, tmp_path):
+        """多个进程共用状态文件时按token合并, 较旧的状态不会覆盖其他进程的更新"""
+        path = tmp_path / "token_pool.json"
+        first = TokenPool("测试", ["a", "b"], path)
+        second = TokenPool("测试", ["a", "b"], path)
+        first.update("a", balance=5)
+        second.update("b", balance=8)
+        second.update("a", balance=3)
+        first.update("b", balance=20)
+        first._updated_at["b"] = second._updated_at["b"] - 1
+        second.save()
+        first.save()
+
+        state = json.loads(path.read_text(encoding="utf8"))["测试"]
+        assert state[TokenPool.digest("a")]["balance"] == 3
+        assert state[TokenPool.digest("b")]["balance"] == 8
+
+    def test_retry_exhausted(self, monkeypatch):
+        """用完的token在EXHAUSTED_RETRY秒后重新尝试, 且排在有余额的token之后"""
+        pool = TokenPool("测试", ["a", "b"], None)
+        pool.update("b", balance=5)
+        pool.mark_exhausted("a")
+        assert pool.acquire() == "b"
+        pool.mark_exhausted("b")
+        with pytest.raises(PermissionError):
+            pool.acquire()
+
+        monkeypatch.setattr(TokenPool, "EXHAUSTED_RETRY", 0)
+        assert pool.acquire() in ("a", "b")
+        pool.update("b", balance=3)
+        assert pool.acquire() == "b"
+
+    def test_background_refresh(self):
+        """后台线程启动后立即刷新一次"""
+        refresh = Mock(return_value=7)
+        pool = TokenPool("测试", ["a"], None, refresh=refresh, refresh_interval=60)
+        pool.start()
+        pool.close()
+        refresh.assert_called_with("a")
+        assert pool.balances() == {TokenPool.digest("a")[:6]: 7}
+
+
+@pytest.mark.unit
+class TestYanxiRotation:
+    """测试言溪题库的token轮换"""
+
+    def test_switch_token_when_out_of_quota(self, tmp_path):
+        """提示次数不足时换用下一个token重新查询"""
+        tiku = TikuYanxi()
+        tiku.config_set(
+            {"tokens": "t1,t2", "token_pool_file": str(tmp_path / "pool.json")}
+        )
+        tiku.init_tiku()
+
+        def fake_get(url, params, **kwargs):
+            response = Mock(status_code=200)
+            if params["token"] == "t1":
+                response.json.return_value = {
+                    "code": 0,
+                    "data": {"answer": "查询次数不足"},
+                    "message": "",
+                }
+            else:
+                response.json.return_value = {
+                    "code": 1,
+                    "data": {"answer": "北京", "times": 99},
+                }
+            return response
+
+        tiku._session = Mock(get=Mock(side_effect=fake_get))
+        assert tiku._query({"title": "中国的首都", "type": "single"}) == "北京"
+        assert tiku.token_pool.acquire() == "t2"
+        tiku._session = None
+        tiku.close()
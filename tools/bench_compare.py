@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试结果与基线比较工具
+读取 pytest-benchmark 的 --benchmark-json 输出, 与 tests/benchmark/baseline.json 比较
+
+耗时以校准基准测试 (test_bench_calibration) 的耗时归一化后比较, 因此基线可以在
+其他机器上生成; 内存分配峰值 (benchmark_alloc 记录的 alloc_peak_kib) 直接比较。
+共享的 CI 机器上耗时波动较大, 因此耗时超出阈值默认只报告, 加 --fail-on-slowdown
+时才视为失败; 分配峰值超出阈值总是视为失败。
+
+用法:
+    pytest tests/benchmark --benchmark-only --benchmark-json=benchmark.json
+    python tools/bench_compare.py benchmark.json [--max-slowdown 1.5] [--max-alloc-growth 1.25]
+    python tools/bench_compare.py benchmark.json --fail-on-slowdown    # 耗时超出阈值时也失败
+    python tools/bench_compare.py benchmark.json --update    # 用本次结果更新基线
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_BASELINE = (
+    Path(__file__).parent.parent / "tests" / "benchmark" / "baseline.json"
+)
+CALIBRATION = "tests/benchmark/test_bench_calibration.py::test_bench_calibration"
+ALLOC_TOLERANCE_KIB = 16  # 分配峰值的增长小于该值时忽略
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="基准测试结果与基线比较工具",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("result", help="pytest-benchmark 的 JSON 输出")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件")
+    parser.add_argument(
+        "--max-slowdown", type=float, default=1.5, help="允许的最大相对耗时倍数"
+    )
+    parser.add_argument(
+        "--max-alloc-growth", type=float, default=1.25, help="允许的最大分配峰值倍数"
+    )
+    parser.add_argument(
+        "--fail-on-slowdown",
+        action="store_true",
+        help="耗时超出阈值时也返回失败, 默认只报告",
+    )
+    parser.add_argument("--update", action="store_true", help="用本次结果更新基线")
+    return parser.parse_args(argv)
+
+
+def load_result(path: str) -> Dict[str, dict]:
+    """
+    读取 pytest-benchmark 的 JSON 输出
+
+    Returns:
+        {测试全名: {"mean": 平均耗时(秒), "relative": 相对校准测试的耗时, 以及 extra_info}}
+
+    Raises:
+        ValueError: 结果中没有校准测试
+    """
+    with open(path, "r", encoding="utf-8") as fp:
+        data = json.load(fp)
+    results = {
+        bench["fullname"]: {"mean": bench["stats"]["mean"], **bench["extra_info"]}
+        for bench in data["benchmarks"]
+    }
+    if CALIBRATION not in results:
+        raise ValueError(f"结果中没有校准测试 {CALIBRATION}")
+    calibration = results[CALIBRATION]["mean"]
+    for item in results.values():
+        item["relative"] = item["mean"] / calibration
+    return results
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    max_slowdown: float,
+    max_alloc_growth: float,
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    比较结果与基线
+
+    Returns:
+        (报告行, 耗时超出阈值的测试名, 分配峰值超出阈值的测试名)
+    """
+    lines = [
+        f"{'基准测试':<80} {'耗时':>10} {'相对基线':>8} {'吞吐量':>12} {'分配峰值':>12}"
+    ]
+    slowdowns = []
+    alloc_regressions = []
+    for name in sorted(results):
+        item = results[name]
+        base = baseline.get(name)
+        throughput = ""
+        if item.get("input_kib"):
+            throughput = f"{item['input_kib'] / 1024 / item['mean']:.1f}MiB/s"
+        alloc = item.get("alloc_peak_kib")
+        alloc_text = "" if alloc is None else f"{alloc:.1f}KiB"
+        if base is None:
+            ratio_text = "新增"
+        else:
+            ratio = item["relative"] / base["relative"]
+            ratio_text = f"{ratio:.2f}x"
+            if ratio > max_slowdown:
+                slowdowns.append(name)
+                ratio_text += " !"
+            base_alloc = base.get("alloc_peak_kib")
+            if alloc is not None and base_alloc:
+                growth = alloc / base_alloc
+                alloc_text += f" ({growth:.2f}x)"
+                if (
+                    growth > max_alloc_growth
+                    and alloc - base_alloc > ALLOC_TOLERANCE_KIB
+                ):
+                    alloc_regressions.append(name)
+                    alloc_text += " !"
+        lines.append(
+            f"{name:<80} {item['mean'] * 1000:>8.3f}ms {ratio_text:>8} "
+            f"{throughput:>12} {alloc_text:>12}"
+        )
+    for name in sorted(set(baseline) - set(results)):
+        lines.append(f"{name:<80} {'未运行':>10}")
+    return lines, slowdowns, alloc_regressions
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    try:
+        results = load_result(args.result)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"错误: 无法读取基准测试结果: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    baseline_path = Path(args.baseline)
+    if args.update:
+        baseline = {
+            name: {
+                key: round(value, 9) if isinstance(value, float) else value
+                for key, value in item.items()
+            }
+            for name, item in results.items()
+        }
+        baseline_path.write_text(
+            json.dumps(baseline, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+        print(f"已更新基线 {baseline_path}, 共{len(baseline)}项")
+        return
+
+    try:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取基线: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    lines, slowdowns, alloc_regressions = compare(
+        results, baseline, args.max_slowdown, args.max_alloc_growth
+    )
+    print("\n".join(lines))
+    if slowdowns:
+        print(f"\n{len(slowdowns)}项基准测试耗时超出阈值:", file=sys.stderr)
+        for name in slowdowns:
+            print(f"  {name}", file=sys.stderr)
+    if alloc_regressions:
+        print(f"\n{len(alloc_regressions)}项基准测试分配峰值超出阈值:", file=sys.stderr)
+        for name in alloc_regressions:
+            print(f"  {name}", file=sys.stderr)
+    if alloc_regressions or (slowdowns and args.fail_on_slowdown):
+        sys.exit(1)
+    if slowdowns:
+        print("\n耗时超出阈值仅作提示, 分配峰值均在阈值内")
+        return
+    print("\n全部基准测试均在阈值内")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+字体哈希二进制表生成工具
+由 resource/font_map_table.json 生成按摘要排序的 resource/font_map_table.bin,
+修改映射表后需要重新生成
+
+用法:
+    python tools/build_font_table.py [--source font_map_table.json] [--output font_map_table.bin]
+    python tools/build_font_table.py --check
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 添加父目录到sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.cxsecret_font import build_hash_table, resource_path, write_hash_table
+
+DEFAULT_SOURCE = "resource/font_map_table.json"
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="字体哈希二进制表生成工具",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--source", default=resource_path(DEFAULT_SOURCE), help="字体映射表JSON文件"
+    )
+    parser.add_argument(
+        "--output", default=None, help="二进制表输出路径, 默认与JSON文件同名"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="只检查二进制表是否与JSON文件一致"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    output = Path(args.output or Path(args.source).with_suffix(".bin"))
+    try:
+        if args.check:
+            with open(args.source, "r", encoding="utf-8") as fp:
+                expected = build_hash_table(json.load(fp))
+            if not output.exists() or output.read_bytes() != expected:
+                print(f"{output} 与 {args.source} 不一致, 请重新生成", file=sys.stderr)
+                sys.exit(1)
+            print(f"{output} 已是最新")
+            return
+        count = write_hash_table(args.source, output)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"已生成{output}, 共{count}条记录")
+
+
+if __name__ == "__main__":
+    main()
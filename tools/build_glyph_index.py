@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+字形轮廓索引生成工具
+从参考字体(或已能完全解密的加密字体)中取出哈希在字体映射表中的字形,
+以映射表中的字符为标签生成 resource/font_glyph_index.npy。
+康熙部首与对应汉字的字形相同, 解密时部首也会替换为汉字, 因此以汉字为标签
+
+用法:
+    python tools/build_glyph_index.py font1.ttf [font2.ttf ...] [--output font_glyph_index.npy]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加父目录到sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.cxsecret_font import (
+    KX_RADICALS_TAB,
+    fonthash_dao,
+    font2map,
+    resource_path,
+)
+from api.exceptions import FontDecodeError
+from api.glyph_outline import OUTLINE_DTYPE, build_outline_records
+
+DEFAULT_OUTPUT = "resource/font_glyph_index.npy"
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="字形轮廓索引生成工具",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("fonts", nargs="+", help="TTF字体文件")
+    parser.add_argument(
+        "--output", default=resource_path(DEFAULT_OUTPUT), help="索引输出路径"
+    )
+    return parser.parse_args(argv)
+
+
+def collect_records(font_path: str) -> np.ndarray:
+    """
+    取出字体中哈希已知的字形轮廓
+
+    Raises:
+        FontDecodeError: 当无法解析字体时
+    """
+    glyphs = {}
+    font_map = font2map(font_path, glyphs)
+    codepoints, known = [], []
+    for name, glyph_hash in font_map.items():
+        codepoint = fonthash_dao.find_codepoint(glyph_hash)
+        if codepoint is not None:
+            codepoints.append(ord(chr(codepoint).translate(KX_RADICALS_TAB)))
+            known.append(glyphs[name])
+    return build_outline_records(codepoints, known)
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    parts = []
+    for font_path in args.fonts:
+        try:
+            records = collect_records(font_path)
+        except FontDecodeError as e:
+            print(f"错误: {font_path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{font_path}: {len(records)}个字形")
+        parts.append(records)
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=OUTLINE_DTYPE)
+    try:
+        np.save(args.output, records, allow_pickle=False)
+    except OSError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"已生成{args.output}, 共{len(records)}条记录")
+
+
+if __name__ == "__main__":
+    main()
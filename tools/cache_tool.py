@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+答案缓存批量导入导出工具
+用于将 JSONL/CSV 题库导入答案缓存, 或导出、比较缓存内容
+
+用法:
+    python tools/cache_tool.py import bank.jsonl [--cache cache.db] [--overwrite]
+    python tools/cache_tool.py export out.csv [--cache cache.db]
+    python tools/cache_tool.py diff bank.csv [--cache cache.db] [--show-same]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加父目录到sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.answer_cache import CacheDAO
+from api.cache_io import (
+    ADDED,
+    CHANGED,
+    DEFAULT_CHUNK_SIZE,
+    SAME,
+    detect_format,
+    diff_records,
+    export_records,
+    import_records,
+    read_records,
+    write_records,
+)
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="答案缓存批量导入导出工具",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--cache", default=CacheDAO.DEFAULT_CACHE_FILE, help="答案缓存文件路径"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["jsonl", "csv"],
+        default=None,
+        help="文件格式, 默认按扩展名判断",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每次读写的条数"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="导入题库文件")
+    p_import.add_argument("file", help="JSONL/CSV 题库文件")
+    p_import.add_argument(
+        "--overwrite", action="store_true", help="缓存中已有不同答案时覆盖"
+    )
+
+    p_export = sub.add_parser("export", help="导出答案缓存")
+    p_export.add_argument("file", help="输出文件, 为 - 时输出到标准输出")
+
+    p_diff = sub.add_parser("diff", help="比较题库文件与答案缓存")
+    p_diff.add_argument("file", help="JSONL/CSV 题库文件")
+    p_diff.add_argument(
+        "--show-same", action="store_true", help="同时列出答案相同的题目"
+    )
+
+    return parser.parse_args(argv)
+
+
+def run_import(dao: CacheDAO, args) -> None:
+    fmt = detect_format(args.file, args.format)
+    with open(args.file, "r", encoding="utf-8-sig", newline="") as fp:
+        stats = import_records(
+            dao, read_records(fp, fmt), args.chunk_size, args.overwrite
+        )
+    print(
+        f"共读取{stats['total']}条: 新增{stats['added']}, 更新{stats['updated']}, "
+        f"未变化{stats['unchanged']}, 答案冲突未覆盖{stats['conflict']}, "
+        f"文件内重复{stats['duplicate']}, 无效{stats['invalid']}"
+    )
+
+
+def run_export(dao: CacheDAO, args) -> None:
+    records = export_records(dao, args.chunk_size)
+    if args.file == "-":
+        count = write_records(records, sys.stdout, args.format or "jsonl")
+    else:
+        fmt = detect_format(args.file, args.format)
+        with open(args.file, "w", encoding="utf-8", newline="") as fp:
+            count = write_records(records, fp, fmt)
+    print(f"已导出{count}条记录", file=sys.stderr)
+
+
+def run_diff(dao: CacheDAO, args) -> None:
+    fmt = detect_format(args.file, args.format)
+    counts = {ADDED: 0, CHANGED: 0, SAME: 0}
+    with open(args.file, "r", encoding="utf-8-sig", newline="") as fp:
+        for status, title, cached, answer in diff_records(
+            dao, read_records(fp, fmt), args.chunk_size
+        ):
+            counts[status] += 1
+            if status == ADDED:
+                print(f"+ {title} -> {answer!r}")
+            elif status == CHANGED:
+                print(f"~ {title} -> {cached!r} => {answer!r}")
+            elif args.show_same:
+                print(f"= {title} -> {answer!r}")
+    print(
+        f"新增{counts[ADDED]}条, 答案不同{counts[CHANGED]}条, 相同{counts[SAME]}条",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    dao = CacheDAO(args.cache)
+    try:
+        {"import": run_import, "export": run_export, "diff": run_diff}[args.command](
+            dao, args
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        dao.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Add shared answer cache
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """创建共享答案缓存表"""
+    op.create_table('answer_caches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('namespace', sa.String(length=40), nullable=False),
+        sa.Column('key_hash', sa.String(length=32), nullable=False),
+        sa.Column('question_key', sa.Text(), nullable=False),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('answer', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('namespace', 'key_hash', name='uq_answer_caches_namespace_key')
+    )
+    op.create_index(op.f('ix_answer_caches_namespace'), 'answer_caches', ['namespace'], unique=False)
+    op.create_index(op.f('ix_answer_caches_key_hash'), 'answer_caches', ['key_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """删除共享答案缓存表"""
+    op.drop_index(op.f('ix_answer_caches_key_hash'), table_name='answer_caches')
+    op.drop_index(op.f('ix_answer_caches_namespace'), table_name='answer_caches')
+    op.drop_table('answer_caches')
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+共享答案缓存后端
+
+将题库答案保存在 Web 数据库的 answer_caches 表中, 所有 Celery worker 共用同一份答案,
+一个用户查到的答案其他用户可直接复用; 每个 worker 进程内的 LRU 仍由 CacheDAO 维护。
+"""
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.answer_cache import CacheBackend
+from database_sync import SyncSessionLocal
+from models import AnswerCache
+
+
+class DatabaseCacheBackend(CacheBackend):
+    """基于 Web 数据库的共享答案存储"""
+
+    def __init__(
+        self,
+        user_id: Optional[int] = None,
+        private: bool = False,
+        session_factory: Callable[[], Session] = SyncSessionLocal,
+    ):
+        """
+        Args:
+            user_id: 当前任务所属用户ID
+            private: 为True时答案写入用户私有命名空间, 否则写入全局命名空间
+            session_factory: 同步数据库会话工厂
+        """
+        self.user_id = user_id
+        self._session_factory = session_factory
+        user_namespace = (
+            AnswerCache.user_namespace(user_id) if user_id is not None else None
+        )
+        # 读取时用户私有答案优先于全局答案
+        self.read_namespaces: List[str] = [
+            ns for ns in (user_namespace, AnswerCache.GLOBAL_NAMESPACE) if ns
+        ]
+        self.write_namespace = (
+            user_namespace
+            if private and user_namespace
+            else AnswerCache.GLOBAL_NAMESPACE
+        )
+        self.key = f"{','.join(self.read_namespaces)}->{self.write_namespace}"
+
+    def get(self, key_hash: str) -> Optional[Tuple[str, str]]:
+        with self._session_factory() as db:
+            rows = db.execute(
+                select(
+                    AnswerCache.namespace, AnswerCache.title, AnswerCache.answer
+                ).where(
+                    AnswerCache.key_hash == key_hash,
+                    AnswerCache.namespace.in_(self.read_namespaces),
+                )
+            ).all()
+        if not rows:
+            return None
+        row = min(rows, key=lambda r: self.read_namespaces.index(r.namespace))
+        return row.title, row.answer
+
+    def get_many(self, key_hashes: List[str]) -> Dict[str, Tuple[str, str]]:
+        result: Dict[str, Tuple[str, str]] = {}
+        priority: Dict[str, int] = {}
+        with self._session_factory() as db:
+            for start in range(0, len(key_hashes), 500):
+                rows = db.execute(
+                    select(
+                        AnswerCache.key_hash,
+                        AnswerCache.namespace,
+                        AnswerCache.title,
+                        AnswerCache.answer,
+                    ).where(
+                        AnswerCache.key_hash.in_(key_hashes[start : start + 500]),
+                        AnswerCache.namespace.in_(self.read_namespaces),
+                    )
+                ).all()
+                for row in rows:
+                    rank = self.read_namespaces.index(row.namespace)
+                    if rank < priority.get(row.key_hash, len(self.read_namespaces)):
+                        priority[row.key_hash] = rank
+                        result[row.key_hash] = (row.title, row.answer)
+        return result
+
+    def put(self, key_hash: str, question_key: str, title: str, answer: str) -> None:
+        self.put_many([(key_hash, question_key, title, answer)])
+
+    def put_many(self, rows: List[Tuple[str, str, str, str]]) -> None:
+        # 同一批中重复的题目以最后一条为准
+        values = {
+            key_hash: {
+                "question_key": question_key,
+                "title": title,
+                "answer": answer,
+                "user_id": self.user_id,
+            }
+            for key_hash, question_key, title, answer in rows
+        }
+        with self._session_factory() as db:
+            existing = {
+                entry.key_hash: entry
+                for entry in db.execute(
+                    select(AnswerCache).where(
+                        AnswerCache.namespace == self.write_namespace,
+                        AnswerCache.key_hash.in_(list(values)),
+                    )
+                ).scalars()
+            }
+            for key_hash, value in values.items():
+                entry = existing.get(key_hash)
+                if entry is None:
+                    db.add(
+                        AnswerCache(
+                            namespace=self.write_namespace, key_hash=key_hash, **value
+                        )
+                    )
+                else:
+                    for name, item in value.items():
+                        setattr(entry, name, item)
+            try:
+                db.commit()
+                return
+            except IntegrityError:
+                # 其他worker同时写入了相同的题目, 逐条改为更新
+                db.rollback()
+        for key_hash, value in values.items():
+            self._upsert(key_hash, value)
+
+    def _upsert(self, key_hash: str, value: dict) -> None:
+        with self._session_factory() as db:
+            updated = db.execute(
+                update(AnswerCache)
+                .where(
+                    AnswerCache.namespace == self.write_namespace,
+                    AnswerCache.key_hash == key_hash,
+                )
+                .values(**value)
+            ).rowcount
+            if not updated:
+                db.add(
+                    AnswerCache(
+                        namespace=self.write_namespace, key_hash=key_hash, **value
+                    )
+                )
+            db.commit()
+
+    def iter_keys(self) -> Iterable[Tuple[str, str]]:
+        with self._session_factory() as db:
+            return db.execute(
+                select(AnswerCache.question_key, AnswerCache.key_hash).where(
+                    AnswerCache.namespace.in_(self.read_namespaces)
+                )
+            ).all()
+
+    def iter_items(
+        self, after: str = "", limit: int = 1000
+    ) -> List[Tuple[str, str, str]]:
+        # 导出写入命名空间中的答案
+        with self._session_factory() as db:
+            return [
+                tuple(row)
+                for row in db.execute(
+                    select(AnswerCache.key_hash, AnswerCache.title, AnswerCache.answer)
+                    .where(
+                        AnswerCache.namespace == self.write_namespace,
+                        AnswerCache.key_hash > after,
+                    )
+                    .order_by(AnswerCache.key_hash)
+                    .limit(limit)
+                )
+            ]
+
+    def count(self) -> int:
+        with self._session_factory() as db:
+            return db.execute(
+                select(func.count(func.distinct(AnswerCache.key_hash))).where(
+                    AnswerCache.namespace.in_(self.read_namespaces)
+                )
+            ).scalar_one()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+题库查询统计的跨进程汇总
+
+每个 Celery worker 进程在任务结束后将进程内的统计快照写入共享目录,
+管理接口读取目录中的全部快照并合并。文件名包含主机名与进程号,
+进程重启后旧文件保留, 因此合并结果是保留期内所有进程的累计值;
+超过 ANSWER_METRICS_RETENTION_DAYS 天未更新的快照在保存时删除, 读取时忽略。
+"""
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import settings
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from api.answer_metrics import METRICS
+from api.logger import logger
+
+
+def worker_metrics_file() -> Path:
+    """当前进程的快照文件路径"""
+    return (
+        Path(settings.ANSWER_METRICS_DIR) / f"{socket.gethostname()}-{os.getpid()}.json"
+    )
+
+
+def _expire_before() -> Optional[float]:
+    """早于该时间戳的快照视为过期, 不删除时返回None"""
+    days = settings.ANSWER_METRICS_RETENTION_DAYS
+    if days <= 0:
+        return None
+    return time.time() - days * 86400
+
+
+def prune_worker_metrics() -> int:
+    """
+    删除超过保留天数未更新的快照文件
+
+    Returns:
+        删除的文件数
+    """
+    expire_before = _expire_before()
+    directory = Path(settings.ANSWER_METRICS_DIR)
+    if expire_before is None or not directory.is_dir():
+        return 0
+    removed = 0
+    for path in directory.glob("*.json"):
+        try:
+            if path.stat().st_mtime < expire_before:
+                path.unlink()
+                removed += 1
+        except OSError as e:
+            logger.debug(f"删除过期的题库查询统计{path.name}失败: {e}")
+    return removed
+
+
+def save_worker_metrics() -> None:
+    """保存当前进程的统计快照, 并删除过期的快照"""
+    try:
+        METRICS.save(worker_metrics_file())
+    except OSError as e:
+        logger.warning(f"保存题库查询统计失败: {e}")
+    prune_worker_metrics()
+
+
+def load_worker_metrics() -> Dict[str, dict]:
+    """
+    读取所有进程的统计快照
+
+    Returns:
+        {主机名-进程号: 快照}, 无法读取的文件与过期的快照会被忽略
+    """
+    directory = Path(settings.ANSWER_METRICS_DIR)
+    snapshots = {}
+    if not directory.is_dir():
+        return snapshots
+    expire_before = _expire_before()
+    for path in sorted(directory.glob("*.json")):
+        try:
+            with path.open("r", encoding="utf8") as fp:
+                snapshot = json.load(fp)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取题库查询统计{path.name}失败: {e}")
+            continue
+        if expire_before is not None and snapshot.get("updated_at", 0) < expire_before:
+            continue
+        snapshots[path.stem] = snapshot
+    return snapshots
@@ -92,6 +92,26 @@ class Settings(BaseSettings):
         default=3, description="每用户最大并发任务数"
     )
     TASK_TIMEOUT: int = Field(default=7200, description="任务超时时间（秒）")
+    SHARED_ANSWER_CACHE: bool = Field(
+        default=True, description="题库答案保存在数据库中供所有任务共享"
+    )
+    ANSWER_CACHE_FILE: str = Field(
+        default="data/answer_cache.db",
+        description="worker本地答案缓存数据库, 保存未命中记录与待写入共享缓存的答案日志",
+    )
+    ANSWER_METRICS_DIR: str = Field(
+        default="data/answer_metrics", description="各worker题库查询统计的保存目录"
+    )
+    ANSWER_METRICS_RETENTION_DAYS: int = Field(
+        default=7, description="超过该天数未更新的worker统计快照被删除, 0表示不删除"
+    )
+    FONT_CACHE_DIR: str = Field(
+        default="data/font_cache",
+        description="加密字体解析结果的缓存目录, 所有worker共享, 为空则只缓存在内存中",
+    )
+    FONT_CACHE_MAX_FILES: int = Field(
+        default=5000, description="字体缓存目录的最大文件数, 超过时删除最早的文件, 0表示不限制"
+    )
 
     # 日志配置
     LOG_LEVEL: str = Field(default="INFO", description="日志级别")
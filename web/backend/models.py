@@ -6,7 +6,16 @@ from datetime import datetime, timezone
 from typing import Optional, List
 import json
 
-from sqlalchemy import String, Integer, Boolean, DateTime, Text, Float, ForeignKey
+from sqlalchemy import (
+    String,
+    Integer,
+    Boolean,
+    DateTime,
+    Text,
+    Float,
+    ForeignKey,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -406,3 +415,55 @@ class SystemConfig(Base):
             "updated_by": self.updated_by,
         }
         return data
+
+
+class AnswerCache(Base):
+    """共享答案缓存模型 - 所有Celery worker共用, 一个用户查到的答案其他用户可直接复用"""
+
+    __tablename__ = "answer_caches"
+    __table_args__ = (
+        UniqueConstraint("namespace", "key_hash", name="uq_answer_caches_namespace_key"),
+    )
+
+    GLOBAL_NAMESPACE = "global"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # global 为所有用户共享; user:<id> 为用户私有, 仅该用户可见
+    namespace: Mapped[str] = mapped_column(
+        String(40), default=GLOBAL_NAMESPACE, nullable=False, index=True
+    )
+    key_hash: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    question_key: Mapped[str] = mapped_column(Text, nullable=False)
+    title: Mapped[str] = mapped_column(Text, nullable=False)
+    answer: Mapped[str] = mapped_column(Text, nullable=False)
+    # 最后写入该答案的用户
+    user_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    @staticmethod
+    def user_namespace(user_id: int) -> str:
+        """用户私有命名空间"""
+        return f"user:{user_id}"
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return {
+            "id": self.id,
+            "namespace": self.namespace,
+            "key_hash": self.key_hash,
+            "title": self.title,
+            "answer": self.answer,
+            "user_id": self.user_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -2,9 +2,13 @@
 """
 管理员路由
 """
-from typing import List, Optional
+import io
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy import select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -25,6 +29,22 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from api.logger import logger
+from api.answer_cache import CacheDAO
+from api.answer_metrics import METRICS, merge_snapshots
+from api.cache_io import (
+    ADDED,
+    CHANGED,
+    DEFAULT_CHUNK_SIZE,
+    SAME,
+    detect_format,
+    diff_records,
+    export_records,
+    format_records,
+    import_records,
+    read_records,
+)
+from answer_cache_backend import DatabaseCacheBackend
+from answer_metrics_store import load_worker_metrics, worker_metrics_file
 
 router = APIRouter()
 
@@ -516,3 +536,153 @@ async def recover_interrupted_tasks_manually(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"恢复任务失败: {str(e)}",
         )
+
+
+@contextmanager
+def _answer_cache_dao(user_id: Optional[int]) -> Iterator[CacheDAO]:
+    """
+    共享答案缓存, user_id为空时使用全局命名空间, 否则使用该用户的私有命名空间
+
+    实例在使用结束后释放, 各用户的缓存实例不会常驻进程; 释放时会写入待写记录,
+    应在线程池中使用
+    """
+    backend = DatabaseCacheBackend(user_id=user_id, private=user_id is not None)
+    dao = CacheDAO.acquire(settings.ANSWER_CACHE_FILE, backend)
+    try:
+        yield dao
+    finally:
+        CacheDAO.release(settings.ANSWER_CACHE_FILE, backend)
+
+
+def _export_answer_cache(user_id: Optional[int], file_format: str) -> Iterator[str]:
+    """逐块生成导出内容, 由 StreamingResponse 在线程池中迭代"""
+    with _answer_cache_dao(user_id) as dao:
+        yield from format_records(export_records(dao), file_format)
+
+
+@router.post("/answer-cache/import")
+async def import_answer_cache(
+    file: UploadFile = File(..., description="JSONL/CSV 题库文件"),
+    file_format: Optional[str] = Query(
+        None, alias="format", description="jsonl或csv, 默认按扩展名判断"
+    ),
+    overwrite: bool = Query(False, description="已有不同答案时是否覆盖"),
+    user_id: Optional[int] = Query(None, description="导入到指定用户的私有命名空间"),
+    admin_user: User = Depends(require_admin),
+):
+    """
+    批量导入题库到共享答案缓存
+
+    管理员专用 - 按块流式导入, 标题规范化后与已有答案去重
+    """
+    try:
+        fmt = detect_format(file.filename or "", file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+
+    def run_import():
+        with _answer_cache_dao(user_id) as dao:
+            return import_records(
+                dao, read_records(text, fmt), DEFAULT_CHUNK_SIZE, overwrite
+            )
+
+    try:
+        # 数据库写入为同步操作, 放到线程池中执行
+        stats = await run_in_threadpool(run_import)
+    except (UnicodeDecodeError, RuntimeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"导入失败: {e}"
+        )
+    finally:
+        text.detach()
+
+    logger.info(f"管理员 {admin_user.username} 导入题库 {file.filename}: {stats}")
+    return stats
+
+
+@router.get("/answer-cache/export")
+async def export_answer_cache(
+    file_format: str = Query("jsonl", alias="format", pattern="^(jsonl|csv)$"),
+    user_id: Optional[int] = Query(None, description="导出指定用户的私有命名空间"),
+    admin_user: User = Depends(require_admin),
+):
+    """
+    流式导出共享答案缓存
+
+    管理员专用
+    """
+    media_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+    logger.info(f"管理员 {admin_user.username} 导出答案缓存")
+    return StreamingResponse(
+        _export_answer_cache(user_id, file_format),
+        media_type=f"{media_type}; charset=utf-8",
+        headers={
+            "Content-Disposition": f"attachment; filename=answer_cache.{file_format}"
+        },
+    )
+
+
+@router.post("/answer-cache/diff")
+async def diff_answer_cache(
+    file: UploadFile = File(..., description="JSONL/CSV 题库文件"),
+    file_format: Optional[str] = Query(
+        None, alias="format", description="jsonl或csv, 默认按扩展名判断"
+    ),
+    limit: int = Query(100, ge=0, le=1000, description="最多返回的差异条数"),
+    user_id: Optional[int] = Query(None, description="与指定用户的私有命名空间比较"),
+    admin_user: User = Depends(require_admin),
+):
+    """
+    比较题库文件与共享答案缓存
+
+    管理员专用 - 返回各类差异的数量及前limit条新增或答案不同的题目
+    """
+    try:
+        fmt = detect_format(file.filename or "", file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+
+    def run_diff():
+        counts = {ADDED: 0, CHANGED: 0, SAME: 0}
+        items = []
+        with _answer_cache_dao(user_id) as dao:
+            for diff_status, title, cached, answer in diff_records(
+                dao, read_records(text, fmt)
+            ):
+                counts[diff_status] += 1
+                if diff_status != SAME and len(items) < limit:
+                    items.append(
+                        {
+                            "status": diff_status,
+                            "title": title,
+                            "cached": cached,
+                            "answer": answer,
+                        }
+                    )
+        return {"counts": counts, "items": items}
+
+    try:
+        return await run_in_threadpool(run_diff)
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"文件编码错误: {e}"
+        )
+    finally:
+        text.detach()
+
+
+@router.get("/answer-metrics")
+async def get_answer_metrics(admin_user: User = Depends(require_admin)):
+    """
+    获取题库查询统计
+
+    管理员专用 - 合并各worker保存的快照, 返回缓存命中、各题库延迟、错误、token消耗与类型不符的答案数
+    """
+    workers = await run_in_threadpool(load_worker_metrics)
+    # 当前进程(例如导入题库时)的统计尚未写入文件, 一并计入
+    workers.setdefault(worker_metrics_file().stem, METRICS.snapshot())
+    return {"total": merge_snapshots(workers.values()), "workers": workers}
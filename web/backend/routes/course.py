@@ -52,7 +52,7 @@ async def get_course_list(
         account = Account(_username=config.cx_username, _password=cx_password)
 
         # 创建Chaoxing实例
-        chaoxing = Chaoxing(account=account, tiku=None, query_delay=0)
+        chaoxing = Chaoxing(account=account, tiku=None)
 
         # 登录
         logger.info(f"用户 {current_user.username} 正在获取课程列表...")
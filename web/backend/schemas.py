@@ -71,6 +71,9 @@ class TikuConfig(BaseModel):
     submit: bool = Field(False, description="是否提交")
     cover_rate: float = Field(0.9, description="覆盖率")
     delay: float = Field(1.0, description="查询延迟")
+    cache_scope: Optional[str] = Field(
+        "global", description="答案缓存范围: global所有用户共享, user仅自己可见"
+    )
     # AI题库专用字段
     endpoint: Optional[str] = Field(None, description="AI API端点")
     key: Optional[str] = Field(None, description="AI API密钥")
@@ -10,7 +10,10 @@ from typing import Optional, Callable
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+from answer_cache_backend import DatabaseCacheBackend
+from answer_metrics_store import save_worker_metrics
 from celery_app import app
+from config import settings
 from database_sync import get_sync_db
 from models import Task, User, UserConfig, TaskLog
 from sqlalchemy import select
@@ -18,6 +21,8 @@ from sqlalchemy import select
 # 导入刷课核心逻辑
 from api.base import Chaoxing, Account
 from api.answer import Tiku
+from api.answer_cache import CacheDAO
+from api.font_cache import FONT_CACHE
 from api.notification import Notification
 from api.logger import logger
 from api.secure_config import SecureConfig
@@ -321,6 +326,8 @@ def execute_study_task(task_id: int, user_id: int):
         task_id: 任务ID
         user_id: 用户ID
     """
+    tiku = None
+    cache_backend = None
     try:
         # 获取任务和用户信息
         db = get_sync_db()
@@ -373,13 +380,21 @@ def execute_study_task(task_id: int, user_id: int):
         tiku_config = config.get_tiku_config()
         tiku.config_set(tiku_config)
         tiku = tiku.get_tiku_from_config()
+        # 未命中记录与答案写入日志保存在数据目录中, 与管理接口共用
+        tiku.CACHE_FILE = settings.ANSWER_CACHE_FILE
+        if settings.SHARED_ANSWER_CACHE:
+            # 答案保存在数据库中, 所有worker与用户共享
+            cache_backend = DatabaseCacheBackend(
+                user_id=user_id, private=tiku_config.get("cache_scope") == "user"
+            )
+            # 按用户创建的缓存实例在任务结束后释放
+            CacheDAO.acquire(tiku.CACHE_FILE, cache_backend)
+            tiku.cache_backend = cache_backend
         tiku.init_tiku()
-
-        # 获取查询延迟
-        query_delay = tiku_config.get("delay", 0)
+        FONT_CACHE.set_directory(settings.FONT_CACHE_DIR, settings.FONT_CACHE_MAX_FILES)
 
         # 实例化超星API
-        chaoxing = Chaoxing(account=account, tiku=tiku, query_delay=query_delay)
+        chaoxing = Chaoxing(account=account, tiku=tiku)
 
         log_task_message(task_id, "INFO", "🔐 正在登录超星...")
         if not update_task_progress(task_id, 10):
@@ -544,6 +559,14 @@ def execute_study_task(task_id: int, user_id: int):
         logger.error(f"任务{task_id}执行失败: {e}", exc_info=True)
         log_task_message(task_id, "ERROR", f"❌ 任务执行失败: {str(e)}")
         update_task_progress(task_id, 0, "failed", str(e))
+    finally:
+        # 关闭题库连接
+        if tiku is not None:
+            tiku.close()
+            if cache_backend is not None:
+                CacheDAO.release(tiku.CACHE_FILE, cache_backend)
+            # 供管理接口汇总各worker的题库查询统计
+            save_worker_metrics()
 
 
 def process_course_with_detailed_progress(